@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+=== EMAIL EXTRACTION MICRO-BENCHMARK ===
+Version: 1.0.0 | Created: 2025-11-27
+
+COMPARES:
+- Legacy extractor (lib/text_utils_FIXED.py - per-TLD regex loop, BeautifulSoup html.parser)
+- Current extractor (lib/text_utils.py - precompiled engine, token dedup, ParsedPage)
+
+METRICS (per fixture):
+- extract_emails_from_html: ms per page (parse + extraction)
+- extract_emails on full text: ms per call (engine only, no parsing)
+- Speedup
+- Output diff (emails found only by one implementation)
+
+USAGE:
+python email_extraction_benchmark.py
+python email_extraction_benchmark.py --repeat 20 --fixtures fixtures/html
+
+Caches of the current engine are cleared before every iteration (cold numbers).
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+from statistics import median
+
+# Add scraping module root (for lib.*)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bs4 import BeautifulSoup
+
+from lib import text_utils
+from lib import text_utils_FIXED as legacy
+from lib.parsed_page import PARSER_BACKEND
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "html"
+
+
+def time_call(func, arg, repeat: int) -> float:
+    """Median time of func(arg) in milliseconds (engine caches cleared each run)"""
+    timings = []
+    for _ in range(repeat):
+        text_utils._emails_in_token.cache_clear()
+        start = time.perf_counter()
+        func(arg)
+        timings.append((time.perf_counter() - start) * 1000)
+    return median(timings)
+
+
+def benchmark_fixture(path: Path, repeat: int) -> dict:
+    """Run legacy vs current on one saved HTML page"""
+    html = path.read_text(encoding='utf-8')
+    full_text = BeautifulSoup(html, 'html.parser').get_text(separator=' ')
+
+    legacy_emails = legacy.extract_emails_from_html(html)
+    current_emails = text_utils.extract_emails_from_html(html)
+
+    result = {
+        'fixture': path.name,
+        'size_kb': round(len(html) / 1024, 1),
+        'html_legacy_ms': time_call(legacy.extract_emails_from_html, html, repeat),
+        'html_current_ms': time_call(text_utils.extract_emails_from_html, html, repeat),
+        'text_legacy_ms': time_call(legacy.extract_emails, full_text, repeat),
+        'text_current_ms': time_call(text_utils.extract_emails, full_text, repeat),
+        'only_legacy': sorted(set(legacy_emails) - set(current_emails)),
+        'only_current': sorted(set(current_emails) - set(legacy_emails)),
+        'emails': len(current_emails)
+    }
+    return result
+
+
+def print_results(results: list):
+    """Print comparison table"""
+    print("\n" + "=" * 86)
+    print(f"EMAIL EXTRACTION BENCHMARK (parser backend: {PARSER_BACKEND})")
+    print("=" * 86)
+    print(f"{'Fixture':<26} {'KB':>6} {'html old':>10} {'html new':>10} {'x':>6} "
+          f"{'text old':>10} {'text new':>10} {'x':>6}")
+    print("-" * 86)
+
+    for r in results:
+        html_speedup = r['html_legacy_ms'] / r['html_current_ms'] if r['html_current_ms'] else 0
+        text_speedup = r['text_legacy_ms'] / r['text_current_ms'] if r['text_current_ms'] else 0
+        print(f"{r['fixture']:<26} {r['size_kb']:>6} {r['html_legacy_ms']:>8.2f}ms {r['html_current_ms']:>8.2f}ms "
+              f"{html_speedup:>5.1f}x {r['text_legacy_ms']:>8.2f}ms {r['text_current_ms']:>8.2f}ms {text_speedup:>5.1f}x")
+
+    print("-" * 86)
+
+    print("\n[OUTPUT DIFF]")
+    for r in results:
+        if not r['only_legacy'] and not r['only_current']:
+            print(f"  {r['fixture']}: identical ({r['emails']} emails)")
+            continue
+        print(f"  {r['fixture']}:")
+        if r['only_legacy']:
+            print(f"    only legacy:  {', '.join(r['only_legacy'])}")
+        if r['only_current']:
+            print(f"    only current: {', '.join(r['only_current'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark legacy vs precompiled email extraction')
+    parser.add_argument('--fixtures', default=str(FIXTURES_DIR), help='Directory with saved .html pages')
+    parser.add_argument('--repeat', type=int, default=10, help='Iterations per measurement (median is reported)')
+
+    args = parser.parse_args()
+
+    fixtures = sorted(Path(args.fixtures).glob('*.html'))
+    if not fixtures:
+        print(f"[ERROR] No .html fixtures found in {args.fixtures}")
+        sys.exit(1)
+
+    results = [benchmark_fixture(path, args.repeat) for path in fixtures]
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
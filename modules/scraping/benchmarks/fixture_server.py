@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+=== LOCAL FIXTURE SERVER FOR SCRAPER BENCHMARKS ===
+Version: 1.0.0 | Created: 2026-10-16
+
+Offline stand-in for the internet: every lead is its own "site" on its own
+port of 127.0.0.1, all served by one aiohttp app (only loopback is bound, works
+on any OS without extra 127.x.y.z addresses). A separate host:port per site keeps
+per-domain limits (deep search rate limiter, limit_per_host) behaving like on
+real sites. canonical_domain drops the port, so scrapers must run with domain
+dedup off.
+
+SITE PROFILES (deterministic per seed):
+- homepage_email: recorded homepage (fixtures/html) + site email in the footer
+- contact_email:  homepage without email, email on /contact (robots.txt -> sitemap.xml -> /contact)
+- no_email:       homepage, /contact and sitemap without any email
+- error:          homepage always answers 500 (error_rate share of sites)
+Any profile may start with a redirect chain (redirect_rate share of sites, redirect_hops 301s).
+
+Every response is delayed by latency_ms +- jitter_ms.
+
+PER-LEAD LATENCY:
+The server records first request arrival and last response of every site -
+identical measurement for thread-based and async scrapers, no hooks inside them.
+
+USAGE:
+    corpus = build_corpus(leads=500, seed=42, error_rate=0.05, redirect_rate=0.1)
+    server = FixtureServer(corpus, latency_ms=50, jitter_ms=20)
+    server.start()                      # background thread
+    urls = [server.url_for(site) for site in corpus]
+    ...
+    spans = server.lead_spans()         # {site_id: seconds}
+    server.stop()
+"""
+
+import time
+import random
+import socket
+import asyncio
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "html"
+
+PROFILES = ('homepage_email', 'contact_email', 'no_email')
+
+PLAIN_HOMEPAGE = """<!DOCTYPE html>
+<html><head><title>{name}</title></head>
+<body>
+<nav><a href="/">Home</a> <a href="/about">About</a> <a href="/services">Services</a> <a href="/contact">Contact</a></nav>
+<h1>{name}</h1>
+<p>Family owned business serving the area since 1987. Installation, repair and maintenance.</p>
+<p>Call us today for a free estimate.</p>
+</body></html>"""
+
+CONTACT_PAGE = """<!DOCTYPE html>
+<html><head><title>Contact - {name}</title></head>
+<body>
+<nav><a href="/">Home</a> <a href="/about">About</a></nav>
+<h1>Contact us</h1>
+<p>Office hours: Mon-Fri 8am-6pm</p>
+{email_html}
+</body></html>"""
+
+SITEMAP_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+<url><loc>{base}/</loc></url>
+<url><loc>{base}/about</loc></url>
+<url><loc>{base}/services</loc></url>
+<url><loc>{base}/contact</loc></url>
+</urlset>"""
+
+
+def load_recorded_homepages(fixtures_dir: Path = FIXTURES_DIR) -> List[str]:
+    """Recorded homepages used as bodies of homepage_email sites"""
+    return [path.read_text(encoding='utf-8') for path in sorted(Path(fixtures_dir).glob('*.html'))]
+
+
+def build_corpus(leads: int = 200, seed: int = 42, error_rate: float = 0.05,
+                 redirect_rate: float = 0.1, redirect_hops: int = 2,
+                 fixtures_dir: Path = FIXTURES_DIR) -> List[Dict]:
+    """
+    Deterministic list of sites
+
+    Returns:
+        [{'site_id', 'name', 'profile', 'email', 'redirects', 'template'}, ...]
+        email = site email the scraper is expected to find (None for no_email / error)
+    """
+    rng = random.Random(seed)
+    templates = load_recorded_homepages(fixtures_dir)
+
+    corpus = []
+    for index in range(leads):
+        profile = 'error' if rng.random() < error_rate else rng.choice(PROFILES)
+        email = f"info@site{index}.benchfixture.net" if profile in ('homepage_email', 'contact_email') else None
+        corpus.append({
+            'site_id': f"site{index}",
+            'name': f"Bench Site {index}",
+            'profile': profile,
+            'email': email,
+            'redirects': redirect_hops if rng.random() < redirect_rate else 0,
+            'template': rng.randrange(len(templates)) if templates else None
+        })
+    return corpus
+
+
+class FixtureServer:
+    """
+    aiohttp server for a corpus, running in a background thread
+    """
+
+    def __init__(self, corpus: List[Dict], base_port: int = 0, latency_ms: float = 0,
+                 jitter_ms: float = 0, seed: int = 42, fixtures_dir: Path = FIXTURES_DIR):
+        """
+        Args:
+            corpus: Sites from build_corpus()
+            base_port: Port of the first site, site #i listens on base_port + i (0 = any free ports)
+            latency_ms: Delay before every response
+            jitter_ms: Uniform +- jitter added to latency
+        """
+        self.corpus = corpus
+        self.base_port = base_port
+        self.ports: Dict[str, int] = {}                # site_id -> port
+        self._sites_by_port: Dict[int, Dict] = {}
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.templates = load_recorded_homepages(fixtures_dir)
+
+        self._rng = random.Random(seed)
+        self._spans: Dict[str, List[float]] = {}
+        self._requests = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    def url_for(self, site: Dict) -> str:
+        return f"http://127.0.0.1:{self.ports[site['site_id']]}/"
+
+    def start(self):
+        """Start serving in a background thread (returns once all ports are bound)"""
+        self._thread = threading.Thread(target=self._run, name='fixture-server', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop = None
+
+    def reset_metrics(self):
+        self._spans = {}
+        self._requests = 0
+
+    def lead_spans(self) -> Dict[str, float]:
+        """site_id -> seconds between first request and last response"""
+        return {site_id: last - first for site_id, (first, last) in self._spans.items()}
+
+    @property
+    def requests(self) -> int:
+        return self._requests
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+
+        # One loopback listener per site - the port tells the handler which site is asked
+        for index, site in enumerate(self.corpus):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind(('127.0.0.1', self.base_port + index if self.base_port else 0))
+            port = sock.getsockname()[1]
+            self.ports[site['site_id']] = port
+            self._sites_by_port[port] = site
+            self._loop.run_until_complete(web.SockSite(self._runner, sock, backlog=128).start())
+
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        sockname = request.transport.get_extra_info('sockname') if request.transport else None
+        site = self._sites_by_port.get(sockname[1]) if sockname else None
+        now = time.perf_counter()
+        self._requests += 1
+        span = self._spans.setdefault(site['site_id'] if site else '', [now, now])
+
+        if self.latency or self.jitter:
+            await asyncio.sleep(max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter)))
+
+        try:
+            return self._respond(site, request.path)
+        finally:
+            span[1] = time.perf_counter()
+
+    def _respond(self, site: Optional[Dict], path: str) -> web.StreamResponse:
+        if site is None:
+            return web.Response(status=404, text='unknown host')
+
+        base = f"http://127.0.0.1:{self.ports[site['site_id']]}"
+        home_path = '/home' if site['redirects'] else '/'
+
+        # Redirect chain: / -> /r/1 -> ... -> /home
+        if site['redirects'] and (path == '/' or path.startswith('/r/')):
+            hop = int(path.rsplit('/', 1)[1]) if path.startswith('/r/') else 0
+            location = f"/r/{hop + 1}" if hop + 1 < site['redirects'] else '/home'
+            raise web.HTTPMovedPermanently(location=location)
+
+        if path == home_path:
+            if site['profile'] == 'error':
+                return web.Response(status=500, text='Internal Server Error')
+            return web.Response(text=self._homepage(site), content_type='text/html')
+
+        if path == '/robots.txt':
+            return web.Response(text=f"User-agent: *\nAllow: /\nSitemap: {base}/sitemap.xml\n")
+
+        if path == '/sitemap.xml':
+            return web.Response(text=SITEMAP_XML.format(base=base), content_type='application/xml')
+
+        if path == '/contact' and site['profile'] != 'error':
+            email_html = f'<p>Email: <a href="mailto:{site["email"]}">{site["email"]}</a></p>' \
+                if site['profile'] == 'contact_email' else '<p>Use the form below.</p>'
+            return web.Response(text=CONTACT_PAGE.format(name=site['name'], email_html=email_html),
+                                content_type='text/html')
+
+        if path in ('/about', '/services') and site['profile'] != 'error':
+            return web.Response(text=PLAIN_HOMEPAGE.format(name=site['name']), content_type='text/html')
+
+        return web.Response(status=404, text='Not Found')
+
+    def _homepage(self, site: Dict) -> str:
+        if site['profile'] == 'homepage_email' and site['template'] is not None:
+            footer = f'<footer>Contact: <a href="mailto:{site["email"]}">{site["email"]}</a></footer>'
+            html = self.templates[site['template']]
+            return html.replace('</body>', footer + '</body>') if '</body>' in html else html + footer
+        return PLAIN_HOMEPAGE.format(name=site['name'])
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+=== OFFLINE SCRAPER BENCHMARK ===
+Version: 1.0.0 | Created: 2026-10-16
+
+Reproducible alternative to homepage_email_scraper/benchmark_scraper.py (which
+runs the scrapers against real websites): every scraper runs against the local
+fixture server (fixture_server.py) with a fixed corpus, latency and error mix.
+
+COMPARES:
+- simple:     SimpleHomepageScraper (thread-based, homepage_email_scraper/scraper.py)
+- ultra_fast: UltraFastScraper (asyncio, homepage_email_scraper/scraper_ultra_fast.py)
+- robust:     scraper/scraper_robust.py fetch phase (AI phase disabled)
+
+METRICS (per scraper):
+- leads/sec (wall time of the scrape call only)
+- p50 / p95 per-lead latency (fixture server: first request -> last response of the lead's host)
+- CPU seconds (user + sys of the scraper process during the scrape, psutil)
+- Peak RSS (MB, psutil: peak_wset on Windows, sampled every 20ms elsewhere)
+- Email recall (site emails found / site emails in corpus) and server requests
+
+Each scraper runs in its own subprocess (clean RSS / CPU numbers); the fixture
+server runs in the parent process. Debug logs / outputs of the scrapers go to a
+temp dir that is removed after the run.
+
+USAGE:
+python scraper_benchmark.py
+python scraper_benchmark.py --leads 500 --latency-ms 80 --jitter-ms 40 --error-rate 0.1
+python scraper_benchmark.py --scrapers simple ultra_fast --save baseline.json
+python scraper_benchmark.py --baseline baseline.json --tolerance 0.2   # exit 1 on regression
+"""
+
+import re
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from typing import Dict, List
+
+import psutil
+
+# Add project root (for modules.*) and scraping module root (for lib.*)
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+SCRAPERS = ('simple', 'ultra_fast', 'robust')
+RESULT_PREFIX = 'BENCH_RESULT '
+SITE_EMAIL_RE = re.compile(r'info@site\d+\.benchfixture\.net')
+
+# metric -> True if higher is better (for --baseline comparison)
+REGRESSION_METRICS = {
+    'leads_per_sec': True,
+    'p95_ms': False,
+    'cpu_sec': False,
+    'peak_rss_mb': False,
+    'recall': True,
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class PeakRSS:
+    """Peak RSS of this process: peak_wset on Windows, otherwise RSS sampled in a background thread"""
+
+    def __init__(self, interval: float = 0.02):
+        self.process = psutil.Process()
+        self.interval = interval
+        self.peak = self.process.memory_info().rss
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name='rss-sampler', daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self.process.memory_info().rss)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        memory = self.process.memory_info()
+        self.peak = max(self.peak, memory.rss, getattr(memory, 'peak_wset', 0))
+
+
+# ========================
+# CHILD PROCESS (one scraper)
+# ========================
+
+# Domain dedup off: every fixture site is 127.0.0.1 with its own port, canonical_domain drops the port
+
+def run_simple(urls: List[str], args) -> List[str]:
+    import pandas as pd
+    from modules.scraping.homepage_email_scraper.scraper import SimpleHomepageScraper
+
+    scraper = SimpleHomepageScraper(workers=args.workers, max_pages=args.max_pages, scraping_mode=args.mode,
+                                    email_format='separate', save_content=False, dedupe_domains=False,
+                                    debug_log_dir=Path(args.work_dir))
+    df = scraper.process_batch(pd.DataFrame({'name': [''] * len(urls), 'website': urls}))
+    return df['email'].dropna().astype(str).tolist() if 'email' in df.columns else []
+
+
+def run_ultra_fast(urls: List[str], args) -> List[str]:
+    import asyncio
+    import pandas as pd
+    from modules.scraping.homepage_email_scraper.scraper_ultra_fast import UltraFastScraper
+
+    scraper = UltraFastScraper(workers=args.workers, max_pages=args.max_pages, scraping_mode=args.mode,
+                               email_format='separate', save_content=False, dedupe_domains=False)
+    df = asyncio.run(scraper.process_batch_async(pd.DataFrame({'name': [''] * len(urls), 'website': urls})))
+    return df['email'].dropna().astype(str).tolist() if 'email' in df.columns else []
+
+
+def run_robust(urls: List[str], args) -> List[str]:
+    import asyncio
+    sys.path.insert(0, str(PROJECT_ROOT / 'scraper'))
+    import scraper_robust as robust
+
+    robust.CONFIG.update({
+        'CONCURRENT_SCRAPERS': args.workers,
+        'AI_PROCESSING': False,
+        'RESPONSE_CACHE': False,
+        'SKIP_DEAD_DOMAINS': False,
+        'OUTPUT_DIR': args.work_dir,
+    })
+
+    async def scrape():
+        dns_resolver = robust.create_dns_resolver()
+        async with robust.create_fetch_stage(dns_resolver) as fetch_stage:
+            return await robust.scrape_batch_robust(fetch_stage, list(enumerate(urls)),
+                                                    asyncio.Semaphore(args.workers), dns_resolver=dns_resolver)
+
+    results = asyncio.run(scrape())
+    # Text output only - site emails are searched in the converted page text
+    return [email for _, content, _, _ in results if content for email in SITE_EMAIL_RE.findall(content)]
+
+
+def run_child(args):
+    """Run one scraper on the input URLs, print metrics as one JSON line"""
+    urls = Path(args.input).read_text(encoding='utf-8').split()
+    runner = {'simple': run_simple, 'ultra_fast': run_ultra_fast, 'robust': run_robust}[args.child]
+
+    process = psutil.Process()
+    cpu_before = process.cpu_times()
+    with PeakRSS() as rss:
+        start = time.perf_counter()
+        try:
+            emails = runner(urls, args)
+            result = {'status': 'completed'}
+        except ImportError as e:
+            emails = []
+            result = {'status': 'skipped', 'error': f'missing dependency: {e.name or e}'}
+        wall = time.perf_counter() - start
+    cpu_after = process.cpu_times()
+
+    result.update({
+        'wall_sec': wall,
+        'cpu_sec': (cpu_after.user - cpu_before.user) + (cpu_after.system - cpu_before.system),
+        'peak_rss_mb': rss.peak / (1024 * 1024),
+        'emails': sorted({email.lower() for email in emails if SITE_EMAIL_RE.fullmatch(email.lower())})
+    })
+    print(RESULT_PREFIX + json.dumps(result), flush=True)
+
+
+# ========================
+# PARENT PROCESS (server + comparison)
+# ========================
+
+def benchmark_scraper(name: str, server, corpus: List[Dict], input_file: Path, work_dir: Path, args) -> Dict:
+    """Run one scraper subprocess against the fixture server"""
+    print(f"\n[RUN] {name} ({len(corpus)} leads)...", flush=True)
+    server.reset_metrics()
+
+    cmd = [sys.executable, str(Path(__file__).resolve()), '--child', name, '--input', str(input_file),
+           '--workers', str(args.workers), '--max-pages', str(args.max_pages), '--mode', args.mode,
+           '--work-dir', str(work_dir)]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=args.timeout, cwd=str(PROJECT_ROOT))
+    except subprocess.TimeoutExpired:
+        return {'scraper': name, 'status': 'timeout', 'error': f'timed out after {args.timeout}s'}
+
+    lines = [line for line in proc.stdout.splitlines() if line.startswith(RESULT_PREFIX)]
+    if not lines:
+        tail = (proc.stderr or proc.stdout).strip().splitlines()[-5:]
+        return {'scraper': name, 'status': 'failed', 'error': ' | '.join(tail)}
+
+    child = json.loads(lines[-1][len(RESULT_PREFIX):])
+    if child['status'] != 'completed':
+        return {'scraper': name, **child}
+
+    spans_ms = [seconds * 1000 for seconds in server.lead_spans().values()]
+    expected = {site['email'] for site in corpus if site['email']}
+    found = set(child['emails']) & expected
+
+    return {
+        'scraper': name,
+        'status': 'completed',
+        'leads': len(corpus),
+        'wall_sec': round(child['wall_sec'], 2),
+        'leads_per_sec': round(len(corpus) / child['wall_sec'], 2) if child['wall_sec'] else 0,
+        'p50_ms': round(percentile(spans_ms, 50), 1),
+        'p95_ms': round(percentile(spans_ms, 95), 1),
+        'cpu_sec': round(child['cpu_sec'], 2),
+        'peak_rss_mb': round(child['peak_rss_mb'], 1),
+        'recall': round(len(found) / len(expected), 3) if expected else 1.0,
+        'requests': server.requests,
+    }
+
+
+def print_results(results: List[Dict], config: Dict):
+    """Print comparison table"""
+    print("\n" + "=" * 96)
+    print(f"OFFLINE SCRAPER BENCHMARK (leads={config['leads']}, latency={config['latency_ms']}±{config['jitter_ms']}ms, "
+          f"errors={config['error_rate']:.0%}, redirects={config['redirect_rate']:.0%}, mode={config['mode']})")
+    print("=" * 96)
+    print(f"{'Scraper':<12} {'leads/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'CPU s':>8} {'RSS MB':>8} "
+          f"{'recall':>8} {'requests':>9} {'wall s':>8}")
+    print("-" * 96)
+
+    for r in results:
+        if r['status'] != 'completed':
+            print(f"{r['scraper']:<12} {r['status'].upper()}: {r.get('error', '')}")
+            continue
+        print(f"{r['scraper']:<12} {r['leads_per_sec']:>9.2f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+              f"{r['cpu_sec']:>8.2f} {r['peak_rss_mb']:>8.1f} {r['recall']:>8.1%} {r['requests']:>9} {r['wall_sec']:>8.2f}")
+
+    print("-" * 96)
+
+
+def compare_with_baseline(results: List[Dict], config: Dict, baseline_path: Path, tolerance: float) -> List[str]:
+    """Regressions vs a saved run (same config expected)"""
+    with open(baseline_path, encoding='utf-8') as f:
+        saved = json.load(f)
+    baseline = {r['scraper']: r for r in saved['results'] if r.get('status') == 'completed'}
+
+    changed = {key: (saved['config'].get(key), value) for key, value in config.items() if saved['config'].get(key) != value}
+    if changed:
+        print("\n[WARNING] Config differs from baseline: "
+              + ', '.join(f"{key} {old} -> {new}" for key, (old, new) in changed.items()))
+
+    regressions = []
+    for r in results:
+        base = baseline.get(r['scraper'])
+        if r['status'] != 'completed' or base is None:
+            continue
+        for metric, higher_is_better in REGRESSION_METRICS.items():
+            old, new = base[metric], r[metric]
+            if not old:
+                continue
+            change = (new - old) / old
+            if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+                regressions.append(f"{r['scraper']}: {metric} {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark of the homepage scrapers (local fixture server)')
+    parser.add_argument('--scrapers', nargs='+', choices=SCRAPERS, default=list(SCRAPERS))
+    parser.add_argument('--leads', type=int, default=200, help='Sites in the corpus (default: 200)')
+    parser.add_argument('--seed', type=int, default=42, help='Corpus / latency seed (default: 42)')
+    parser.add_argument('--latency-ms', type=float, default=50, help='Delay per response (default: 50)')
+    parser.add_argument('--jitter-ms', type=float, default=20, help='Uniform +- jitter per response (default: 20)')
+    parser.add_argument('--error-rate', type=float, default=0.05, help='Share of sites answering 500 (default: 0.05)')
+    parser.add_argument('--redirect-rate', type=float, default=0.1, help='Share of sites behind a redirect chain (default: 0.1)')
+    parser.add_argument('--redirect-hops', type=int, default=2, help='301 hops per redirect chain (default: 2)')
+    parser.add_argument('--mode', choices=['homepage_only', 'deep_search'], default='deep_search')
+    parser.add_argument('--workers', type=int, default=50)
+    parser.add_argument('--max-pages', type=int, default=5)
+    parser.add_argument('--timeout', type=int, default=600, help='Per-scraper timeout in seconds')
+    parser.add_argument('--save', help='Save results JSON (use as --baseline later)')
+    parser.add_argument('--baseline', help='Compare with a saved results JSON, exit 1 on regression')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative change vs baseline (default: 0.2)')
+    # Internal: run one scraper in this (child) process
+    parser.add_argument('--child', choices=SCRAPERS, help=argparse.SUPPRESS)
+    parser.add_argument('--input', help=argparse.SUPPRESS)
+    parser.add_argument('--work-dir', help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    from fixture_server import FixtureServer, build_corpus
+
+    corpus = build_corpus(leads=args.leads, seed=args.seed, error_rate=args.error_rate,
+                          redirect_rate=args.redirect_rate, redirect_hops=args.redirect_hops)
+    server = FixtureServer(corpus, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed)
+    server.start()
+
+    config = {key: getattr(args, key) for key in
+              ('leads', 'seed', 'latency_ms', 'jitter_ms', 'error_rate', 'redirect_rate', 'redirect_hops',
+               'mode', 'workers', 'max_pages')}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_file = Path(tmp_dir) / 'urls.txt'
+        input_file.write_text('\n'.join(server.url_for(site) for site in corpus), encoding='utf-8')
+        results = [benchmark_scraper(name, server, corpus, input_file, Path(tmp_dir), args) for name in args.scrapers]
+
+    server.stop()
+    print_results(results, config)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'config': config, 'results': results}, f, indent=2)
+        print(f"\n[SAVED] {args.save}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, config, Path(args.baseline), args.tolerance)
+        if regressions:
+            print(f"\n[REGRESSION] vs {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\n[OK] No regressions vs {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
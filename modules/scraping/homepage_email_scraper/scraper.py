@@ -37,6 +37,7 @@ v2.0.0 - Added multi-page search, 4 output files, detailed analytics
 
 import sys
 import time
+import asyncio
 import argparse
 import pandas as pd
 import json
@@ -44,8 +45,8 @@ import re
 import os
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 import threading
 
 try:
@@ -68,12 +69,38 @@ except ImportError:
 sys.path.insert(0, str(Path(__file__).parent.parent))
 try:
     from lib.http_utils import HTTPClient
+    from lib.rate_limiter import DomainRateLimiter
     from lib.text_utils import extract_emails_from_html, clean_html_to_text
+    from lib.parsed_page import ParsedPage
     from lib.sitemap_utils import SitemapParser
+    from lib.response_cache import ResponseCache, DEFAULT_CACHE_PATH
+    from lib.dead_domains import DeadDomainCache, DEFAULT_DEAD_DOMAINS_PATH
+    from lib.dns_resolver import DNSPreResolver
+    from lib.adaptive_concurrency import AdaptiveConcurrency
+    from lib.domain_dedup import DomainDedup
+    from lib.lead_priority import LeadPriority
+    from lib.scrape_engine import (
+        ScrapeEngine, ThreadFetchStage, ThreadDeepSearchStage, ExtractStage, ScrapeStats,
+        clean_email, clean_emails, classify_site_type, extract_social_links, validate_url, categorize_failure,
+        MAX_DEEP_EMAILS
+    )
 except ImportError:
     from modules.scraping.lib.http_utils import HTTPClient
+    from modules.scraping.lib.rate_limiter import DomainRateLimiter
     from modules.scraping.lib.text_utils import extract_emails_from_html, clean_html_to_text
+    from modules.scraping.lib.parsed_page import ParsedPage
     from modules.scraping.lib.sitemap_utils import SitemapParser
+    from modules.scraping.lib.response_cache import ResponseCache, DEFAULT_CACHE_PATH
+    from modules.scraping.lib.dead_domains import DeadDomainCache, DEFAULT_DEAD_DOMAINS_PATH
+    from modules.scraping.lib.dns_resolver import DNSPreResolver
+    from modules.scraping.lib.adaptive_concurrency import AdaptiveConcurrency
+    from modules.scraping.lib.domain_dedup import DomainDedup
+    from modules.scraping.lib.lead_priority import LeadPriority
+    from modules.scraping.lib.scrape_engine import (
+        ScrapeEngine, ThreadFetchStage, ThreadDeepSearchStage, ExtractStage, ScrapeStats,
+        clean_email, clean_emails, classify_site_type, extract_social_links, validate_url, categorize_failure,
+        MAX_DEEP_EMAILS
+    )
 
 
 class SimpleHomepageScraper:
@@ -85,12 +112,26 @@ class SimpleHomepageScraper:
                  scraping_mode: str = 'deep_search', extract_emails: bool = True,
                  email_format: str = 'separate', save_content: bool = True,
                  save_sitemap: bool = False, save_social_links: bool = False,
-                 save_other_links: bool = False, save_deep_content: bool = False):
+                 save_other_links: bool = False, save_deep_content: bool = False,
+                 cache: Optional[ResponseCache] = None, dead_domains: Optional[DeadDomainCache] = None,
+                 dns_resolver: Optional[DNSPreResolver] = None,
+                 concurrency: Optional[AdaptiveConcurrency] = None, dedupe_domains: bool = True,
+                 priority: Optional[LeadPriority] = None, debug_log_dir: Optional[Path] = None):
         # Set attributes first (needed by debug logger)
+        self.debug_log_dir = Path(debug_log_dir) if debug_log_dir else Path(__file__).parent / "results"
         self.workers = workers
+        self.concurrency = concurrency
+        self.dedupe_domains = dedupe_domains
+        self.domain_dedup: Optional[DomainDedup] = None
+        self.priority = priority
+
+        # ADAPTIVE: thread pool sized to the upper bound, the controller decides how many leads run
+        if concurrency is not None:
+            self.workers = concurrency.max_limit
+            logger.info(f"Adaptive concurrency: {concurrency.min_limit}-{concurrency.max_limit} leads in flight")
 
         # AUTO-TUNING: Optimize workers based on system resources
-        if workers == 50 and psutil:  # Only auto-tune if using default
+        elif workers == 50 and psutil:  # Only auto-tune if using default
             cpu_count = os.cpu_count() or 4
             available_ram_gb = psutil.virtual_memory().available / (1024**3)
 
@@ -114,45 +155,65 @@ class SimpleHomepageScraper:
         self.save_social_links = save_social_links
         self.save_other_links = save_other_links
         self.save_deep_content = save_deep_content
+        self.cache = cache
+        self.dead_domains = dead_domains
+        self.dns_resolver = dns_resolver
 
         # Setup debug logger (uses attributes above)
         self.debug_log_path = None
         self.debug_logger = None
         self._setup_debug_logger()
 
+        # Per-domain rate limiting: token bucket (1 req/sec per domain, new domains
+        # are not delayed) + max 3 concurrent requests per domain. Burst = concurrency,
+        # so parallel deep search pages of one site are not serialized by the bucket
+        self.rate_limiter = DomainRateLimiter(per_domain_rate=1.0, per_domain_burst=3, max_concurrent_per_domain=3)
+
+        # Deep search: candidate pages fetched in a shared pool, global timeout per site
+        self.deep_search_timeout = 90
+        self._deep_executor = None
+        self._deep_executor_lock = threading.Lock()
+
         # Initialize with debug logger
-        self.http_client = HTTPClient(timeout=15, retries=3)
+        # Pooled client: one shared Session, connection pool sized to worker count
+        self.http_client = HTTPClient(timeout=15, retries=3, pooled=True, pool_size=self.workers,
+                                      rate_limiter=self.rate_limiter, cache=cache)
         self.sitemap_parser = SitemapParser(timeout=15, debug_logger=self.debug_logger)
 
-        # Thread-safe stats
-        self._lock = threading.Lock()
-
-        # Per-domain rate limiting (max 3 concurrent requests per domain)
-        self._domain_semaphores = {}
-        self._domain_lock = threading.Lock()
-
-        self.stats = {
-            "total_processed": 0,
-            "success": 0,
-            "failed": 0,
-            "emails_found": 0,
-            "emails_from_homepage": 0,
-            "emails_from_deep": 0,
-            "no_emails": 0,
-            "static_sites": 0,
-            "dynamic_sites": 0,
-            "failed_static": 0,
-            "failed_dynamic": 0,
-            "failed_other": 0,
-        }
-        self.start_time = time.time()
+        # Shared with the async engine: emails / clean text / site type / links from one ParsedPage
+        self.extract_stage = ExtractStage(extract_emails=extract_emails, save_content=save_content,
+                                          save_social_links=save_social_links,
+                                          save_other_links=save_other_links)
+
+        # Thread-safe stats (same format as the async engine)
+        self.stats = ScrapeStats()
+        self.start_time = self.stats.start_time
+
+        # Same per-row pipeline as the async scrapers (dead domains, DNS pre-resolution, extract,
+        # deep search, adaptive slots); network I/O stays on HTTPClient in the engine's thread pool
+        self.engine = ScrapeEngine(
+            fetch=ThreadFetchStage(self._fetch_homepage, max_workers=self.workers),
+            extract=self.extract_stage,
+            deep_search=ThreadDeepSearchStage(self._deep_search_stage) if scraping_mode == 'deep_search' else None,
+            stats=self.stats,
+            workers=self.workers,
+            email_format=email_format,
+            sitemap_parser=self.sitemap_parser if save_sitemap else None,
+            save_sitemap=save_sitemap,
+            save_deep_content=save_deep_content,
+            # _deep_email_search stops at its own deadline - the engine only guards against a stuck thread
+            deep_search_timeout=self.deep_search_timeout + 10,
+            dead_domains=dead_domains,
+            dns_resolver=dns_resolver,
+            concurrency=concurrency
+        )
 
     def _setup_debug_logger(self):
         """Setup file logger for detailed debugging"""
         import logging
 
         # Create results directory if not exists
-        results_dir = Path(__file__).parent / "results"
+        results_dir = self.debug_log_dir
         results_dir.mkdir(parents=True, exist_ok=True)
 
         # Create debug log file with timestamp
@@ -189,18 +250,11 @@ class SimpleHomepageScraper:
         """
         Get or create a semaphore for a domain (max 3 concurrent requests per domain)
         """
-        from urllib.parse import urlparse
-
-        domain = urlparse(url).netloc or url
-
-        with self._domain_lock:
-            if domain not in self._domain_semaphores:
-                self._domain_semaphores[domain] = threading.BoundedSemaphore(3)
-            return self._domain_semaphores[domain]
+        return self.rate_limiter.get_semaphore(url)
 
     def scrape_homepage(self, row_data: Dict) -> List[Dict]:
         """
-        Scrape homepage and extract emails + content
+        Scrape homepage and extract emails + content (one lead, same pipeline as process_batch)
 
         Args:
             row_data: Full row data from CSV (preserves all original columns)
@@ -209,260 +263,80 @@ class SimpleHomepageScraper:
             List of dicts - one per email found (or one with empty email if none found)
             All original columns are preserved, new columns are added
         """
-        name = row_data.get('name', '')
-        website = row_data.get('website', '')
-
-        # Base result preserves ALL original columns
-        base_result = row_data.copy()
-        base_result.update({
-            'email': '',
-            'homepage_content': '',
-            'site_type': 'unknown',
-            'scrape_status': 'failed',
-            'error_message': '',
-            'email_source': '',
-            'sitemap_links': '' if self.save_sitemap else None,
-            'social_media_links': '' if self.save_social_links else None,
-            'other_links': '' if self.save_other_links else None,
-            'deep_pages_content': '' if self.save_deep_content else None
-        })
-
-        if not website or pd.isna(website):
-            base_result['error_message'] = 'No website provided'
-            with self._lock:
-                self.stats['total_processed'] += 1
-                self.stats['failed'] += 1
-            return [base_result]
-
-        # Normalize URL
-        if not website.startswith('http'):
-            website = f'https://{website}'
-
-        # Get domain semaphore to limit concurrent requests per domain
-        domain_semaphore = self._get_domain_semaphore(website)
+        async def scrape_one():
+            async with self.engine:
+                return await self.engine.scrape_adaptive(row_data)
+
+        return asyncio.run(scrape_one())
+
+    def _fetch_homepage(self, website: str) -> Dict:
+        """HTTPClient fetch under the per-domain semaphore (runs in the engine's thread pool)"""
+        with self._get_domain_semaphore(website):
+            return self.http_client.fetch(website, check_content_length=False)
 
+    def _deep_search_stage(self, website: str):
+        """Deep search for the engine: (emails, pages_content), errors -> no emails"""
         try:
-            # Fetch homepage (with per-domain rate limiting)
-            with domain_semaphore:
-                response = self.http_client.fetch(website, check_content_length=False)
-
-            if response['status'] == 'success':
-                html_content = response['content']
-
-                # Extract full text content (conditional)
-                clean_text = ''
-                if self.save_content:
-                    clean_text = clean_html_to_text(html_content, max_length=50000)
-
-                # Detect site type
-                site_type = self._detect_site_type(html_content)
-
-                if site_type == 'static':
-                    with self._lock:
-                        self.stats['static_sites'] += 1
-                elif site_type == 'dynamic':
-                    with self._lock:
-                        self.stats['dynamic_sites'] += 1
-
-                # Extract sitemap links (conditional)
-                sitemap_links_str = ''
-                if self.save_sitemap:
-                    try:
-                        sitemap_result = self.sitemap_parser.get_smart_pages(website, max_pages=100)
-                        sitemap_links = sitemap_result.get('pages', [])
-                        if sitemap_links:
-                            sitemap_links_str = ' | '.join(sitemap_links[:50])  # Limit to 50 links
-                    except:
-                        pass
-
-                # Extract social media links (conditional)
-                social_links_str = ''
-                if self.save_social_links:
-                    social_links = self._extract_social_links(html_content)
-                    if social_links:
-                        social_links_str = ' | '.join(social_links)
-
-                # Extract other links (conditional)
-                other_links_str = ''
-                if self.save_other_links:
-                    all_links = self._extract_all_links(html_content)
-                    # Filter out social media links
-                    if self.save_social_links:
-                        social_domains = ['facebook.com', 'twitter.com', 'linkedin.com', 'instagram.com',
-                                        'youtube.com', 'tiktok.com', 'pinterest.com']
-                        other_links = [link for link in all_links if not any(domain in link.lower() for domain in social_domains)]
-                    else:
-                        other_links = all_links
-                    if other_links:
-                        other_links_str = ' | '.join(other_links[:50])  # Limit to 50 links
-
-                # Update base_result with extracted data
-                base_result['homepage_content'] = clean_text
-                base_result['site_type'] = site_type
-                if self.save_sitemap:
-                    base_result['sitemap_links'] = sitemap_links_str
-                if self.save_social_links:
-                    base_result['social_media_links'] = social_links_str
-                if self.save_other_links:
-                    base_result['other_links'] = other_links_str
-
-                # Extract emails if enabled
-                clean_emails = []
-                if self.extract_emails:
-                    emails = extract_emails_from_html(html_content)
-                    clean_emails = [self._clean_email(e) for e in emails if self._clean_email(e)]
-
-                # Create results based on email format
-                results = []
-
-                if self.extract_emails and clean_emails:
-                    # Found emails on homepage
-                    if self.email_format == 'all':
-                        row = base_result.copy()
-                        row['email'] = ', '.join(clean_emails)
-                        row['scrape_status'] = 'success'
-                        row['email_source'] = 'homepage'
-                        results.append(row)
-                    elif self.email_format == 'primary':
-                        row = base_result.copy()
-                        row['email'] = clean_emails[0]
-                        row['scrape_status'] = 'success'
-                        row['email_source'] = 'homepage'
-                        results.append(row)
-                    else:  # separate
-                        for email in clean_emails:
-                            row = base_result.copy()
-                            row['email'] = email
-                            row['scrape_status'] = 'success'
-                            row['email_source'] = 'homepage'
-                            results.append(row)
-
-                    with self._lock:
-                        self.stats['emails_found'] += len(clean_emails)
-                        self.stats['emails_from_homepage'] += len(clean_emails)
-                        self.stats['total_processed'] += 1
-                        self.stats['success'] += 1
-
-                    logger.info(f"✓ {name}: {len(clean_emails)} emails (homepage), {site_type}")
-                    return results
-
-                # No emails on homepage - try deep search if enabled
-                deep_emails = []
-                deep_pages_content = ''
-                if self.extract_emails and not clean_emails and self.scraping_mode == 'deep_search':
-                    logger.info(f"⚠ {name}: No emails on homepage, trying deep search...")
-                    # Deep search with 90 second global timeout to prevent hanging
-                    try:
-                        with ThreadPoolExecutor(max_workers=1) as executor:
-                            future = executor.submit(self._deep_email_search, website)
-                            deep_emails, deep_pages_content = future.result(timeout=90)
-                    except TimeoutError:
-                        logger.warning(f"⏱ {name}: Deep search timed out after 90 seconds")
-                        deep_emails, deep_pages_content = [], ''
-                    except Exception as e:
-                        logger.error(f"✗ {name}: Deep search error: {e}")
-                        deep_emails, deep_pages_content = [], ''
-
-                # Update base_result with deep content if available
-                if self.save_deep_content and deep_pages_content:
-                    base_result['deep_pages_content'] = deep_pages_content
-
-                if deep_emails:
-                    # Handle deep search results based on format
-                    if self.email_format == 'all':
-                        row = base_result.copy()
-                        row['email'] = ', '.join(deep_emails)
-                        row['scrape_status'] = 'success'
-                        row['email_source'] = 'deep_search'
-                        results.append(row)
-                    elif self.email_format == 'primary':
-                        row = base_result.copy()
-                        row['email'] = deep_emails[0]
-                        row['scrape_status'] = 'success'
-                        row['email_source'] = 'deep_search'
-                        results.append(row)
-                    else:  # separate
-                        for email in deep_emails:
-                            row = base_result.copy()
-                            row['email'] = email
-                            row['scrape_status'] = 'success'
-                            row['email_source'] = 'deep_search'
-                            results.append(row)
-
-                    with self._lock:
-                        self.stats['emails_found'] += len(deep_emails)
-                        self.stats['emails_from_deep'] += len(deep_emails)
-                        self.stats['total_processed'] += 1
-                        self.stats['success'] += 1
-
-                    logger.info(f"✓ {name}: {len(deep_emails)} emails (deep search), {site_type}")
-                    return results
-
-                # No emails found (or email extraction disabled)
-                if not self.extract_emails:
-                    # Success: content extracted, emails not requested
-                    row = base_result.copy()
-                    row['scrape_status'] = 'success'
-                    row['email_source'] = 'none'
-                    results.append(row)
-
-                    with self._lock:
-                        self.stats['total_processed'] += 1
-                        self.stats['success'] += 1
-
-                    logger.info(f"✓ {name}: Content extracted (no email extraction), {site_type}")
-                    return results
-                else:
-                    # Failed: emails requested but not found
-                    failure_type = 'dynamic' if site_type == 'dynamic' else 'static'
-                    row = base_result.copy()
-                    row['scrape_status'] = 'failed'
-                    row['error_message'] = f'no_email_found_{failure_type}'
-                    row['email_source'] = 'none'
-                    results.append(row)
-
-                    with self._lock:
-                        self.stats['total_processed'] += 1
-                        self.stats['no_emails'] += 1
-                        if failure_type == 'dynamic':
-                            self.stats['failed_dynamic'] += 1
-                        else:
-                            self.stats['failed_static'] += 1
+            return self._deep_email_search(website)
+        except Exception as e:
+            logger.error(f"✗ {website}: Deep search error: {e}")
+            return [], ''
+
+    def _get_deep_executor(self) -> ThreadPoolExecutor:
+        """Shared pool for deep search page fetches (created lazily, closed after the batch)"""
+        with self._deep_executor_lock:
+            if self._deep_executor is None:
+                self._deep_executor = ThreadPoolExecutor(
+                    max_workers=self.workers * self.rate_limiter.max_concurrent_per_domain,
+                    thread_name_prefix='deep_search'
+                )
+            return self._deep_executor
 
-                    logger.warning(f"✗ {name}: No emails found, {site_type}")
-                    return results
+    def _close_deep_executor(self):
+        with self._deep_executor_lock:
+            if self._deep_executor is not None:
+                self._deep_executor.shutdown(wait=False, cancel_futures=True)
+                self._deep_executor = None
 
-            else:
-                base_result['error_message'] = response.get('error', 'Unknown error')
-                base_result['email_source'] = 'none'
-                with self._lock:
-                    self.stats['total_processed'] += 1
-                    self.stats['failed'] += 1
-                    self.stats['failed_other'] += 1
+    def _fetch_deep_page(self, page_url: str, domain_semaphore, found: threading.Event) -> Dict:
+        """
+        Fetch + parse one candidate page (runs in the deep search pool)
 
-                logger.warning(f"✗ {name}: {base_result['error_message']}")
-                return [base_result]
+        Skipped without a request if another page of the same site already yielded emails.
+        """
+        result = {'url': page_url, 'status': 'skipped', 'emails': [], 'content': '', 'error': None}
 
-        except Exception as e:
-            base_result['error_message'] = str(e)
-            base_result['email_source'] = 'none'
-            with self._lock:
-                self.stats['total_processed'] += 1
-                self.stats['failed'] += 1
-                self.stats['failed_other'] += 1
+        with domain_semaphore:
+            if found.is_set():
+                return result
+            response = self.http_client.fetch(page_url, check_content_length=False)
+
+        result['status'] = response['status']
+        if response['status'] != 'success':
+            result['error'] = response.get('error', 'unknown')
+            return result
 
-            logger.error(f"✗ {name}: {e}")
-            return [base_result]
+        page = ParsedPage(response['content'], url=response['url'])
+        result['emails'] = clean_emails(extract_emails_from_html(page))
 
-    def _deep_email_search(self, website: str):
+        if self.save_deep_content:
+            result['content'] = clean_html_to_text(page, max_length=10000)
+
+        return result
+
+    def _deep_email_search(self, website: str, name: str = ''):
         """
         Deep email search using sitemap + contact pages
 
+        Candidate pages are fetched concurrently (bounded by the per-domain semaphore);
+        as soon as one page yields valid emails the remaining pages are cancelled.
+
         Returns:
             Tuple (List[str] emails, str pages_content)
             - emails: deduplicated list of found emails
-            - pages_content: raw content from all pages (if save_deep_content=True)
+            - pages_content: raw content from fetched pages (if save_deep_content=True)
         """
+        deadline = time.monotonic() + self.deep_search_timeout
         all_emails = []
         pages_content_list = []
 
@@ -476,8 +350,17 @@ class SimpleHomepageScraper:
             self.debug_logger.info(f"{'='*60}")
 
         try:
-            # Get smart pages (sitemap or pattern-based)
-            discovery = self.sitemap_parser.get_smart_pages(website, max_pages=self.max_pages)
+            # Get smart pages (sitemap or pattern-based) - discovery (robots.txt, sitemap indexes)
+            # runs in the deep search pool and counts against the same deadline as the page fetches
+            executor = self._get_deep_executor()
+            discovery_future = executor.submit(self.sitemap_parser.get_smart_pages, website, self.max_pages)
+            try:
+                discovery = discovery_future.result(timeout=max(deadline - time.monotonic(), 0))
+            except FuturesTimeoutError:
+                discovery_future.cancel()
+                logger.warning(f"⏱ {name or website}: Deep search timed out after {self.deep_search_timeout} seconds "
+                               f"(page discovery)")
+                discovery = {'strategy': 'timeout', 'sitemap_found': False, 'pages': []}
 
             # Debug log discovery results
             if self.debug_logger:
@@ -485,40 +368,44 @@ class SimpleHomepageScraper:
                 self.debug_logger.info(f"Sitemap found: {discovery['sitemap_found']}")
                 self.debug_logger.info(f"Pages to scrape ({len(discovery['pages'])}): {discovery['pages']}")
 
-            # Scrape discovered pages
-            for idx, page_url in enumerate(discovery['pages'], 1):
-                try:
-                    if self.debug_logger:
-                        self.debug_logger.info(f"\n[{idx}/{len(discovery['pages'])}] Scraping: {page_url}")
-
-                    # Rate limit per domain
-                    with domain_semaphore:
-                        response = self.http_client.fetch(page_url, check_content_length=False)
+            # Scrape discovered pages in parallel, first hit cancels the rest
+            found = threading.Event()
+            futures = [executor.submit(self._fetch_deep_page, page_url, domain_semaphore, found)
+                       for page_url in discovery['pages']]
 
-                    if response['status'] == 'success':
-                        html_content = response['content']
-
-                        # Extract emails
-                        emails = extract_emails_from_html(html_content)
-                        clean_emails = [self._clean_email(e) for e in emails if self._clean_email(e)]
-                        all_emails.extend(clean_emails)
-
-                        if self.debug_logger:
-                            self.debug_logger.info(f"  Status: SUCCESS | Emails found: {len(clean_emails)} | {clean_emails if clean_emails else 'none'}")
-
-                        # Save content if requested
-                        if self.save_deep_content:
-                            page_text = clean_html_to_text(html_content, max_length=10000)
-                            if page_text:
-                                pages_content_list.append(f"=== {page_url} ===\n{page_text}\n")
-                    else:
+            try:
+                for future in as_completed(futures, timeout=max(deadline - time.monotonic(), 0)):
+                    try:
+                        page_result = future.result()
+                    except Exception as e:
                         if self.debug_logger:
-                            self.debug_logger.info(f"  Status: FAILED | Reason: {response.get('error', 'unknown')}")
+                            self.debug_logger.info(f"  ERROR | {str(e)}")
+                        continue
 
-                except Exception as e:
-                    if self.debug_logger:
-                        self.debug_logger.info(f"  Status: ERROR | {str(e)}")
-                    continue
+                    if self.debug_logger and page_result['status'] != 'skipped':
+                        if page_result['status'] == 'success':
+                            self.debug_logger.info(f"  {page_result['url']} | SUCCESS | Emails found: "
+                                                   f"{len(page_result['emails'])} | {page_result['emails'] or 'none'}")
+                        else:
+                            self.debug_logger.info(f"  {page_result['url']} | FAILED | Reason: {page_result['error']}")
+
+                    if page_result['content']:
+                        pages_content_list.append(f"=== {page_result['url']} ===\n{page_result['content']}\n")
+
+                    # A page with a catalog-sized email list is not a hit - keep looking
+                    if page_result['emails'] and len(page_result['emails']) <= MAX_DEEP_EMAILS:
+                        all_emails.extend(page_result['emails'])
+                        found.set()
+                        break
+
+                    all_emails.extend(page_result['emails'])
+            except FuturesTimeoutError:
+                logger.warning(f"⏱ {name or website}: Deep search timed out after {self.deep_search_timeout} seconds")
+            finally:
+                # Not started yet - dropped; in flight - finish without being waited for
+                found.set()
+                for future in futures:
+                    future.cancel()
 
         except Exception as e:
             if self.debug_logger:
@@ -526,10 +413,10 @@ class SimpleHomepageScraper:
             pass
 
         # Deduplicate and limit to reasonable number
-        unique_emails = list(set(all_emails))
+        unique_emails = clean_emails(all_emails)
 
         # Filter out if too many emails (likely scraped wrong content)
-        if len(unique_emails) > 20:
+        if len(unique_emails) > MAX_DEEP_EMAILS:
             logger.warning(f"Too many emails found ({len(unique_emails)}), likely scraped wrong content - ignoring")
             if self.debug_logger:
                 self.debug_logger.warning(f"TOO MANY EMAILS ({len(unique_emails)}) - Filtering out as likely scraped wrong content")
@@ -560,76 +447,18 @@ class SimpleHomepageScraper:
 
     def _extract_social_links(self, html_content: str) -> List[str]:
         """Extract social media links from HTML"""
-        import re
-        social_patterns = [
-            r'https?://(?:www\.)?facebook\.com/[^\s"\'>]+',
-            r'https?://(?:www\.)?twitter\.com/[^\s"\'>]+',
-            r'https?://(?:www\.)?linkedin\.com/[^\s"\'>]+',
-            r'https?://(?:www\.)?instagram\.com/[^\s"\'>]+',
-            r'https?://(?:www\.)?youtube\.com/[^\s"\'>]+',
-            r'https?://(?:www\.)?tiktok\.com/[^\s"\'>]+',
-            r'https?://(?:www\.)?pinterest\.com/[^\s"\'>]+',
-        ]
-
-        social_links = []
-        for pattern in social_patterns:
-            matches = re.findall(pattern, html_content, re.IGNORECASE)
-            social_links.extend(matches)
-
-        return list(set(social_links))  # Deduplicate
-
-    def _extract_all_links(self, html_content: str) -> List[str]:
-        """Extract all links from HTML"""
-        import re
-        from bs4 import BeautifulSoup
+        return extract_social_links(html_content)
 
+    def _extract_all_links(self, html_content) -> List[str]:
+        """Extract all links from HTML (str or ParsedPage)"""
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            links = []
-            for a_tag in soup.find_all('a', href=True):
-                href = a_tag['href']
-                if href and not href.startswith(('#', 'javascript:', 'mailto:')):
-                    links.append(href)
-            return list(set(links))  # Deduplicate
+            return ParsedPage.of(html_content).links()
         except:
             return []
 
     def _clean_email(self, email: str) -> Optional[str]:
         """Clean and validate email"""
-        if not email:
-            return None
-
-        email = email.strip().lower()
-
-        # Fix truncated emails (.co -> .com)
-        if email.endswith('.co') and not email.endswith('.co.uk'):
-            email = email + 'm'
-
-        # Remove common junk and useless emails
-        fake_patterns = [
-            'example.com', 'domain.com', 'yoursite.com', 'test.com',
-            'filler@godaddy', 'noreply@', 'no-reply@', 'donotreply@',
-            'webmaster@', 'postmaster@', 'mailer-daemon@',
-            'privacy@', 'abuse@', 'hostmaster@'
-        ]
-
-        if any(pattern in email for pattern in fake_patterns):
-            return None
-
-        # Remove NPS generic emails
-        nps_generic = ['abli_education@nps.gov', 'abli_interpretation@nps.gov', 'abli_administration@nps.gov']
-        if email in nps_generic:
-            return None
-
-        # Basic validation
-        if '@' not in email or '.' not in email.split('@')[-1]:
-            return None
-
-        # Length check
-        if len(email) < 5 or len(email) > 100:
-            return None
-
-        return email
+        return clean_email(email)
 
     def get_analytics(self) -> Dict:
         """
@@ -638,77 +467,58 @@ class SimpleHomepageScraper:
         Returns:
             Dict with detailed metrics
         """
-        elapsed = time.time() - self.start_time
-
-        return {
-            "summary": {
-                "total_sites": self.stats['total_processed'],
-                "success_rate": f"{(self.stats['success'] / self.stats['total_processed'] * 100):.2f}%" if self.stats['total_processed'] > 0 else "0%",
-                "duration_seconds": round(elapsed, 2),
-                "duration_minutes": round(elapsed / 60, 2),
-                "sites_per_second": round(self.stats['total_processed'] / elapsed, 2) if elapsed > 0 else 0
-            },
-            "results": {
-                "success": {
-                    "count": self.stats['success'],
-                    "percentage": f"{(self.stats['success'] / self.stats['total_processed'] * 100):.2f}%" if self.stats['total_processed'] > 0 else "0%",
-                    "total_emails": self.stats['emails_found'],
-                    "from_homepage": self.stats['emails_from_homepage'],
-                    "from_deep_search": self.stats['emails_from_deep']
-                },
-                "failed": {
-                    "total": self.stats['failed'],
-                    "static_no_email": {
-                        "count": self.stats['failed_static'],
-                        "percentage": f"{(self.stats['failed_static'] / self.stats['total_processed'] * 100):.2f}%" if self.stats['total_processed'] > 0 else "0%"
-                    },
-                    "dynamic_no_email": {
-                        "count": self.stats['failed_dynamic'],
-                        "percentage": f"{(self.stats['failed_dynamic'] / self.stats['total_processed'] * 100):.2f}%" if self.stats['total_processed'] > 0 else "0%"
-                    },
-                    "other_errors": {
-                        "count": self.stats['failed_other'],
-                        "percentage": f"{(self.stats['failed_other'] / self.stats['total_processed'] * 100):.2f}%" if self.stats['total_processed'] > 0 else "0%"
-                    }
-                }
-            },
-            "site_types": {
-                "static": self.stats['static_sites'],
-                "dynamic": self.stats['dynamic_sites']
-            }
-        }
-
-    def _detect_site_type(self, html_content: str) -> str:
+        analytics = self.stats.get_analytics()
+        analytics["rate_limiting"] = self.rate_limiter.get_stats()
+        if self.cache is not None:
+            analytics["response_cache"] = self.cache.get_stats()
+        if self.dead_domains is not None:
+            analytics["dead_domains"] = self.dead_domains.get_stats()
+        if self.dns_resolver is not None:
+            analytics["dns_preresolve"] = self.dns_resolver.get_stats()
+        if self.concurrency is not None:
+            analytics["adaptive_concurrency"] = self.concurrency.get_stats()
+        if self.domain_dedup is not None:
+            analytics["domain_dedup"] = self.domain_dedup.get_stats()
+        return analytics
+
+    def _detect_site_type(self, html_content) -> str:
         """
         Detect if site is static or dynamic (React/Vue/Angular/etc)
 
+        Args:
+            html_content: HTML string or ParsedPage (reuses its cached lowercase HTML)
+
         Returns:
             'static' | 'dynamic' | 'unknown'
         """
-        html_lower = html_content.lower()
-
-        # Check for SPA frameworks
-        dynamic_indicators = [
-            'react', 'vue', 'angular', 'next.js', 'nuxt',
-            'app.js', 'bundle.js', 'main.js',
-            '<div id="root"', '<div id="app"',
-            'ng-app', 'v-app', 'data-react',
-        ]
+        return classify_site_type(html_content)
 
-        for indicator in dynamic_indicators:
-            if indicator in html_lower:
-                return 'dynamic'
+    def run_engine(self, rows: Iterable[Dict], on_result: Optional[Callable[[List[Dict]], None]] = None,
+                   keep_results: bool = True) -> List[Dict]:
+        """
+        Scrape rows through ScrapeEngine (bounded worker pool, DNS pre-resolution in batches,
+        adaptive slots) and release pooled connections / deep search threads afterwards
 
-        # Static site indicators
-        static_indicators = [
-            '<html', '<body', '<p>', '<div>',
-        ]
+        Args:
+            rows: Lead dicts (need 'website')
+            on_result: Callback(result_rows) after each lead (progress / incremental save)
+            keep_results: False - rows only go to on_result, nothing is kept in memory
 
-        # If has basic HTML structure but no SPA frameworks
-        if any(indicator in html_lower for indicator in static_indicators):
-            return 'static'
+        Returns:
+            All result rows ([] with keep_results=False)
+        """
+        async def run():
+            async with self.engine:
+                if keep_results:
+                    return await self.engine.run(rows, on_result=on_result)
+                await self.engine.stream(rows, on_result=on_result)
+                return []
 
-        return 'unknown'
+        try:
+            return asyncio.run(run())
+        finally:
+            self.http_client.close()
+            self._close_deep_executor()
 
     def process_batch(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -728,33 +538,33 @@ class SimpleHomepageScraper:
         logger.info("="*70)
 
         start_time = time.time()
-        all_rows = []
-
-        with ThreadPoolExecutor(max_workers=self.workers) as executor:
-            # Submit all tasks
-            futures = {
-                executor.submit(
-                    self.scrape_homepage,
-                    row.to_dict()
-                ): idx for idx, row in df.iterrows()
-            }
-
-            # Collect results
-            processed_count = 0
-            for future in as_completed(futures):
-                try:
-                    # Each result is a list of dicts (one per email)
-                    result_rows = future.result()
-                    all_rows.extend(result_rows)
-
-                    processed_count += 1
-
-                    # Progress update every 50 leads
-                    if processed_count % 50 == 0:
-                        logger.info(f"Progress: {processed_count}/{len(df)} leads processed...")
-
-                except Exception as e:
-                    logger.error(f"Task failed: {e}")
+
+        # One scrape per domain - chains / franchise rows get the same result fanned out below
+        df_unique = df
+        if self.dedupe_domains:
+            self.domain_dedup = DomainDedup(df)
+            df_unique = self.domain_dedup.unique_df
+            if self.domain_dedup.duplicate_rows:
+                logger.info(f"Domain dedup: {len(df_unique)} unique sites for {len(df)} leads "
+                            f"({self.domain_dedup.duplicate_rows} rows share a domain)")
+
+        # High-value leads first - the engine queue is FIFO, a partial / time-boxed run keeps the most useful results
+        if self.priority is not None:
+            df_unique = self.priority.sort(df_unique)
+
+        processed_count = 0
+
+        def on_result(result_rows: List[Dict]):
+            nonlocal processed_count
+            processed_count += 1
+            # Progress update every 50 leads
+            if processed_count % 50 == 0:
+                logger.info(f"Progress: {processed_count}/{len(df_unique)} leads processed...")
+
+        all_rows = self.run_engine((row.to_dict() for _, row in df_unique.iterrows()), on_result=on_result)
+
+        if self.domain_dedup is not None:
+            all_rows = self.domain_dedup.fan_out(all_rows)
 
         # Create results DataFrame
         df_results = pd.DataFrame(all_rows)
@@ -781,20 +591,6 @@ class SimpleHomepageScraper:
         return df_results
 
 
-def validate_url(url: str) -> bool:
-    """Check if string looks like a valid URL"""
-    if not url or pd.isna(url):
-        return False
-    url_str = str(url).strip().lower()
-    if not url_str:
-        return False
-    # Check for valid URL patterns
-    has_domain = ('.' in url_str and len(url_str) > 4)
-    has_protocol = url_str.startswith(('http://', 'https://'))
-    looks_like_url = any(x in url_str for x in ['www.', '.com', '.org', '.net', '.io', '.co'])
-    return has_domain and (has_protocol or looks_like_url)
-
-
 def main():
     parser = argparse.ArgumentParser(description='Simple Homepage Scraper - Emails + Content')
     parser.add_argument('--input', required=True, help='Input CSV file path')
@@ -814,6 +610,22 @@ def main():
     parser.add_argument('--save-social', action='store_true', help='Save social media links')
     parser.add_argument('--save-links', action='store_true', help='Save other links from homepage')
     parser.add_argument('--save-deep-content', action='store_true', help='Save raw content from all deep search pages')
+    parser.add_argument('--cache', nargs='?', const=str(DEFAULT_CACHE_PATH),
+                        help='Use persistent HTTP response cache (optional SQLite path, default: data/cache/http_responses.sqlite)')
+    parser.add_argument('--cache-ttl-hours', type=float, default=168, help='Response cache TTL in hours (default: 168 = 7 days)')
+    parser.add_argument('--skip-dead-domains', nargs='?', const=str(DEFAULT_DEAD_DOMAINS_PATH),
+                        help='Skip domains that failed with DNS/connection/timeout errors in previous runs (optional SQLite path)')
+    parser.add_argument('--dead-domain-cooldown-hours', type=float, default=24,
+                        help='Cooldown after first failure, doubles on each repeated failure (default: 24)')
+    parser.add_argument('--no-dns-preresolve', action='store_true',
+                        help='Do not bulk-resolve domains before scraping (NXDOMAIN rows are otherwise failed immediately)')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Adapt in-flight leads at runtime (AIMD on latency, errors, RSS); --workers = upper bound')
+    parser.add_argument('--no-domain-dedup', action='store_true',
+                        help='Scrape every row even if several rows share a website domain')
+    parser.add_argument('--priority', action='store_true',
+                        help='Scrape high-value leads first (priority column, or rating / reviews / platform score)')
+    parser.add_argument('--priority-history', help='Previous results CSV - adds email success rate per TLD to --priority score')
 
     args = parser.parse_args()
 
@@ -872,7 +684,15 @@ def main():
         save_sitemap=args.save_sitemap,
         save_social_links=args.save_social,
         save_other_links=args.save_links,
-        save_deep_content=args.save_deep_content
+        save_deep_content=args.save_deep_content,
+        cache=ResponseCache(args.cache, ttl_seconds=args.cache_ttl_hours * 3600) if args.cache else None,
+        dead_domains=DeadDomainCache(args.skip_dead_domains, cooldown_hours=args.dead_domain_cooldown_hours)
+        if args.skip_dead_domains else None,
+        dns_resolver=None if args.no_dns_preresolve else DNSPreResolver(concurrency=200),
+        concurrency=AdaptiveConcurrency(min_limit=4, max_limit=args.workers) if args.adaptive else None,
+        dedupe_domains=not args.no_domain_dedup,
+        priority=(LeadPriority.from_results(args.priority_history) if args.priority_history else LeadPriority())
+        if args.priority or args.priority_history else None
     )
 
     # Process batch
@@ -951,21 +771,6 @@ def main():
     failed_df = df_results[df_results['scrape_status'] == 'failed'].copy()
 
     # Add failure_reason column for clarity
-    def categorize_failure(row):
-        error_msg = str(row.get('error_message', ''))
-        if 'no_email_found_static' in error_msg:
-            return 'no_email_found_static'
-        elif 'no_email_found_dynamic' in error_msg:
-            return 'no_email_found_dynamic'
-        elif 'timeout' in error_msg.lower():
-            return 'connection_timeout'
-        elif '404' in error_msg or 'not found' in error_msg.lower():
-            return 'page_not_found'
-        elif error_msg:
-            return error_msg
-        else:
-            return 'unknown_error'
-
     failed_df['failure_reason'] = failed_df.apply(categorize_failure, axis=1)
 
     # Save FAILED in multiple formats
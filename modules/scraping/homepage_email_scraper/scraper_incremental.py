@@ -11,7 +11,10 @@ FEATURES:
 
 IMPROVEMENTS over v1:
 - save_incremental() called every 100 emails
-- checkpoint.json saves processed URLs
+- checkpoint.sqlite - append-only journal of processed URLs (O(batch) per save,
+  resume = index lookup); checkpoint.json - small progress summary
+- --output-format parquet: one Parquet part per flush straight into
+  data/projects/{project}/scraping_results/ (ParquetManager), lazy dataset handle
 - --resume flag to continue from checkpoint
 - Progress saved continuously
 
@@ -21,6 +24,7 @@ New run:
 
 Resume run:
   python scraper_incremental.py --resume results/checkpoint.json
+  python scraper_incremental.py --input leads.csv --output-format parquet --project hvac_usa
 """
 
 import sys
@@ -33,49 +37,99 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 from modules.scraping.homepage_email_scraper.scraper import (
     SimpleHomepageScraper, validate_url, logger
 )
+from modules.scraping.lib.response_cache import ResponseCache, DEFAULT_CACHE_PATH
+from modules.scraping.lib.dead_domains import DeadDomainCache, DEFAULT_DEAD_DOMAINS_PATH
+from modules.scraping.lib.dns_resolver import DNSPreResolver
+from modules.scraping.lib.checkpoint_journal import CheckpointJournal
+from modules.scraping.lib.adaptive_concurrency import AdaptiveConcurrency
+from modules.shared.parquet_manager import ParquetManager
 
 import pandas as pd
 import json
 import time
 import argparse
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, List, Optional
 
 class IncrementalScraper(SimpleHomepageScraper):
     """Enhanced scraper with incremental saving"""
 
-    def __init__(self, *args, output_dir: Optional[Path] = None, checkpoint_interval: int = 100, **kwargs):
+    def __init__(self, *args, output_dir: Optional[Path] = None, checkpoint_interval: int = 100,
+                 output_format: str = 'csv', project: Optional[str] = None, dataset: str = 'scraping_results',
+                 **kwargs):
+        if output_format not in ('csv', 'parquet'):
+            raise ValueError(f"Unknown output_format: {output_format}")
+        if output_format == 'parquet' and not project:
+            raise ValueError("output_format='parquet' requires project")
+
         super().__init__(*args, **kwargs)
         self.output_dir = output_dir or Path(f"results/scraped_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
         self.checkpoint_interval = checkpoint_interval
         self.checkpoint_file = self.output_dir / "checkpoint.json"
+        self.journal_file = self.output_dir / "checkpoint.sqlite"
         self.incremental_csv = self.output_dir / "incremental_results.csv"
-        self.processed_urls = set()
         # REMOVED: self.all_results = [] - MEMORY LEAK FIX
+        # REMOVED: self.processed_urls = set() - processed URLs live in the journal
         self.emails_found_count = 0
+        self.processed_count = 0
+        self.resumed = False
 
         # Create output dir
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
+        # Append-only journal: (url, rows, emails) of leads not yet committed
+        self.journal = CheckpointJournal(self.journal_file)
+        self._pending_entries = []
+
+        # Parquet mode: parts in data/projects/{project}/{dataset}/ instead of CSV append
+        self.output_format = output_format
+        self.dataset = dataset
+        self.parquet = ParquetManager(project) if output_format == 'parquet' else None
+
     def load_checkpoint(self) -> Dict:
-        """Load checkpoint if exists"""
+        """Load checkpoint if exists (journal + summary, legacy processed_urls JSON is imported)"""
+        checkpoint = {}
         if self.checkpoint_file.exists():
             logger.info(f"Loading checkpoint from {self.checkpoint_file}")
             with open(self.checkpoint_file, 'r') as f:
                 checkpoint = json.load(f)
-            self.processed_urls = set(checkpoint.get('processed_urls', []))
-            self.emails_found_count = checkpoint.get('emails_found', 0)
-            logger.info(f"Checkpoint loaded: {len(self.processed_urls)} URLs already processed, {self.emails_found_count} emails found")
-            return checkpoint
-        return {}
+
+        journal_stats = self.journal.get_stats()
+
+        # Old format: full processed_urls list in checkpoint.json - move it into the journal once
+        legacy_urls = checkpoint.get('processed_urls')
+        if legacy_urls and journal_stats['processed'] == 0:
+            logger.info(f"Importing {len(legacy_urls)} processed URLs from legacy checkpoint.json")
+            self.journal.record_batch((url, 0, 0) for url in legacy_urls)
+            self.journal.set_meta('legacy_emails', str(checkpoint.get('emails_found', 0)))
+            journal_stats = self.journal.get_stats()
+
+        # Parts written after the last journal commit belong to leads that will be scraped again
+        # (the starting part number is in the journal before the first part is written)
+        if self.parquet:
+            removed = self.parquet.remove_parts_from(self.dataset, self._next_parquet_part())
+            if removed:
+                logger.warning(f"Removed {removed} uncommitted Parquet part(s) from {self.parquet.dataset_dir(self.dataset)}")
+
+        # Rows appended after the last journal commit belong to leads that will be scraped again
+        csv_bytes = self.journal.csv_bytes
+        if csv_bytes is not None and self.incremental_csv.exists() and self.incremental_csv.stat().st_size > csv_bytes:
+            logger.warning(f"Truncating {self.incremental_csv.name} to last checkpoint ({csv_bytes} bytes)")
+            with open(self.incremental_csv, 'r+b') as f:
+                f.truncate(csv_bytes)
+
+        self.processed_count = journal_stats['processed']
+        self.emails_found_count = journal_stats['emails'] + int(self.journal.get_meta('legacy_emails') or 0)
+        self.resumed = True
+        logger.info(f"Checkpoint loaded: {self.processed_count} URLs already processed, {self.emails_found_count} emails found")
+        return checkpoint
 
     def save_checkpoint(self):
-        """Save current progress to checkpoint"""
+        """Save progress summary (processed URLs are in the journal, not in this file)"""
         checkpoint = {
             'timestamp': datetime.now().isoformat(),
-            'processed_urls': list(self.processed_urls),
-            'total_processed': len(self.processed_urls),
+            'journal': self.journal_file.name,
+            'total_processed': self.processed_count,
             'emails_found': self.emails_found_count,
             'stats': self.stats
         }
@@ -83,38 +137,82 @@ class IncrementalScraper(SimpleHomepageScraper):
         with open(self.checkpoint_file, 'w') as f:
             json.dump(checkpoint, f, indent=2)
 
+    def _track_processed(self, result_rows: List[Dict]):
+        """Remember a finished lead until the next journal commit"""
+        website = result_rows[0].get('website', '')
+        emails_in_rows = sum(1 for r in result_rows if r.get('email'))
+        self._pending_entries.append((website, len(result_rows), emails_in_rows))
+        self.emails_found_count += emails_in_rows
+
     def save_incremental(self, new_rows: List[Dict]):
-        """Save new results incrementally"""
-        if not new_rows:
+        """Save new results incrementally (CSV append / Parquet part, then one journal transaction)"""
+        if not new_rows and not self._pending_entries:
+            return
+
+        if self.parquet:
+            self._save_parquet_part(new_rows)
             return
 
-        df_new = pd.DataFrame(new_rows)
+        csv_offset = self.incremental_csv.stat().st_size if self.incremental_csv.exists() else 0
 
-        # Append to CSV
-        if self.incremental_csv.exists():
-            df_new.to_csv(self.incremental_csv, mode='a', header=False, index=False, encoding='utf-8-sig')
-        else:
-            df_new.to_csv(self.incremental_csv, mode='w', header=True, index=False, encoding='utf-8-sig')
+        if new_rows:
+            df_new = pd.DataFrame(new_rows)
 
-        # Save checkpoint
+            # Append to CSV
+            if self.incremental_csv.exists():
+                df_new.to_csv(self.incremental_csv, mode='a', header=False, index=False, encoding='utf-8-sig')
+            else:
+                df_new.to_csv(self.incremental_csv, mode='w', header=True, index=False, encoding='utf-8-sig')
+
+        # Commit processed URLs - O(batch)
+        self.journal.record_batch(self._pending_entries, csv_offset=csv_offset,
+                                  csv_bytes=self.incremental_csv.stat().st_size if self.incremental_csv.exists() else 0)
+        self.processed_count += len(self._pending_entries)
+        self._pending_entries = []
+
+        # Save checkpoint summary
         self.save_checkpoint()
 
         logger.info(f"✓ Incremental save: {len(new_rows)} rows saved | Total emails: {self.emails_found_count}")
 
-    def process_batch_incremental(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Process batch with incremental saving"""
+    def _next_parquet_part(self) -> int:
+        """Next part number of this run (first call stores the starting number in the journal)"""
+        next_part = self.journal.get_meta('parquet_next_part')
+        if next_part is None:
+            next_part = self.parquet.next_part_number(self.dataset)
+            self.journal.set_meta('parquet_next_part', str(next_part))
+        return int(next_part)
+
+    def _save_parquet_part(self, new_rows: List[Dict]):
+        """One flush = one Parquet part; part number is committed together with the URLs"""
+        part_number = self._next_parquet_part()
+
+        part_path = self.parquet.append_part(pd.DataFrame(new_rows), self.dataset, part_number=part_number) if new_rows else None
+        if part_path is not None:
+            part_number += 1
+
+        self.journal.record_batch(self._pending_entries, meta={'parquet_next_part': str(part_number)})
+        self.processed_count += len(self._pending_entries)
+        self._pending_entries = []
+
+        self.save_checkpoint()
+
+        logger.info(f"✓ Incremental save: {len(new_rows)} rows -> {part_path.name if part_path else 'no part'} | Total emails: {self.emails_found_count}")
+
+    def process_batch_incremental(self, df: pd.DataFrame):
+        """Process batch with incremental saving (returns DataFrame, or lazy pyarrow Dataset in parquet mode)"""
         logger.info("="*70)
         logger.info("INCREMENTAL HOMEPAGE SCRAPER STARTED")
         logger.info("="*70)
         logger.info(f"Total leads: {len(df)}")
-        logger.info(f"Already processed: {len(self.processed_urls)}")
-        logger.info(f"Remaining: {len(df) - len(self.processed_urls)}")
+        logger.info(f"Already processed: {self.processed_count}")
+        logger.info(f"Remaining: {max(len(df) - self.processed_count, 0)}")
         logger.info(f"Workers: {self.workers}")
         logger.info(f"Checkpoint interval: {self.checkpoint_interval} emails")
         logger.info("="*70)
 
-        # Filter out already processed
-        df_remaining = df[~df['website'].isin(self.processed_urls)].copy()
+        # Filter out already processed (journal index lookups)
+        df_remaining = df[self.journal.unprocessed(df['website'])].copy() if self.resumed else df.copy()
 
         if len(df_remaining) == 0:
             logger.info("All URLs already processed!")
@@ -123,55 +221,40 @@ class IncrementalScraper(SimpleHomepageScraper):
         logger.info(f"Processing {len(df_remaining)} remaining URLs...")
 
         start_time = time.time()
-        pending_rows = []  # Buffer for incremental save
         last_email_count = self.emails_found_count
 
-        with ThreadPoolExecutor(max_workers=self.workers) as executor:
-            # Submit all tasks
-            futures = {
-                executor.submit(
-                    self.scrape_homepage,
-                    row.to_dict()
-                ): idx for idx, row in df_remaining.iterrows()
-            }
-
-            # Collect results
-            processed_count = 0
-            for future in as_completed(futures):
-                try:
-                    result_rows = future.result()
-
-                    if result_rows:
-                        # Track processed URL
-                        website = result_rows[0].get('website', '')
-                        self.processed_urls.add(website)
-
-                        # Add to buffer (save to CSV in batches, NOT to memory)
-                        # REMOVED: self.all_results.extend(result_rows) - MEMORY LEAK FIX
-                        pending_rows.extend(result_rows)
-
-                        # Count emails
-                        emails_in_rows = sum(1 for r in result_rows if r.get('email'))
-                        self.emails_found_count += emails_in_rows
-
-                    processed_count += 1
-
-                    # Incremental save every N emails
-                    if self.emails_found_count - last_email_count >= self.checkpoint_interval:
-                        logger.info(f"✓ Checkpoint reached: {self.emails_found_count} emails found")
-                        self.save_incremental(pending_rows)
-                        pending_rows = []
-                        last_email_count = self.emails_found_count
-
-                    # Progress update every 50 leads
-                    if processed_count % 50 == 0:
-                        logger.info(f"Progress: {processed_count}/{len(df_remaining)} leads | {self.emails_found_count} emails found")
-
-                except Exception as e:
-                    logger.error(f"Task failed: {e}")
+        pending_rows = []  # Buffer for incremental save
+        processed_count = 0
+
+        def on_result(result_rows: List[Dict]):
+            nonlocal pending_rows, processed_count, last_email_count
+            if result_rows:
+                # Track processed URL + count emails (journal commit with the next save)
+                # NXDOMAIN rows from DNS pre-resolution land here too - recorded like any processed URL
+                self._track_processed(result_rows)
+
+                # Add to buffer (save to CSV in batches, NOT to memory)
+                # REMOVED: self.all_results.extend(result_rows) - MEMORY LEAK FIX
+                pending_rows.extend(result_rows)
+
+            processed_count += 1
+
+            # Incremental save every N emails
+            if self.emails_found_count - last_email_count >= self.checkpoint_interval:
+                logger.info(f"✓ Checkpoint reached: {self.emails_found_count} emails found")
+                self.save_incremental(pending_rows)
+                pending_rows = []
+                last_email_count = self.emails_found_count
+
+            # Progress update every 50 leads
+            if processed_count % 50 == 0:
+                logger.info(f"Progress: {processed_count}/{len(df_remaining)} leads | {self.emails_found_count} emails found")
+
+        self.run_engine((row.to_dict() for _, row in df_remaining.iterrows()), on_result=on_result,
+                        keep_results=False)
 
         # Save any remaining rows
-        if pending_rows:
+        if pending_rows or self._pending_entries:
             logger.info(f"Saving final {len(pending_rows)} rows...")
             self.save_incremental(pending_rows)
 
@@ -185,9 +268,13 @@ class IncrementalScraper(SimpleHomepageScraper):
         logger.info(f"Success: {self.stats['success']}")
         logger.info(f"Failed: {self.stats['failed']}")
         logger.info(f"Duration: {duration:.2f}s ({duration/60:.1f} min)")
-        logger.info(f"Output: {self.incremental_csv}")
+        logger.info(f"Output: {self.parquet.dataset_dir(self.dataset) if self.parquet else self.incremental_csv}")
         logger.info("="*70)
 
+        # Parquet mode: lazy pyarrow Dataset over all parts (nothing re-read here)
+        if self.parquet:
+            return self.parquet.open_dataset(self.dataset) if self.parquet.list_parts(self.dataset) else pd.DataFrame()
+
         # Return full results from CSV (no longer stored in memory)
         return pd.read_csv(self.incremental_csv) if self.incremental_csv.exists() else pd.DataFrame()
 
@@ -195,7 +282,7 @@ class IncrementalScraper(SimpleHomepageScraper):
 def main():
     parser = argparse.ArgumentParser(description='Incremental Homepage Scraper with Checkpoint/Resume')
     parser.add_argument('--input', help='Input CSV file path')
-    parser.add_argument('--resume', help='Resume from checkpoint file (checkpoint.json)')
+    parser.add_argument('--resume', help='Resume from checkpoint file (checkpoint.json or checkpoint.sqlite)')
     parser.add_argument('--output-dir', help='Output directory')
     parser.add_argument('--workers', type=int, default=50, help='Number of parallel workers (default: 50)')
     parser.add_argument('--max-pages', type=int, default=10, help='Max pages to search per site (default: 10)')
@@ -204,9 +291,28 @@ def main():
     parser.add_argument('--email-format', choices=['all', 'primary', 'separate'], default='separate')
     parser.add_argument('--website-column', default='website')
     parser.add_argument('--name-column', default='name')
+    parser.add_argument('--cache', nargs='?', const=str(DEFAULT_CACHE_PATH),
+                        help='Use persistent HTTP response cache (optional SQLite path)')
+    parser.add_argument('--cache-ttl-hours', type=float, default=168, help='Response cache TTL in hours (default: 168)')
+    parser.add_argument('--skip-dead-domains', nargs='?', const=str(DEFAULT_DEAD_DOMAINS_PATH),
+                        help='Skip domains that failed with DNS/connection/timeout errors in previous runs')
+    parser.add_argument('--dead-domain-cooldown-hours', type=float, default=24,
+                        help='Cooldown after first failure, doubles on each repeated failure (default: 24)')
+    parser.add_argument('--no-dns-preresolve', action='store_true',
+                        help='Do not bulk-resolve domains before scraping (NXDOMAIN rows are otherwise failed immediately)')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Adapt in-flight leads at runtime (AIMD on latency, errors, RSS); --workers = upper bound')
+    parser.add_argument('--output-format', choices=['csv', 'parquet'], default='csv',
+                        help='csv = append to incremental_results.csv, parquet = one part per flush in data/projects/{project}/')
+    parser.add_argument('--project', help='ParquetManager project for --output-format parquet')
+    parser.add_argument('--dataset', default='scraping_results', help='Dataset name inside the project (default: scraping_results)')
 
     args = parser.parse_args()
 
+    if args.output_format == 'parquet' and not args.project:
+        logger.error("--output-format parquet requires --project")
+        sys.exit(1)
+
     # Resume mode
     if args.resume:
         checkpoint_path = Path(args.resume)
@@ -214,9 +320,6 @@ def main():
             logger.error(f"Checkpoint file not found: {checkpoint_path}")
             sys.exit(1)
 
-        with open(checkpoint_path, 'r') as f:
-            checkpoint = json.load(f)
-
         # Get original input from checkpoint parent dir
         output_dir = checkpoint_path.parent
         logger.info(f"Resuming from checkpoint: {checkpoint_path}")
@@ -257,7 +360,15 @@ def main():
         email_format=args.email_format,
         save_content=True,
         output_dir=output_dir,
-        checkpoint_interval=args.checkpoint_interval
+        checkpoint_interval=args.checkpoint_interval,
+        cache=ResponseCache(args.cache, ttl_seconds=args.cache_ttl_hours * 3600) if args.cache else None,
+        dead_domains=DeadDomainCache(args.skip_dead_domains, cooldown_hours=args.dead_domain_cooldown_hours)
+        if args.skip_dead_domains else None,
+        dns_resolver=None if args.no_dns_preresolve else DNSPreResolver(concurrency=200),
+        concurrency=AdaptiveConcurrency(min_limit=4, max_limit=args.workers) if args.adaptive else None,
+        output_format=args.output_format,
+        project=args.project,
+        dataset=args.dataset
     )
 
     # Load checkpoint if resuming
@@ -267,8 +378,10 @@ def main():
     # Process
     df_results = scraper.process_batch_incremental(df)
 
-    logger.info(f"\n✓ DONE! Results saved to: {scraper.incremental_csv}")
+    output = scraper.parquet.dataset_dir(scraper.dataset) if scraper.parquet else scraper.incremental_csv
+    logger.info(f"\n✓ DONE! Results saved to: {output}")
     logger.info(f"Total emails found: {scraper.emails_found_count}")
+    scraper.journal.close()
 
 
 if __name__ == "__main__":
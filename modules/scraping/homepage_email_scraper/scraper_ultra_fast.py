@@ -7,11 +7,16 @@ OPTIMIZATIONS (10x FASTER):
 1. Asyncio + aiohttp (500+ concurrent vs 50 threads)
 2. Selectolax parser (5x faster than BeautifulSoup)
 3. Parallel deep search (all pages at once)
-4. HTTP/2 support with connection pooling
+4. Optional HTTP/2 (--http2, httpx[http2]): homepage + deep search pages of a host
+   multiplexed over one connection, HTTP/1.1 fallback, h2 share in analytics
 5. DNS caching + keep-alive
 6. Aggressive timeouts (3-5-10 sec progressive)
 7. Smart batching
 
+ENGINE:
+Fetch / parse / extract / deep search run on lib/scrape_engine.py (shared with
+scraper/scraper_robust.py), email cleaning + analytics shared with scraper.py
+
 BENCHMARKS:
 - Fast mode: 0.2-0.5 sec/site (vs 2-5 sec) = 10x
 - Deep search: 1-2 sec/site (vs 10-20 sec) = 10x
@@ -19,6 +24,15 @@ BENCHMARKS:
 USAGE:
 python scraper_ultra_fast.py --input input.csv --workers 500 --mode fast
 
+Streaming mode (200k+ leads - constant memory, results flushed to disk in chunks):
+python scraper_ultra_fast.py --input leads.parquet --workers 500 --stream --chunk-size 500
+
+HTTP/2 (pip install 'httpx[http2]'):
+python scraper_ultra_fast.py --input input.csv --workers 500 --http2
+
+Adaptive concurrency (AIMD, --workers = upper bound):
+python scraper_ultra_fast.py --input input.csv --workers 1000 --adaptive
+
 COMPATIBILITY:
 Drop-in replacement for scraper.py with same CLI arguments
 """
@@ -27,15 +41,11 @@ import sys
 import time
 import argparse
 import asyncio
-import aiohttp
-from aiohttp import TCPConnector, ClientTimeout
 import pandas as pd
 import json
-import re
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
-import threading
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Union
 
 # Add project root
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
@@ -48,42 +58,60 @@ except ImportError:
     logging.basicConfig(level=logging.INFO)
     logger = logging.getLogger(__name__)
 
-# Try to import selectolax (5x faster parser)
+# Shared async engine (fetch / parse / extract / deep search stages)
+sys.path.insert(0, str(Path(__file__).parent.parent))
 try:
-    from selectolax.parser import HTMLParser
-    SELECTOLAX_AVAILABLE = True
+    from lib.scrape_engine import (
+        ScrapeEngine, AsyncFetchStage, ExtractStage, DeepSearchStage, ScrapeStats,
+        clean_email, clean_emails, classify_site_type, validate_url, categorize_failure
+    )
+    from lib.text_utils import extract_emails_from_html
+    from lib.parsed_page import PARSER_BACKEND
+    from lib.sitemap_utils import SitemapParser
+    from lib.stream_io import aiter_rows, ChunkedCSVWriter
+    from lib.response_cache import ResponseCache, DEFAULT_CACHE_PATH
+    from lib.dead_domains import DeadDomainCache, DEFAULT_DEAD_DOMAINS_PATH
+    from lib.dns_resolver import DNSPreResolver
+    from lib.adaptive_concurrency import AdaptiveConcurrency
+    from lib.domain_dedup import DomainDedup
+    from lib.lead_priority import LeadPriority
 except ImportError:
-    from bs4 import BeautifulSoup
-    SELECTOLAX_AVAILABLE = False
+    from modules.scraping.lib.scrape_engine import (
+        ScrapeEngine, AsyncFetchStage, ExtractStage, DeepSearchStage, ScrapeStats,
+        clean_email, clean_emails, classify_site_type, validate_url, categorize_failure
+    )
+    from modules.scraping.lib.text_utils import extract_emails_from_html
+    from modules.scraping.lib.parsed_page import PARSER_BACKEND
+    from modules.scraping.lib.sitemap_utils import SitemapParser
+    from modules.scraping.lib.stream_io import aiter_rows, ChunkedCSVWriter
+    from modules.scraping.lib.response_cache import ResponseCache, DEFAULT_CACHE_PATH
+    from modules.scraping.lib.dead_domains import DeadDomainCache, DEFAULT_DEAD_DOMAINS_PATH
+    from modules.scraping.lib.dns_resolver import DNSPreResolver
+    from modules.scraping.lib.adaptive_concurrency import AdaptiveConcurrency
+    from modules.scraping.lib.domain_dedup import DomainDedup
+    from modules.scraping.lib.lead_priority import LeadPriority
+
+SELECTOLAX_AVAILABLE = PARSER_BACKEND == 'selectolax'
+if not SELECTOLAX_AVAILABLE:
     logger.warning("selectolax not installed - using BeautifulSoup (slower). Install: pip install selectolax")
 
 
-EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
-SOCIAL_PATTERNS = {
-    'facebook': re.compile(r'https?://(?:www\.)?facebook\.com/[^\s"\'>]+'),
-    'instagram': re.compile(r'https?://(?:www\.)?instagram\.com/[^\s"\'>]+'),
-    'twitter': re.compile(r'https?://(?:www\.)?twitter\.com/[^\s"\'>]+'),
-    'linkedin': re.compile(r'https?://(?:www\.)?linkedin\.com/[^\s"\'>]+'),
-}
-
-EXCLUDE_EMAILS = [
-    'example.com', 'domain.com', 'yoursite.com', 'test.com',
-    'filler@godaddy', 'noreply@', 'no-reply@', 'donotreply@',
-    'webmaster@', 'postmaster@', 'mailer-daemon@',
-    'privacy@', 'abuse@', 'hostmaster@'
-]
-
-
 class UltraFastScraper:
     """
     Ultra-optimized async scraper - 10x faster than thread-based version
+
+    Thin wrapper над lib.scrape_engine.ScrapeEngine (общий движок с scraper_robust)
     """
 
     def __init__(self, workers: int = 500, max_pages: int = 5,
                  scraping_mode: str = 'deep_search', extract_emails: bool = True,
                  email_format: str = 'separate', save_content: bool = True,
                  save_sitemap: bool = False, save_social_links: bool = False,
-                 save_other_links: bool = False, save_deep_content: bool = False):
+                 save_other_links: bool = False, save_deep_content: bool = False,
+                 cache: Optional[ResponseCache] = None, dead_domains: Optional[DeadDomainCache] = None,
+                 dns_resolver: Optional[DNSPreResolver] = None, http2: bool = False,
+                 concurrency: Optional[AdaptiveConcurrency] = None, dedupe_domains: bool = True,
+                 priority: Optional[LeadPriority] = None):
 
         self.workers = workers
         self.max_pages = max_pages
@@ -95,24 +123,42 @@ class UltraFastScraper:
         self.save_social_links = save_social_links
         self.save_other_links = save_other_links
         self.save_deep_content = save_deep_content
-
-        # Thread-safe stats
-        self._lock = threading.Lock()
-        self.stats = {
-            "total_processed": 0,
-            "success": 0,
-            "failed": 0,
-            "emails_found": 0,
-            "emails_from_homepage": 0,
-            "emails_from_deep": 0,
-            "no_emails": 0,
-            "static_sites": 0,
-            "dynamic_sites": 0,
-            "failed_static": 0,
-            "failed_dynamic": 0,
-            "failed_other": 0,
-        }
-        self.start_time = time.time()
+        self.cache = cache
+        self.dead_domains = dead_domains
+        self.dns_resolver = dns_resolver
+        self.concurrency = concurrency
+        self.dedupe_domains = dedupe_domains
+        self.domain_dedup: Optional[DomainDedup] = None
+        self.priority = priority
+
+        # Thread-safe stats (same format as SimpleHomepageScraper)
+        self.stats = ScrapeStats()
+        self.start_time = self.stats.start_time
+
+        # Pooled session: keep-alive + DNS cache 5 min, progressive timeouts 3s -> 5s -> 10s
+        # DNS pre-resolution: NXDOMAIN домены отсекаются до worker pool, connector берёт адреса из cache
+        self.fetch_stage = AsyncFetchStage(concurrency=workers, limit_per_host=20, timeouts=(3, 5, 10), cache=cache,
+                                           dns_resolver=dns_resolver, http2=http2)
+
+        deep_search = None
+        if scraping_mode == 'deep_search':
+            deep_search = DeepSearchStage(max_pages=max_pages, timeout=5, save_content=save_deep_content)
+
+        self.engine = ScrapeEngine(
+            fetch=self.fetch_stage,
+            extract=ExtractStage(extract_emails=extract_emails, save_content=save_content,
+                                 save_social_links=save_social_links, save_other_links=save_other_links),
+            deep_search=deep_search,
+            stats=self.stats,
+            workers=workers,
+            email_format=email_format,
+            sitemap_parser=SitemapParser(timeout=10) if save_sitemap else None,
+            save_sitemap=save_sitemap,
+            save_deep_content=save_deep_content,
+            dead_domains=dead_domains,
+            dns_resolver=dns_resolver,
+            concurrency=concurrency
+        )
 
         logger.info(f"Ultra-Fast Scraper initialized: workers={workers}, mode={scraping_mode}")
         logger.info(f"Using {'selectolax (5x faster)' if SELECTOLAX_AVAILABLE else 'BeautifulSoup (slower)'} parser")
@@ -121,360 +167,41 @@ class UltraFastScraper:
         """
         Extract emails using fast parser (selectolax or BeautifulSoup fallback)
         """
-        emails = []
-
-        if SELECTOLAX_AVAILABLE:
-            # Fast path: selectolax (C-based, 5x faster)
-            tree = HTMLParser(html)
-
-            # Extract from text
-            text = tree.text()
-            emails.extend(EMAIL_PATTERN.findall(text))
-
-            # Extract from mailto: links
-            for node in tree.css('a[href^="mailto:"]'):
-                href = node.attributes.get('href', '')
-                if '@' in href:
-                    emails.append(href.replace('mailto:', ''))
-        else:
-            # Slow path: BeautifulSoup fallback
-            soup = BeautifulSoup(html, 'html.parser')
-
-            # Extract from text
-            text = soup.get_text()
-            emails.extend(EMAIL_PATTERN.findall(text))
-
-            # Extract from mailto: links
-            for link in soup.find_all('a', href=re.compile(r'^mailto:', re.I)):
-                href = link.get('href', '')
-                if '@' in href:
-                    emails.append(href.replace('mailto:', ''))
-
-        # Clean and deduplicate
-        clean_emails = []
-        for email in emails:
-            clean = self._clean_email(email)
-            if clean:
-                clean_emails.append(clean)
-
-        return list(set(clean_emails))
+        return clean_emails(extract_emails_from_html(html))
 
     def _clean_email(self, email: str) -> Optional[str]:
         """Clean and validate email"""
-        if not email:
-            return None
-
-        email = email.strip().lower()
-
-        # Fix truncated emails
-        if email.endswith('.co') and not email.endswith('.co.uk'):
-            email = email + 'm'
-
-        # Filter fake emails
-        if any(pattern in email for pattern in EXCLUDE_EMAILS):
-            return None
-
-        # Basic validation
-        if '@' not in email or '.' not in email.split('@')[-1]:
-            return None
-
-        if len(email) < 5 or len(email) > 100:
-            return None
-
-        return email
+        return clean_email(email)
 
     def _detect_site_type(self, html: str) -> str:
         """Detect if site is static or dynamic"""
-        html_lower = html.lower()
-
-        dynamic_indicators = [
-            'react', 'vue', 'angular', 'next.js', 'nuxt',
-            'app.js', 'bundle.js', 'main.js',
-            '<div id="root"', '<div id="app"',
-            'ng-app', 'v-app', 'data-react',
-        ]
-
-        for indicator in dynamic_indicators:
-            if indicator in html_lower:
-                return 'dynamic'
+        return classify_site_type(html)
 
-        return 'static'
-
-    async def scrape_homepage_async(self, session: aiohttp.ClientSession, row_data: Dict) -> List[Dict]:
+    async def scrape_homepage_async(self, session, row_data: Dict) -> List[Dict]:
         """
         Async scrape homepage with aggressive optimization
-        """
-        name = row_data.get('name', '')
-        website = row_data.get('website', '')
-
-        # Base result preserves all columns
-        base_result = row_data.copy()
-        base_result.update({
-            'email': '',
-            'homepage_content': '',
-            'site_type': 'unknown',
-            'scrape_status': 'failed',
-            'error_message': '',
-            'email_source': '',
-            'sitemap_links': '' if self.save_sitemap else None,
-            'social_media_links': '' if self.save_social_links else None,
-            'other_links': '' if self.save_other_links else None,
-            'deep_pages_content': '' if self.save_deep_content else None
-        })
-
-        if not website or pd.isna(website):
-            base_result['error_message'] = 'No website provided'
-            with self._lock:
-                self.stats['total_processed'] += 1
-                self.stats['failed'] += 1
-            return [base_result]
-
-        # Normalize URL
-        if not website.startswith('http'):
-            website = f'https://{website}'
 
-        try:
-            # Progressive timeouts: 3s, 5s, 10s
-            for timeout_val in [3, 5, 10]:
-                try:
-                    async with session.get(website, timeout=ClientTimeout(total=timeout_val)) as response:
-                        if response.status == 200:
-                            html_content = await response.text()
-
-                            # Extract content
-                            clean_text = ''
-                            if self.save_content and html_content:
-                                if SELECTOLAX_AVAILABLE:
-                                    tree = HTMLParser(html_content)
-                                    clean_text = tree.text()[:50000]
-                                else:
-                                    soup = BeautifulSoup(html_content, 'html.parser')
-                                    clean_text = soup.get_text()[:50000]
-
-                            # Detect site type
-                            site_type = self._detect_site_type(html_content)
-
-                            if site_type == 'static':
-                                with self._lock:
-                                    self.stats['static_sites'] += 1
-                            elif site_type == 'dynamic':
-                                with self._lock:
-                                    self.stats['dynamic_sites'] += 1
-
-                            base_result['homepage_content'] = clean_text
-                            base_result['site_type'] = site_type
-
-                            # Extract emails if enabled
-                            clean_emails = []
-                            if self.extract_emails:
-                                clean_emails = self.extract_emails_fast(html_content)
-
-                            # Create results based on format
-                            results = []
-
-                            if self.extract_emails and clean_emails:
-                                # Found emails on homepage
-                                if self.email_format == 'all':
-                                    row = base_result.copy()
-                                    row['email'] = ', '.join(clean_emails)
-                                    row['scrape_status'] = 'success'
-                                    row['email_source'] = 'homepage'
-                                    results.append(row)
-                                elif self.email_format == 'primary':
-                                    row = base_result.copy()
-                                    row['email'] = clean_emails[0]
-                                    row['scrape_status'] = 'success'
-                                    row['email_source'] = 'homepage'
-                                    results.append(row)
-                                else:  # separate
-                                    for email in clean_emails:
-                                        row = base_result.copy()
-                                        row['email'] = email
-                                        row['scrape_status'] = 'success'
-                                        row['email_source'] = 'homepage'
-                                        results.append(row)
-
-                                with self._lock:
-                                    self.stats['emails_found'] += len(clean_emails)
-                                    self.stats['emails_from_homepage'] += len(clean_emails)
-                                    self.stats['total_processed'] += 1
-                                    self.stats['success'] += 1
-
-                                logger.info(f"✓ {name}: {len(clean_emails)} emails (homepage)")
-                                return results
-
-                            # No emails on homepage - try deep search
-                            deep_emails = []
-                            if self.extract_emails and not clean_emails and self.scraping_mode == 'deep_search':
-                                deep_emails = await self._deep_search_async(session, website)
-
-                            if deep_emails:
-                                # Handle deep search results
-                                if self.email_format == 'all':
-                                    row = base_result.copy()
-                                    row['email'] = ', '.join(deep_emails)
-                                    row['scrape_status'] = 'success'
-                                    row['email_source'] = 'deep_search'
-                                    results.append(row)
-                                elif self.email_format == 'primary':
-                                    row = base_result.copy()
-                                    row['email'] = deep_emails[0]
-                                    row['scrape_status'] = 'success'
-                                    row['email_source'] = 'deep_search'
-                                    results.append(row)
-                                else:  # separate
-                                    for email in deep_emails:
-                                        row = base_result.copy()
-                                        row['email'] = email
-                                        row['scrape_status'] = 'success'
-                                        row['email_source'] = 'deep_search'
-                                        results.append(row)
-
-                                with self._lock:
-                                    self.stats['emails_found'] += len(deep_emails)
-                                    self.stats['emails_from_deep'] += len(deep_emails)
-                                    self.stats['total_processed'] += 1
-                                    self.stats['success'] += 1
-
-                                logger.info(f"✓ {name}: {len(deep_emails)} emails (deep search)")
-                                return results
-
-                            # No emails found
-                            if not self.extract_emails:
-                                row = base_result.copy()
-                                row['scrape_status'] = 'success'
-                                row['email_source'] = 'none'
-                                results.append(row)
-
-                                with self._lock:
-                                    self.stats['total_processed'] += 1
-                                    self.stats['success'] += 1
-
-                                logger.info(f"✓ {name}: Content extracted (no email extraction)")
-                                return results
-                            else:
-                                failure_type = 'dynamic' if site_type == 'dynamic' else 'static'
-                                row = base_result.copy()
-                                row['scrape_status'] = 'failed'
-                                row['error_message'] = f'no_email_found_{failure_type}'
-                                row['email_source'] = 'none'
-                                results.append(row)
-
-                                with self._lock:
-                                    self.stats['total_processed'] += 1
-                                    self.stats['no_emails'] += 1
-                                    if failure_type == 'dynamic':
-                                        self.stats['failed_dynamic'] += 1
-                                    else:
-                                        self.stats['failed_static'] += 1
-
-                                logger.warning(f"✗ {name}: No emails found")
-                                return results
-
-                        else:
-                            base_result['error_message'] = f'HTTP {response.status}'
-                            break  # Don't retry on non-200 status
-
-                except asyncio.TimeoutError:
-                    if timeout_val == 10:  # Last attempt
-                        base_result['error_message'] = 'timeout'
-                        break
-                    continue  # Retry with longer timeout
-
-        except Exception as e:
-            base_result['error_message'] = str(e)
-
-        base_result['email_source'] = 'none'
-        with self._lock:
-            self.stats['total_processed'] += 1
-            self.stats['failed'] += 1
-            self.stats['failed_other'] += 1
-
-        logger.warning(f"✗ {name}: {base_result['error_message']}")
-        return [base_result]
-
-    async def _deep_search_async(self, session: aiohttp.ClientSession, website: str) -> List[str]:
+        Args:
+            session: aiohttp session (None = pooled session of the engine)
         """
-        Parallel deep search - all pages at once (FAST)
-        """
-        contact_pages = [
-            f"{website}/contact",
-            f"{website}/about",
-            f"{website}/team",
-            f"{website}/contact-us",
-            f"{website}/about-us"
-        ][:self.max_pages]
-
-        # Fetch ALL pages in parallel
-        tasks = []
-        for url in contact_pages:
-            tasks.append(session.get(url, timeout=ClientTimeout(total=5)))
-
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
-
-        all_emails = []
-        for resp in responses:
-            if isinstance(resp, Exception):
-                continue
-
-            try:
-                if resp.status == 200:
-                    html = await resp.text()
-                    emails = self.extract_emails_fast(html)
-                    all_emails.extend(emails)
-            except:
-                continue
-
-        # Deduplicate and filter
-        unique_emails = list(set(all_emails))
-
-        # Filter if too many (likely wrong content)
-        if len(unique_emails) > 20:
-            return []
-
-        return unique_emails
+        return await self.engine.scrape_adaptive(row_data, session=session)
 
     def get_analytics(self) -> Dict:
         """Get comprehensive analytics"""
-        elapsed = time.time() - self.start_time
-
-        return {
-            "summary": {
-                "total_sites": self.stats['total_processed'],
-                "success_rate": f"{(self.stats['success'] / self.stats['total_processed'] * 100):.2f}%" if self.stats['total_processed'] > 0 else "0%",
-                "duration_seconds": round(elapsed, 2),
-                "duration_minutes": round(elapsed / 60, 2),
-                "sites_per_second": round(self.stats['total_processed'] / elapsed, 2) if elapsed > 0 else 0
-            },
-            "results": {
-                "success": {
-                    "count": self.stats['success'],
-                    "percentage": f"{(self.stats['success'] / self.stats['total_processed'] * 100):.2f}%" if self.stats['total_processed'] > 0 else "0%",
-                    "total_emails": self.stats['emails_found'],
-                    "from_homepage": self.stats['emails_from_homepage'],
-                    "from_deep_search": self.stats['emails_from_deep']
-                },
-                "failed": {
-                    "total": self.stats['failed'],
-                    "static_no_email": {
-                        "count": self.stats['failed_static'],
-                        "percentage": f"{(self.stats['failed_static'] / self.stats['total_processed'] * 100):.2f}%" if self.stats['total_processed'] > 0 else "0%"
-                    },
-                    "dynamic_no_email": {
-                        "count": self.stats['failed_dynamic'],
-                        "percentage": f"{(self.stats['failed_dynamic'] / self.stats['total_processed'] * 100):.2f}%" if self.stats['total_processed'] > 0 else "0%"
-                    },
-                    "other_errors": {
-                        "count": self.stats['failed_other'],
-                        "percentage": f"{(self.stats['failed_other'] / self.stats['total_processed'] * 100):.2f}%" if self.stats['total_processed'] > 0 else "0%"
-                    }
-                }
-            },
-            "site_types": {
-                "static": self.stats['static_sites'],
-                "dynamic": self.stats['dynamic_sites']
-            }
-        }
+        analytics = self.stats.get_analytics()
+        if self.cache is not None:
+            analytics["response_cache"] = self.cache.get_stats()
+        if self.dead_domains is not None:
+            analytics["dead_domains"] = self.dead_domains.get_stats()
+        if self.dns_resolver is not None:
+            analytics["dns_preresolve"] = self.dns_resolver.get_stats()
+        if self.fetch_stage.http2:
+            analytics["http2"] = self.fetch_stage.get_protocol_stats()
+        if self.concurrency is not None:
+            analytics["adaptive_concurrency"] = self.concurrency.get_stats()
+        if self.domain_dedup is not None:
+            analytics["domain_dedup"] = self.domain_dedup.get_stats()
+        return analytics
 
     async def process_batch_async(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -490,53 +217,39 @@ class UltraFastScraper:
 
         start_time = time.time()
 
-        # Setup aggressive connection pooling
-        connector = TCPConnector(
-            limit=self.workers,           # Max concurrent connections
-            limit_per_host=20,             # Per host limit
-            ttl_dns_cache=300,             # DNS cache 5 min
-            enable_cleanup_closed=True,
-            force_close=False              # Keep-alive connections
-        )
-
-        timeout = ClientTimeout(total=30, connect=5)
+        # One scrape per domain - chains / franchise rows get the same result fanned out
+        df_unique = df
+        if self.dedupe_domains:
+            self.domain_dedup = DomainDedup(df)
+            df_unique = self.domain_dedup.unique_df
+            if self.domain_dedup.duplicate_rows:
+                logger.info(f"Domain dedup: {len(df_unique)} unique sites for {len(df)} leads "
+                            f"({self.domain_dedup.duplicate_rows} rows share a domain)")
 
-        async with aiohttp.ClientSession(
-            connector=connector,
-            timeout=timeout,
-            headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-        ) as session:
+        # High-value leads first - a partial / time-boxed run keeps the most useful results
+        if self.priority is not None:
+            df_unique = self.priority.sort(df_unique)
 
-            # Create all tasks
-            tasks = [
-                self.scrape_homepage_async(session, row.to_dict())
-                for _, row in df.iterrows()
-            ]
+        async with self.engine:
+            all_rows = await self.engine.run(row.to_dict() for _, row in df_unique.iterrows())
 
-            # Process all in parallel
-            all_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Flatten results
-        all_rows = []
-        for result in all_results:
-            if isinstance(result, Exception):
-                logger.error(f"Task failed: {result}")
-                continue
-            all_rows.extend(result)
+        if self.domain_dedup is not None:
+            all_rows = self.domain_dedup.fan_out(all_rows)
 
         # Create results DataFrame
         df_results = pd.DataFrame(all_rows)
 
         # Print summary
         duration = time.time() - start_time
+        total = self.stats['total_processed'] or 1
 
         logger.info("="*70)
         logger.info("SCRAPING COMPLETE")
         logger.info("="*70)
         logger.info(f"Total leads processed: {self.stats['total_processed']}")
         logger.info(f"Total rows in output: {len(df_results)}")
-        logger.info(f"Success: {self.stats['success']} ({self.stats['success']/self.stats['total_processed']*100:.1f}%)")
-        logger.info(f"Failed: {self.stats['failed']} ({self.stats['failed']/self.stats['total_processed']*100:.1f}%)")
+        logger.info(f"Success: {self.stats['success']} ({self.stats['success']/total*100:.1f}%)")
+        logger.info(f"Failed: {self.stats['failed']} ({self.stats['failed']/total*100:.1f}%)")
         logger.info(f"Total emails found: {self.stats['emails_found']}")
         logger.info(f"Duration: {duration:.2f}s ({duration/60:.1f} min)")
         logger.info(f"Speed: {len(df)/duration:.2f} leads/sec")
@@ -544,18 +257,98 @@ class UltraFastScraper:
 
         return df_results
 
+    async def process_stream_async(self, rows: Union[Iterable[Dict], AsyncIterable[Dict]],
+                                   output_dir: Path, chunk_size: int = 500) -> Dict:
+        """
+        Streaming mode: bounded worker pool + results flushed to disk every chunk_size rows
+
+        Memory stays constant regardless of input size; if the process crashes,
+        everything flushed so far is already in the output files.
+
+        Args:
+            rows: Iterable / AsyncIterable of lead dicts (e.g. aiter_rows('leads.parquet'))
+            output_dir: Directory for success.csv / failed.csv / all_combined.csv
+            chunk_size: Rows buffered per file before writing
+
+        Returns:
+            Dict with processed count, rows per file and output paths
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        logger.info("="*70)
+        logger.info("ULTRA-FAST SCRAPER STARTED (STREAMING)")
+        logger.info("="*70)
+        logger.info(f"Workers: {self.workers}")
+        logger.info(f"Flush every: {chunk_size} rows -> {output_dir}")
+        logger.info("="*70)
+
+        start_time = time.time()
+        writers = {
+            'success': ChunkedCSVWriter(output_dir / "success.csv", chunk_size=chunk_size),
+            'failed': ChunkedCSVWriter(output_dir / "failed.csv", chunk_size=chunk_size),
+            'combined': ChunkedCSVWriter(output_dir / "all_combined.csv", chunk_size=chunk_size)
+        }
+
+        def on_result(result_rows: List[Dict]):
+            # failure_reason - same column as the batch failed / all_combined output
+            result_rows = [dict(r, failure_reason=categorize_failure(r) if r['scrape_status'] == 'failed' else '')
+                           for r in result_rows]
+            writers['combined'].write(result_rows)
+            writers['success'].write([{k: v for k, v in r.items() if k != 'failure_reason'}
+                                      for r in result_rows if r['scrape_status'] == 'success'])
+            writers['failed'].write([r for r in result_rows if r['scrape_status'] == 'failed'])
+
+            if self.stats['total_processed'] % 1000 == 0:
+                logger.info(f"Progress: {self.stats['total_processed']} leads | {self.stats['emails_found']} emails found")
+
+        try:
+            async with self.engine:
+                processed = await self.engine.stream(rows, on_result=on_result)
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+        duration = time.time() - start_time
+
+        logger.info("="*70)
+        logger.info("SCRAPING COMPLETE")
+        logger.info("="*70)
+        logger.info(f"Total leads processed: {processed}")
+        logger.info(f"Success rows: {writers['success'].rows_written}")
+        logger.info(f"Failed rows: {writers['failed'].rows_written}")
+        logger.info(f"Total emails found: {self.stats['emails_found']}")
+        logger.info(f"Duration: {duration:.2f}s ({duration/60:.1f} min)")
+        logger.info(f"Speed: {processed/duration:.2f} leads/sec" if duration > 0 else "Speed: n/a")
+        logger.info("="*70)
+
+        return {
+            'processed': processed,
+            'success_rows': writers['success'].rows_written,
+            'failed_rows': writers['failed'].rows_written,
+            'combined_rows': writers['combined'].rows_written,
+            'output_dir': str(output_dir)
+        }
+
+
+async def iter_valid_rows(rows: AsyncIterable[Dict], website_column: str = 'website',
+                          name_column: str = 'name', limit: Optional[int] = None) -> AsyncIterator[Dict]:
+    """
+    Streaming version of the CLI input preparation: validate_url filter,
+    rename website/name columns, apply limit
+    """
+    count = 0
+    async for row in rows:
+        if limit and count >= limit:
+            break
+        if not validate_url(row.get(website_column)):
+            continue
+
+        rename_map = {website_column: 'website', name_column: 'name'}
+        row = {rename_map.get(key, key): value for key, value in row.items()}
 
-def validate_url(url: str) -> bool:
-    """Check if string looks like a valid URL"""
-    if not url or pd.isna(url):
-        return False
-    url_str = str(url).strip().lower()
-    if not url_str:
-        return False
-    has_domain = ('.' in url_str and len(url_str) > 4)
-    has_protocol = url_str.startswith(('http://', 'https://'))
-    looks_like_url = any(x in url_str for x in ['www.', '.com', '.org', '.net', '.io', '.co'])
-    return has_domain and (has_protocol or looks_like_url)
+        count += 1
+        yield row
 
 
 def main():
@@ -570,9 +363,70 @@ def main():
     parser.add_argument('--website-column', default='website')
     parser.add_argument('--name-column', default='name')
     parser.add_argument('--limit', type=int, help='Limit number of leads')
+    parser.add_argument('--stream', action='store_true',
+                        help='Stream input (CSV/Parquet) and flush results in chunks - constant memory')
+    parser.add_argument('--chunk-size', type=int, default=500, help='Rows per disk flush in --stream mode (default: 500)')
+    parser.add_argument('--cache', nargs='?', const=str(DEFAULT_CACHE_PATH),
+                        help='Use persistent HTTP response cache (optional SQLite path)')
+    parser.add_argument('--cache-ttl-hours', type=float, default=168, help='Response cache TTL in hours (default: 168)')
+    parser.add_argument('--skip-dead-domains', nargs='?', const=str(DEFAULT_DEAD_DOMAINS_PATH),
+                        help='Skip domains that failed with DNS/connection/timeout errors in previous runs')
+    parser.add_argument('--dead-domain-cooldown-hours', type=float, default=24,
+                        help='Cooldown after first failure, doubles on each repeated failure (default: 24)')
+    parser.add_argument('--no-dns-preresolve', action='store_true',
+                        help='Do not bulk-resolve domains before scraping (NXDOMAIN rows are otherwise failed immediately)')
+    parser.add_argument('--http2', action='store_true',
+                        help="Fetch https sites over HTTP/2 (one multiplexed connection per host, needs httpx[http2])")
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Adapt in-flight leads at runtime (AIMD on latency, errors, loop lag, RSS); --workers = upper bound')
+    parser.add_argument('--no-domain-dedup', action='store_true',
+                        help='Scrape every row even if several rows share a website domain (batch mode; --stream never dedups)')
+    parser.add_argument('--priority', action='store_true',
+                        help='Scrape high-value leads first (priority column, or rating / reviews / platform score; batch mode)')
+    parser.add_argument('--priority-history', help='Previous results CSV - adds email success rate per TLD to --priority score')
 
     args = parser.parse_args()
 
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if args.output:
+        output_dir = Path(args.output)
+    else:
+        output_dir = Path(__file__).parent / "results" / f"scraped_ultra_{timestamp}"
+
+    scraper = UltraFastScraper(
+        workers=args.workers,
+        max_pages=args.max_pages,
+        scraping_mode=args.scraping_mode,
+        extract_emails=not args.no_emails,
+        email_format=args.email_format,
+        save_content=True,
+        cache=ResponseCache(args.cache, ttl_seconds=args.cache_ttl_hours * 3600) if args.cache else None,
+        dead_domains=DeadDomainCache(args.skip_dead_domains, cooldown_hours=args.dead_domain_cooldown_hours)
+        if args.skip_dead_domains else None,
+        dns_resolver=None if args.no_dns_preresolve else DNSPreResolver(concurrency=max(args.workers, 200)),
+        http2=args.http2,
+        concurrency=AdaptiveConcurrency(min_limit=max(4, args.workers // 50), max_limit=args.workers)
+        if args.adaptive else None,
+        dedupe_domains=not args.no_domain_dedup,
+        priority=(LeadPriority.from_results(args.priority_history) if args.priority_history else LeadPriority())
+        if args.priority or args.priority_history else None
+    )
+
+    if args.stream:
+        logger.info(f"Streaming input file: {args.input}")
+        rows = iter_valid_rows(aiter_rows(args.input), website_column=args.website_column,
+                               name_column=args.name_column, limit=args.limit)
+        summary = asyncio.run(scraper.process_stream_async(rows, output_dir, chunk_size=args.chunk_size))
+
+        analytics_path = output_dir / "scraping_analytics.json"
+        with open(analytics_path, 'w') as f:
+            json.dump(scraper.get_analytics(), f, indent=2)
+
+        logger.info(f"\nResults saved to: {output_dir}")
+        logger.info(f"Success: {summary['success_rows']} rows")
+        logger.info(f"Failed: {summary['failed_rows']} rows")
+        return
+
     # Read input
     logger.info(f"Reading input file: {args.input}")
     df = pd.read_csv(args.input, encoding='utf-8-sig')
@@ -614,31 +468,18 @@ def main():
 
     logger.info(f"Processing {len(df_valid)} websites")
 
-    # Create scraper
-    scraper = UltraFastScraper(
-        workers=args.workers,
-        max_pages=args.max_pages,
-        scraping_mode=args.scraping_mode,
-        extract_emails=not args.no_emails,
-        email_format=args.email_format,
-        save_content=True
-    )
-
     # Process batch (async)
     df_results = asyncio.run(scraper.process_batch_async(df_valid))
 
     # Save results
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    if args.output:
-        output_dir = Path(args.output)
-    else:
-        output_dir = Path(__file__).parent / "results" / f"scraped_ultra_{timestamp}"
-
     output_dir.mkdir(parents=True, exist_ok=True)
 
     # Save success/failed/combined
     success_df = df_results[df_results['scrape_status'] == 'success'].copy()
     failed_df = df_results[df_results['scrape_status'] == 'failed'].copy()
+    failed_df['failure_reason'] = [categorize_failure(row) for row in failed_df.to_dict('records')]
+    df_results['failure_reason'] = ''
+    df_results.loc[failed_df.index, 'failure_reason'] = failed_df['failure_reason']
 
     success_path = output_dir / "success.csv"
     failed_path = output_dir / "failed.csv"
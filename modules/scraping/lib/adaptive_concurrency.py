@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Adaptive Concurrency - AIMD контроллер числа лидов в обработке
+
+Раньше workers выбирался один раз (auto-tune по CPU / RAM при старте) и дальше
+не менялся: на 100 лидах его не хватает, на 100k прогоне, упёршемся в timeouts
+или память, он слишком большой. Контроллер меняет лимит во время прогона:
+
+- каждые window завершённых лидов (по умолчанию ~ текущий лимит) смотрит сигналы:
+    * median latency лида vs baseline (минимум прошлых окон, медленно дрейфует вверх)
+    * доля congestion ошибок (timeout / connection error - не 404 и не "нет email")
+    * event loop lag (asyncio engine, monitor_loop_lag)
+    * RSS процесса (psutil)
+- есть перегрузка -> limit *= decrease_factor (multiplicative decrease)
+- нет -> limit += increase_step (additive increase); до первой перегрузки - slow start (x2)
+
+Один и тот же объект - gate для обоих engines:
+    thread pool:  limiter.acquire() / limiter.release(latency, congested)  (или with limiter.slot() as slot)
+    asyncio:      await limiter.acquire_async() / limiter.release(latency, congested)
+
+Использование:
+    limiter = AdaptiveConcurrency(min_limit=8, max_limit=500)
+    with ThreadPoolExecutor(max_workers=limiter.max_limit) as executor:   # потоки сверх limit ждут slot
+        ...
+        with limiter.slot() as slot:
+            rows = scrape(row)
+            slot.congested = rows_congested(rows)
+    print(limiter.get_stats())
+"""
+
+import os
+import time
+import asyncio
+import threading
+from statistics import median
+from typing import Dict, List, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# error_message с этими подстроками - признак перегрузки (сеть / пул соединений / удалённые хосты)
+CONGESTION_ERROR_MARKERS = ('timeout', 'timed out', 'connection')
+
+
+def rows_congested(result_rows: List[Dict]) -> bool:
+    """Лид закончился timeout / connection error (строки результата scrape_homepage / scrape_row)"""
+    if not result_rows:
+        return False
+    error = str(result_rows[0].get('error_message') or '').lower()
+    return any(marker in error for marker in CONGESTION_ERROR_MARKERS)
+
+
+class _Slot:
+    def __init__(self):
+        self.congested = False
+
+
+class AdaptiveConcurrency:
+    """
+    Thread-safe AIMD limiter (sync + asyncio acquire)
+    """
+
+    def __init__(self, min_limit: int = 4, max_limit: int = 200, initial_limit: Optional[int] = None,
+                 window: Optional[int] = None, latency_tolerance: float = 2.0, max_error_rate: float = 0.2,
+                 max_loop_lag: float = 0.25, max_rss_mb: Optional[float] = None,
+                 decrease_factor: float = 0.7, increase_step: int = 1):
+        """
+        Args:
+            min_limit / max_limit: Границы лимита
+            initial_limit: Стартовый лимит (по умолчанию min(max_limit, max(min_limit, 16)))
+            window: Лидов на одну оценку (None = текущий лимит, но не меньше 10)
+            latency_tolerance: Median latency окна > baseline * tolerance -> перегрузка
+            max_error_rate: Доля timeout / connection ошибок в окне, выше которой - перегрузка
+            max_loop_lag: Event loop lag (секунды), выше которого - перегрузка
+            max_rss_mb: RSS лимит (None = половина RAM, если есть psutil)
+            decrease_factor: Множитель при перегрузке
+            increase_step: Прибавка за окно без перегрузки (после slow start)
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.window = window
+        self.latency_tolerance = latency_tolerance
+        self.max_error_rate = max_error_rate
+        self.max_loop_lag = max_loop_lag
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+
+        if max_rss_mb is None and psutil is not None:
+            max_rss_mb = psutil.virtual_memory().total / (1024 * 1024) / 2
+        self.max_rss_mb = max_rss_mb
+        self._process = psutil.Process(os.getpid()) if psutil is not None else None
+
+        default_initial = min(self.max_limit, max(self.min_limit, 16))
+        self._limit = min(self.max_limit, max(self.min_limit, initial_limit or default_initial))
+        self._slow_start = True
+        self._in_flight = 0
+
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._async_waiters = []  # (loop, future)
+
+        self._latencies = []
+        self._congested = 0
+        self._loop_lag = 0.0
+        self._baseline = None
+
+        self._stats = {'completed': 0, 'increases': 0, 'decreases': 0, 'peak_limit': self._limit,
+                       'decrease_reasons': {}}
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    # ---------- gate ----------
+
+    def acquire(self):
+        """Занять slot (блокирует поток, пока in_flight >= limit)"""
+        with self._cond:
+            while self._in_flight >= self._limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    async def acquire_async(self):
+        """Занять slot (ждёт без блокировки event loop)"""
+        while True:
+            with self._lock:
+                if self._in_flight < self._limit:
+                    self._in_flight += 1
+                    return
+                loop = asyncio.get_running_loop()
+                future = loop.create_future()
+                self._async_waiters.append((loop, future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                # Отменённый waiter мог уже получить wake-up - передать его следующему
+                with self._lock:
+                    if (loop, future) in self._async_waiters:
+                        self._async_waiters.remove((loop, future))
+                    self._wake()
+                raise
+
+    def release(self, latency: Optional[float] = None, congested: bool = False):
+        """Освободить slot и записать результат лида (latency в секундах)"""
+        with self._cond:
+            self._in_flight -= 1
+            if latency is not None:
+                self._record(latency, congested)
+            self._wake()
+
+    def slot(self):
+        """Context manager для sync кода: latency меряется сам, congested - атрибут slot"""
+        return _SyncSlotContext(self)
+
+    def _wake(self):
+        # Вызывается под self._lock
+        free = self._limit - self._in_flight
+        if free <= 0:
+            return
+        self._cond.notify(free)
+        while free > 0 and self._async_waiters:
+            loop, future = self._async_waiters.pop(0)
+            if future.done():
+                continue
+            loop.call_soon_threadsafe(_resolve, future)
+            free -= 1
+
+    # ---------- signals ----------
+
+    def record_loop_lag(self, lag: float):
+        with self._lock:
+            self._loop_lag = max(self._loop_lag, lag)
+
+    async def monitor_loop_lag(self, interval: float = 0.25):
+        """Фоновая задача asyncio engine: насколько sleep(interval) опаздывает"""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(interval)
+            self.record_loop_lag(max(0.0, loop.time() - started - interval))
+
+    def _rss_mb(self) -> Optional[float]:
+        if self._process is None:
+            return None
+        try:
+            return self._process.memory_info().rss / (1024 * 1024)
+        except Exception:
+            return None
+
+    def _record(self, latency: float, congested: bool):
+        # Вызывается под self._lock
+        self._stats['completed'] += 1
+        self._latencies.append(latency)
+        self._congested += int(congested)
+
+        window = self.window or max(self._limit, 10)
+        if len(self._latencies) >= window:
+            self._evaluate()
+
+    def _evaluate(self):
+        window_median = median(self._latencies)
+        error_rate = self._congested / len(self._latencies)
+        loop_lag = self._loop_lag
+
+        reasons = []
+        if error_rate > self.max_error_rate:
+            reasons.append('errors')
+        if self._baseline is not None and window_median > self._baseline * self.latency_tolerance:
+            reasons.append('latency')
+        if loop_lag > self.max_loop_lag:
+            reasons.append('loop_lag')
+        rss = self._rss_mb() if self.max_rss_mb else None
+        if rss is not None and rss > self.max_rss_mb:
+            reasons.append('memory')
+
+        if reasons:
+            self._limit = max(self.min_limit, int(self._limit * self.decrease_factor))
+            self._slow_start = False
+            self._stats['decreases'] += 1
+            for reason in reasons:
+                self._stats['decrease_reasons'][reason] = self._stats['decrease_reasons'].get(reason, 0) + 1
+        else:
+            if self._slow_start:
+                self._limit = min(self.max_limit, self._limit * 2)
+            else:
+                self._limit = min(self.max_limit, self._limit + self.increase_step)
+            self._stats['increases'] += 1
+            self._stats['peak_limit'] = max(self._stats['peak_limit'], self._limit)
+
+        # Baseline - лучший median, медленно дрейфует вверх (смена нагрузки: deep search, медленные сайты)
+        if 'errors' not in reasons:
+            self._baseline = window_median if self._baseline is None else min(window_median, self._baseline * 1.05)
+
+        self._latencies = []
+        self._congested = 0
+        self._loop_lag = 0.0
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'limit': self._limit,
+                'min_limit': self.min_limit,
+                'max_limit': self.max_limit,
+                'in_flight': self._in_flight,
+                'baseline_latency_sec': round(self._baseline, 3) if self._baseline is not None else None,
+                **{key: (dict(value) if isinstance(value, dict) else value) for key, value in self._stats.items()}
+            }
+
+
+class _SyncSlotContext:
+    def __init__(self, limiter: AdaptiveConcurrency):
+        self.limiter = limiter
+        self.slot = _Slot()
+        self.started = None
+
+    def __enter__(self) -> _Slot:
+        self.limiter.acquire()
+        self.started = time.monotonic()
+        return self.slot
+
+    def __exit__(self, exc_type, exc, tb):
+        self.limiter.release(time.monotonic() - self.started, congested=self.slot.congested or exc_type is not None)
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
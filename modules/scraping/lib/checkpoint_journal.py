@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Checkpoint Journal - append-only журнал обработанных URL (SQLite WAL)
+
+Раньше checkpoint.json на каждом сохранении переписывал весь processed_urls
+список (100k+ URL - мегабайты JSON на каждый flush, O(n²) за прогон), а resume
+читал его целиком. Журнал:
+- processed: url -> сколько строк / emails дал лид, offset его строк в CSV, время
+- meta: csv_bytes - размер results CSV после последнего закоммиченного batch
+
+Checkpoint = один INSERT batch в транзакции (O(batch)), resume = index lookup
+по PRIMARY KEY. Если процесс упал между записью CSV и commit журнала - при
+resume CSV обрезается до csv_bytes, строки этого batch не дублируются.
+
+Использование:
+    journal = CheckpointJournal(output_dir / 'checkpoint.sqlite')
+    todo = journal.unprocessed(df['website'])            # bool mask
+    offset = csv_path.stat().st_size
+    df_new.to_csv(csv_path, mode='a', ...)
+    journal.record_batch(entries, csv_offset=offset, csv_bytes=csv_path.stat().st_size)
+"""
+
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# Сколько URL в одном SELECT ... IN (...) (лимит SQLite variables - 999)
+LOOKUP_CHUNK = 500
+
+
+class CheckpointJournal:
+    """
+    Thread-safe SQLite журнал обработанных URL для resume
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Args:
+            path: SQLite файл (создаётся вместе с директорией)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS processed (
+                url TEXT PRIMARY KEY,
+                result_rows INTEGER NOT NULL,
+                emails INTEGER NOT NULL,
+                csv_offset INTEGER,
+                processed_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        ''')
+
+    def record_batch(self, entries: Iterable[Tuple[str, int, int]], csv_offset: Optional[int] = None,
+                     csv_bytes: Optional[int] = None, meta: Optional[Dict[str, str]] = None):
+        """
+        Записать batch обработанных URL (одна транзакция)
+
+        Args:
+            entries: (url, result_rows, emails) для каждого лида batch
+            csv_offset: Byte offset в CSV, с которого начинаются строки batch
+            csv_bytes: Размер CSV после записи batch
+            meta: Доп. meta ключи, коммитятся в той же транзакции (например parquet_parts)
+        """
+        now = time.time()
+        rows = [(url, result_rows, emails, csv_offset, now) for url, result_rows, emails in entries]
+
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO processed (url, result_rows, emails, csv_offset, processed_at) '
+                    'VALUES (?, ?, ?, ?, ?)', rows
+                )
+                if csv_bytes is not None:
+                    self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('csv_bytes', ?)",
+                                       (str(csv_bytes),))
+                for key, value in (meta or {}).items():
+                    self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, str(value)))
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def processed_among(self, urls: Iterable[str]) -> set:
+        """Какие из urls уже в журнале (index lookups по чанкам)"""
+        urls = [url for url in dict.fromkeys(urls) if isinstance(url, str)]
+        done = set()
+        with self._lock:
+            for start in range(0, len(urls), LOOKUP_CHUNK):
+                chunk = urls[start:start + LOOKUP_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                done.update(row[0] for row in self._conn.execute(
+                    f'SELECT url FROM processed WHERE url IN ({placeholders})', chunk
+                ))
+        return done
+
+    def unprocessed(self, urls) -> List[bool]:
+        """Mask для DataFrame: True - URL ещё не обработан"""
+        urls = list(urls)
+        done = self.processed_among(urls)
+        return [url not in done for url in urls]
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    @property
+    def csv_bytes(self) -> Optional[int]:
+        """Размер results CSV после последнего закоммиченного batch"""
+        value = self.get_meta('csv_bytes')
+        return int(value) if value is not None else None
+
+    def get_stats(self) -> Dict:
+        """processed URLs + сумма emails / строк результата"""
+        with self._lock:
+            processed, emails, result_rows = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(emails), 0), COALESCE(SUM(result_rows), 0) FROM processed'
+            ).fetchone()
+        return {'processed': processed, 'emails': emails, 'result_rows': result_rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
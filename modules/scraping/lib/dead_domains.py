@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Dead Domain Cache - персистентный negative cache для недоступных доменов
+
+Примерно половина websites из Google Maps не отвечает (DNS, connection error,
+timeout). Без кэша каждый rerun заново платит timeout × retries за каждый такой
+домен. DeadDomainCache помнит domain -> failure class, время и число неудач
+и пропускает домен на время cooldown.
+
+Re-probe (exponential): после N-й неудачи подряд домен пропускается
+cooldown × backoff^(N-1) (но не дольше max_cooldown). По истечении - одна
+попытка: успех удаляет домен из кэша, неудача удлиняет cooldown.
+
+Домен-уровневые ошибки (по умолчанию): dns_error, connection_error, timeout, ssl_error.
+HTTP ошибки (403/404/500) - не признак мёртвого домена и не записываются.
+
+Использование:
+    dead = DeadDomainCache(cooldown_hours=24)
+
+    entry = dead.check(url)
+    if entry:
+        ...  # пропустить, entry['failure_class'], entry['next_probe_at']
+    else:
+        result = client.fetch(url)
+        dead.record(url, result['status'])
+"""
+
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+try:
+    from .rate_limiter import DomainRateLimiter
+except ImportError:
+    from rate_limiter import DomainRateLimiter
+
+DEFAULT_DEAD_DOMAINS_PATH = Path(__file__).parent.parent.parent.parent / 'data' / 'cache' / 'dead_domains.sqlite'
+
+# Статусы HTTPClient / AsyncFetchStage, которые означают что домен недоступен
+DOMAIN_FAILURE_CLASSES = {'dns_error', 'connection_error', 'timeout', 'ssl_error'}
+
+
+class DeadDomainCache:
+    """
+    Thread-safe SQLite кэш недоступных доменов (domain без www)
+    """
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_DEAD_DOMAINS_PATH, cooldown_hours: float = 24,
+                 backoff: float = 2.0, max_cooldown_hours: float = 24 * 30, min_failures: int = 1,
+                 failure_classes: Optional[Iterable[str]] = None):
+        """
+        Args:
+            path: SQLite файл (создаётся вместе с директорией)
+            cooldown_hours: Cooldown после первой неудачи
+            backoff: Множитель cooldown для каждой следующей неудачи подряд
+            max_cooldown_hours: Максимальный cooldown
+            min_failures: Сколько неудач подряд нужно, чтобы начать пропускать домен
+            failure_classes: Статусы, считающиеся "домен мёртв" (по умолчанию DOMAIN_FAILURE_CLASSES)
+        """
+        self.path = Path(path)
+        self.cooldown_seconds = cooldown_hours * 3600
+        self.backoff = backoff
+        self.max_cooldown_seconds = max_cooldown_hours * 3600
+        self.min_failures = min_failures
+        self.failure_classes = set(failure_classes) if failure_classes else DOMAIN_FAILURE_CLASSES
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS dead_domains (
+                domain TEXT PRIMARY KEY,
+                failure_class TEXT NOT NULL,
+                first_failed_at REAL NOT NULL,
+                last_failed_at REAL NOT NULL,
+                attempts INTEGER NOT NULL,
+                next_probe_at REAL NOT NULL
+            )
+        ''')
+
+        # Статистика за этот процесс
+        self.skipped = 0
+        self.recorded_failures = 0
+        self.recovered = 0
+
+    def cooldown_for(self, attempts: int) -> float:
+        """Cooldown (секунды) после attempts неудач подряд"""
+        cooldown = self.cooldown_seconds * (self.backoff ** max(attempts - 1, 0))
+        return min(cooldown, self.max_cooldown_seconds)
+
+    def check(self, url: str) -> Optional[Dict]:
+        """
+        Пропускать ли URL сейчас
+
+        Returns:
+            Запись домена (domain, failure_class, attempts, next_probe_at, ...) если домен
+            в cooldown, иначе None (можно запрашивать - в т.ч. re-probe)
+        """
+        domain = DomainRateLimiter.domain_of(url)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT domain, failure_class, first_failed_at, last_failed_at, attempts, next_probe_at '
+                'FROM dead_domains WHERE domain = ?', (domain,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        entry = dict(zip(['domain', 'failure_class', 'first_failed_at', 'last_failed_at',
+                          'attempts', 'next_probe_at'], row))
+        if entry['attempts'] < self.min_failures or time.time() >= entry['next_probe_at']:
+            return None
+
+        with self._lock:
+            self.skipped += 1
+        return entry
+
+    def record(self, url: str, status: str):
+        """
+        Записать результат запроса к домену (status из HTTPClient / AsyncFetchStage)
+
+        success -> домен удаляется из кэша; domain-level ошибка -> +1 неудача и новый cooldown;
+        остальные статусы (http_error и т.д.) игнорируются
+        """
+        if status == 'success':
+            self.record_success(url)
+        elif status in self.failure_classes:
+            self.record_failure(url, status)
+
+    def record_success(self, url: str):
+        domain = DomainRateLimiter.domain_of(url)
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM dead_domains WHERE domain = ?', (domain,))
+            if cursor.rowcount:
+                self.recovered += 1
+
+    def record_failure(self, url: str, failure_class: str):
+        domain = DomainRateLimiter.domain_of(url)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute('SELECT attempts FROM dead_domains WHERE domain = ?', (domain,)).fetchone()
+            attempts = (row[0] if row else 0) + 1
+            next_probe_at = now + self.cooldown_for(attempts)
+
+            if row:
+                self._conn.execute(
+                    'UPDATE dead_domains SET failure_class = ?, last_failed_at = ?, attempts = ?, next_probe_at = ? '
+                    'WHERE domain = ?', (failure_class, now, attempts, next_probe_at, domain)
+                )
+            else:
+                self._conn.execute(
+                    'INSERT INTO dead_domains (domain, failure_class, first_failed_at, last_failed_at, attempts, '
+                    'next_probe_at) VALUES (?, ?, ?, ?, ?, ?)',
+                    (domain, failure_class, now, now, attempts, next_probe_at)
+                )
+            self.recorded_failures += 1
+
+    @staticmethod
+    def describe(entry: Dict) -> str:
+        """Текст для error_message пропущенной строки"""
+        next_probe = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['next_probe_at']))
+        return f"dead_domain ({entry['failure_class']}, {entry['attempts']} failures, re-probe after {next_probe})"
+
+    def get_stats(self) -> Dict:
+        """Статистика: домены в кэше по failure class + skipped/recorded/recovered за этот процесс"""
+        now = time.time()
+        with self._lock:
+            by_class = dict(self._conn.execute(
+                'SELECT failure_class, COUNT(*) FROM dead_domains GROUP BY failure_class'
+            ).fetchall())
+            cooling_down = self._conn.execute(
+                'SELECT COUNT(*) FROM dead_domains WHERE next_probe_at > ? AND attempts >= ?',
+                (now, self.min_failures)
+            ).fetchone()[0]
+        return {
+            'domains': sum(by_class.values()),
+            'cooling_down': cooling_down,
+            'by_failure_class': by_class,
+            'skipped': self.skipped,
+            'recorded_failures': self.recorded_failures,
+            'recovered': self.recovered
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+DNS Pre-Resolver - bulk резолв всех доменов до открытия HTTP соединений
+
+В больших прогонах заметная доля worker-секунд уходит на сайты, которые вообще
+не резолвятся (NXDOMAIN): worker ждёт DNS timeout × retries. Pre-resolution:
+1. Все hosts входного файла резолвятся одним высоко-параллельным проходом
+   (aiodns если установлен, иначе getaddrinfo в thread pool)
+2. NXDOMAIN строки сразу помечаются failed (failed_other) - без worker slot
+3. Результаты лежат в in-process DNS cache; CachedResolver отдаёт их aiohttp
+   connector, чтобы не резолвить тот же host второй раз
+
+Временные ошибки (SERVFAIL / timeout) не считаются NXDOMAIN - такие строки
+идут на обычный scraping (connector резолвит заново).
+
+Сбой самого резолвера (нет сети / сломан upstream DNS) выглядит как NXDOMAIN
+на всё подряд. Поэтому: если в пачке NXDOMAIN, резолвится canary (заведомо
+существующий домен); canary не резолвится или NXDOMAIN почти у всех hosts
+пачки -> резолвер считается сломанным, pre-resolution отключается до конца
+прогона (find_unresolvable возвращает пустой set, строки идут на scraping).
+
+Использование:
+    resolver = DNSPreResolver(concurrency=500)
+    dead_urls = await resolver.find_unresolvable(urls)   # URL, чей host -> NXDOMAIN
+    dead_urls = resolver.find_unresolvable_sync(urls)    # из sync кода (thread-based scraper)
+    results = await resolver.resolve_all(hosts)          # {host: {'status': 'ok'|'nxdomain'|..., ...}}
+
+    connector = aiohttp.TCPConnector(resolver=CachedResolver(resolver))
+"""
+
+import socket
+import asyncio
+import logging
+import ipaddress
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set
+from urllib.parse import urlsplit
+
+try:
+    import aiodns
+    AIODNS_AVAILABLE = True
+except ImportError:
+    aiodns = None
+    AIODNS_AVAILABLE = False
+
+try:
+    from aiohttp.abc import AbstractResolver
+    from aiohttp.resolver import DefaultResolver
+except ImportError:
+    AbstractResolver = object
+    DefaultResolver = None
+
+logger = logging.getLogger(__name__)
+
+# getaddrinfo: домен не существует / нет адресов
+_NXDOMAIN_GAIERRORS = {getattr(socket, name) for name in ('EAI_NONAME', 'EAI_NODATA') if hasattr(socket, name)}
+
+# aiodns (c-ares): только ARES_ENOTFOUND=4 - домен не существует
+# (ARES_ENODATA=1 - нет записей нужного типа, домен при этом есть)
+_NXDOMAIN_ARES_CODES = {getattr(aiodns.error, 'ARES_ENOTFOUND', 4)} if AIODNS_AVAILABLE else {4}
+
+# Заведомо существующий домен для проверки, что резолвер вообще работает
+DEFAULT_CANARY_HOST = 'example.com'
+
+# Доля NXDOMAIN в пачке, после которой это считается сбоем резолвера, и минимум hosts для этой проверки
+RESOLVER_FAILURE_RATIO = 0.9
+RESOLVER_FAILURE_MIN_HOSTS = 20
+
+
+def host_of(url) -> Optional[str]:
+    """Hostname из URL / домена (None если не определить)"""
+    if url is None or (isinstance(url, float) and url != url):  # NaN
+        return None
+    url = str(url).strip()
+    if not url:
+        return None
+    if not url.lower().startswith(('http://', 'https://')):
+        url = 'https://' + url
+    try:
+        return (urlsplit(url).hostname or '').lower() or None
+    except ValueError:
+        return None
+
+
+def _hosts_for(url, www_variants: bool = False) -> List[str]:
+    host = host_of(url)
+    if not host:
+        return []
+    if not www_variants or _is_ip(host):
+        return [host]
+    return [host, host[4:] if host.startswith('www.') else f'www.{host}']
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+class DNSPreResolver:
+    """
+    Bulk DNS резолвер + in-process cache (thread-safe, переиспользуется между батчами)
+    """
+
+    def __init__(self, concurrency: int = 200, timeout: float = 5.0, use_aiodns: Optional[bool] = None,
+                 canary_host: Optional[str] = DEFAULT_CANARY_HOST):
+        """
+        Args:
+            concurrency: Одновременных DNS запросов (и потоков для getaddrinfo)
+            timeout: Timeout одного резолва (секунды) - timeout это не NXDOMAIN
+            use_aiodns: None = aiodns если установлен
+            canary_host: Домен, который обязан резолвиться (None = без canary проверки)
+        """
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.use_aiodns = AIODNS_AVAILABLE if use_aiodns is None else (use_aiodns and AIODNS_AVAILABLE)
+        self.canary_host = canary_host
+
+        self.cache: Dict[str, Dict] = {}
+        self.disabled = False  # резолвер сломан - pre-resolution выключен
+        self._lock = threading.Lock()
+        self._executor = None
+        # Один c-ares канал на весь прогон (пересоздаётся только для нового event loop)
+        self._aiodns_resolver = None
+        self._aiodns_loop = None
+        if self.use_aiodns:
+            try:
+                self._aiodns_resolver = aiodns.DNSResolver(timeout=timeout)
+                self._aiodns_loop = asyncio.get_running_loop()
+            except RuntimeError:
+                pass  # создаётся при первом резолве внутри event loop
+
+    @property
+    def backend(self) -> str:
+        return 'aiodns' if self.use_aiodns else 'getaddrinfo'
+
+    async def resolve(self, host: str, use_cache: bool = True) -> Dict:
+        """
+        Args:
+            use_cache: False - всегда новый запрос (canary)
+
+        Returns:
+            {'status': 'ok'|'nxdomain'|'timeout'|'error', 'addresses': [(family, ip), ...], 'error': str}
+        """
+        if use_cache:
+            with self._lock:
+                cached = self.cache.get(host)
+            if cached is not None:
+                return cached
+
+        if _is_ip(host) or host == 'localhost':
+            result = {'status': 'ok', 'addresses': [], 'error': None}
+        else:
+            try:
+                addresses = await asyncio.wait_for(self._lookup(host), timeout=self.timeout)
+                result = {'status': 'ok', 'addresses': addresses, 'error': None}
+            except asyncio.TimeoutError:
+                result = {'status': 'timeout', 'addresses': [], 'error': f'DNS timeout ({self.timeout}s)'}
+            except socket.gaierror as e:
+                status = 'nxdomain' if e.errno in _NXDOMAIN_GAIERRORS else 'error'
+                result = {'status': status, 'addresses': [], 'error': str(e)}
+            except Exception as e:
+                status = 'error'
+                if self.use_aiodns and isinstance(e, aiodns.error.DNSError) and e.args and e.args[0] in _NXDOMAIN_ARES_CODES:
+                    status = 'nxdomain'
+                result = {'status': status, 'addresses': [], 'error': str(e)}
+
+        # Временные ошибки не кэшируем - connector попробует сам
+        if use_cache and result['status'] in ('ok', 'nxdomain'):
+            with self._lock:
+                self.cache[host] = result
+        return result
+
+    async def _lookup(self, host: str) -> List[tuple]:
+        if self.use_aiodns:
+            response = await self._get_aiodns_resolver().getaddrinfo(
+                host, family=socket.AF_UNSPEC, port=80, type=socket.SOCK_STREAM
+            )
+            return list(dict.fromkeys((node.family, node.addr[0].decode() if isinstance(node.addr[0], bytes)
+                                       else node.addr[0]) for node in response.nodes))
+
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='dns')
+
+        loop = asyncio.get_running_loop()
+        infos = await loop.run_in_executor(
+            self._executor, socket.getaddrinfo, host, 80, socket.AF_UNSPEC, socket.SOCK_STREAM
+        )
+        return list(dict.fromkeys((family, sockaddr[0]) for family, _, _, _, sockaddr in infos))
+
+    def _get_aiodns_resolver(self):
+        loop = asyncio.get_running_loop()
+        if self._aiodns_resolver is None or self._aiodns_loop is not loop:
+            self._aiodns_resolver = aiodns.DNSResolver(timeout=self.timeout)
+            self._aiodns_loop = loop
+        return self._aiodns_resolver
+
+    async def resolve_all(self, hosts: Iterable[str]) -> Dict[str, Dict]:
+        """Резолв всех hosts (не больше concurrency одновременно)"""
+        unique_hosts = list(dict.fromkeys(host for host in hosts if host))
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def resolve_one(host: str):
+            async with semaphore:
+                return host, await self.resolve(host)
+
+        results = await asyncio.gather(*(resolve_one(host) for host in unique_hosts))
+        return dict(results)
+
+    def resolve_all_sync(self, hosts: Iterable[str]) -> Dict[str, Dict]:
+        """resolve_all для sync кода (создаёт свой event loop)"""
+        return asyncio.run(self.resolve_all(hosts))
+
+    def is_nxdomain(self, url, www_variants: bool = False) -> bool:
+        """
+        Host URL уже зарезолвлен и не существует
+
+        Args:
+            www_variants: NXDOMAIN только если не резолвится и host с www / без www
+        """
+        hosts = _hosts_for(url, www_variants)
+        with self._lock:
+            results = [self.cache.get(host) for host in hosts]
+        return bool(results) and all(result and result['status'] == 'nxdomain' for result in results)
+
+    async def find_unresolvable(self, urls: Iterable, www_variants: bool = False) -> Set:
+        """
+        Bulk pre-resolution: резолвит hosts всех URL и возвращает URL с NXDOMAIN
+
+        Args:
+            www_variants: Резолвить и host с www / без www (для fetch с fallback на URL variants)
+        """
+        if self.disabled:
+            return set()
+
+        urls = list(urls)
+        results = await self.resolve_all(host for url in urls for host in _hosts_for(url, www_variants))
+        dead_urls = {url for url in urls if self.is_nxdomain(url, www_variants)}
+        if dead_urls and await self._resolver_failed(results):
+            return set()
+        return dead_urls
+
+    async def _resolver_failed(self, results: Dict[str, Dict]) -> bool:
+        """
+        NXDOMAIN на (почти) всё или не резолвится canary -> сбой резолвера, не мёртвые домены:
+        pre-resolution выключается, NXDOMAIN вердикты выбрасываются из cache
+        """
+        statuses = [result['status'] for host, result in results.items() if not _is_ip(host) and host != 'localhost']
+        nxdomain = statuses.count('nxdomain')
+        answered = nxdomain + statuses.count('ok')  # timeout / SERVFAIL - без ответа, не в счёт
+        reason = None
+        if answered >= RESOLVER_FAILURE_MIN_HOSTS and nxdomain >= answered * RESOLVER_FAILURE_RATIO:
+            reason = f'{nxdomain}/{answered} resolved hosts NXDOMAIN'
+        elif self.canary_host:
+            canary = await self.resolve(self.canary_host, use_cache=False)
+            if canary['status'] != 'ok':
+                reason = f"canary {self.canary_host} -> {canary['status']} ({canary['error']})"
+        if reason is None:
+            return False
+
+        logger.warning(f"DNS resolver looks broken ({reason}) - DNS pre-resolution disabled for this run")
+        with self._lock:
+            self.disabled = True
+            self.cache = {host: result for host, result in self.cache.items() if result['status'] != 'nxdomain'}
+        return True
+
+    def find_unresolvable_sync(self, urls: Iterable, www_variants: bool = False) -> Set:
+        """find_unresolvable для sync кода"""
+        return asyncio.run(self.find_unresolvable(urls, www_variants))
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            statuses = [result['status'] for result in self.cache.values()]
+        return {
+            'backend': self.backend,
+            'disabled': self.disabled,
+            'hosts': len(statuses),
+            'resolved': statuses.count('ok'),
+            'nxdomain': statuses.count('nxdomain')
+        }
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class CachedResolver(AbstractResolver):
+    """
+    aiohttp resolver поверх cache DNSPreResolver (fallback - обычный aiohttp resolver)
+    """
+
+    def __init__(self, pre_resolver: DNSPreResolver):
+        self.pre_resolver = pre_resolver
+        self._fallback = DefaultResolver()
+
+    async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET) -> List[Dict]:
+        with self.pre_resolver._lock:
+            cached = self.pre_resolver.cache.get(host)
+
+        if cached and cached['status'] == 'ok' and cached['addresses']:
+            addresses = [(fam, ip) for fam, ip in cached['addresses']
+                         if family == socket.AF_UNSPEC or fam == family] or cached['addresses']
+            return [
+                {'hostname': host, 'host': ip, 'port': port, 'family': fam, 'proto': 0,
+                 'flags': socket.AI_NUMERICHOST | socket.AI_NUMERICSERV}
+                for fam, ip in addresses
+            ]
+
+        return await self._fallback.resolve(host, port, family)
+
+    async def close(self) -> None:
+        await self._fallback.close()
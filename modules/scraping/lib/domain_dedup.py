@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Domain Dedup - один scrape на домен, результат размножается на все строки
+
+В Google Maps выгрузках много строк с одним сайтом: сети, франшизы, один домен
+с разными path (example.com/locations/austin, example.com/locations/dallas).
+Раньше каждая строка скрейпилась отдельно - тот же сайт N раз, N x per-domain
+rate limit. Pre-stage:
+1. website -> canonical domain (clean_website_to_domain из csv_merge: без схемы,
+   www., порта и path)
+2. На домен скрейпится одна representative строка (самый короткий website -
+   обычно корень сайта, а не страница филиала)
+3. Строки результата размножаются на все исходные строки домена: колонки
+   scraper (email, homepage_content, scrape_status, ...) - из результата,
+   исходные колонки (name, phone, address, website, ...) - свои у каждой строки
+
+Строки без website / с невалидным доменом не группируются.
+
+Shared платформы (PLATFORM_HOSTS: facebook.com, linktr.ee, sites.google.com, ...)
+- один хост на тысячи разных бизнесов: facebook.com/JoesPizza и
+facebook.com/MarysBakery не один сайт. Для них ключ группы - domain + path
+(+ query, facebook.com/profile.php?id=...), т.е. дублями считается только одна и
+та же страница.
+
+Использование:
+    dedup = DomainDedup(df)
+    result_rows = scrape(dedup.unique_df)       # строк <= len(df)
+    result_rows = dedup.fan_out(result_rows)    # снова все исходные строки
+    print(dedup.get_stats())
+"""
+
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+try:
+    from modules.csv_merge.lib.csv_cleaner import clean_website_to_domain
+except ImportError:
+    from csv_merge.lib.csv_cleaner import clean_website_to_domain
+
+try:
+    from .scrape_engine import new_base_result
+except ImportError:
+    from scrape_engine import new_base_result
+
+# Колонки, которые заполняет scraper (при fan-out не берутся из исходной строки)
+SCRAPER_COLUMNS = frozenset(new_base_result({}))
+
+# Хосты, где под одним доменом живут страницы разных бизнесов (соцсети, link-in-bio,
+# каталоги, конструкторы сайтов) - поддомены тоже (m.facebook.com, x.business.site)
+PLATFORM_HOSTS = (
+    'facebook.com',
+    'instagram.com',
+    'linktr.ee',
+    'yelp.com',
+    'business.site',
+    'sites.google.com',
+)
+
+
+def canonical_domain(website) -> Optional[str]:
+    """Canonical domain строки (None для пустого / невалидного website)"""
+    if not isinstance(website, str):
+        return None
+    return clean_website_to_domain(website)
+
+
+def platform_of(domain: Optional[str]) -> Optional[str]:
+    """Хост из PLATFORM_HOSTS, на котором лежит domain (None - обычный сайт)"""
+    if not domain:
+        return None
+    for platform in PLATFORM_HOSTS:
+        if domain == platform or domain.endswith('.' + platform):
+            return platform
+    return None
+
+
+def dedup_key(website) -> Optional[str]:
+    """
+    Ключ группировки строки: canonical domain, на shared платформе - domain + path (+ query)
+
+    Examples:
+        https://www.example.com/locations/austin -> example.com
+        https://facebook.com/JoesPizza/ -> facebook.com/joespizza
+        sites.google.com/view/joes-pizza -> sites.google.com/view/joes-pizza
+    """
+    domain = canonical_domain(website)
+    if platform_of(domain) is None:
+        return domain
+
+    url = website.strip().lower()
+    if not url.startswith(('http://', 'https://')):
+        url = 'http://' + url
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return None
+    return domain + parts.path.rstrip('/') + (f'?{parts.query}' if parts.query else '')
+
+
+class DomainDedup:
+    """
+    Группировка строк DataFrame по canonical domain (dedup_key)
+    """
+
+    def __init__(self, df: pd.DataFrame, website_column: str = 'website'):
+        """
+        Args:
+            df: Входные лиды
+            website_column: Колонка с website
+        """
+        self.website_column = website_column
+        self.total_rows = len(df)
+
+        if len(df) == 0 or website_column not in df.columns:
+            self.unique_df = df
+            self._members = {}
+            return
+
+        domains = df[website_column].map(dedup_key)
+        has_domain = domains.notna()
+
+        # Representative - самый короткий website домена (idxmin берёт первую строку при равенстве)
+        lengths = df.loc[has_domain, website_column].str.len()
+        representatives = lengths.groupby(domains[has_domain], sort=False).idxmin()
+
+        keep = ~has_domain
+        keep.loc[representatives.values] = True
+        self.unique_df = df[keep]
+
+        # domain -> исходные строки (только домены с дублями)
+        self._members: Dict[str, List[Dict]] = {}
+        grouped = df[has_domain].groupby(domains[has_domain], sort=False)
+        for domain, group in grouped:
+            if len(group) > 1:
+                self._members[domain] = group.to_dict('records')
+
+    @property
+    def duplicate_rows(self) -> int:
+        return self.total_rows - len(self.unique_df)
+
+    def fan_out(self, result_rows: List[Dict]) -> List[Dict]:
+        """
+        Строки результата representative -> строки результата всех строк домена
+        """
+        if not self._members:
+            return result_rows
+
+        fanned = []
+        for row in result_rows:
+            members = self._members.get(dedup_key(row.get(self.website_column)))
+            if not members:
+                fanned.append(row)
+                continue
+            for member in members:
+                member_row = dict(row)
+                member_row.update({key: value for key, value in member.items() if key not in SCRAPER_COLUMNS})
+                fanned.append(member_row)
+        return fanned
+
+    def get_stats(self) -> Dict:
+        return {
+            'input_rows': self.total_rows,
+            'scraped_rows': len(self.unique_df),
+            'duplicate_rows': self.duplicate_rows,
+            'shared_domains': len(self._members),
+        }
@@ -7,38 +7,138 @@ HTTP Utilities для web scraping
 """
 
 import time
-import random
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Dict, Optional
 from urllib.parse import urljoin
 
+try:
+    from .rate_limiter import DomainRateLimiter
+    from .parsed_page import ParsedPage
+    from .response_body import DEFAULT_MAX_BODY_BYTES, TRUNCATED_HEADER, is_html_content_type, read_body
+except ImportError:
+    from rate_limiter import DomainRateLimiter
+    from parsed_page import ParsedPage
+    from response_body import DEFAULT_MAX_BODY_BYTES, TRUNCATED_HEADER, is_html_content_type, read_body
+
 
 class HTTPClient:
     """
     HTTP клиент для scraping с автоматическими retry и rate limiting
 
+    Rate limiting - per-domain token bucket (DomainRateLimiter): задержка только
+    при повторном запросе к тому же хосту, первый запрос к домену уходит сразу.
+
     Использование:
         client = HTTPClient(timeout=15, retries=3)
         result = client.fetch('https://example.com')
 
         if result['status'] == 'success':
             html = result['content']
+
+    С persistent кэшем ответов (повторные прогоны читают с диска, не из сети):
+        client = HTTPClient(cache=ResponseCache('data/cache/http_responses.sqlite'))
+
+    Pooled режим (для ThreadPoolExecutor с десятками/сотнями workers):
+        client = HTTPClient(timeout=15, retries=3, pooled=True, pool_size=200)
+
+        Один общий requests.Session на все потоки - keep-alive соединения
+        переиспользуются между homepage, deep search страницами и retry,
+        вместо нового TCP+TLS handshake на каждый URL.
+
+    Body читается потоково (stream=True): не-HTML Content-Type отбрасывается по
+    headers, HTML - не больше max_body_bytes (по умолчанию 2 MB).
     """
 
-    def __init__(self, timeout: int = 15, retries: int = 3, delay_min: float = 0.5, delay_max: float = 1.5):
+    def __init__(self, timeout: int = 15, retries: int = 3, delay_min: float = 0.5, delay_max: float = 1.5,
+                 pooled: bool = False, pool_size: int = 10, rate_limiter=None, cache=None,
+                 max_body_bytes: int = DEFAULT_MAX_BODY_BYTES):
         """
         Args:
             timeout: Таймаут для HTTP запроса (секунды)
             retries: Количество повторных попыток при ошибке
-            delay_min: Минимальная задержка между запросами (секунды)
-            delay_max: Максимальная задержка между запросами (секунды)
+            delay_min: Минимальный интервал между запросами к одному домену (секунды)
+            delay_max: Максимальный интервал между запросами к одному домену (секунды)
+                       Если rate_limiter не передан - per-domain rate = 1 / среднее(delay_min, delay_max)
+            pooled: Использовать общий requests.Session с connection pooling (thread-safe)
+            pool_size: Размер connection pool - число хостов и соединений на хост
+                       (обычно = количеству workers)
+            rate_limiter: Любой объект с методом acquire(url) (по умолчанию DomainRateLimiter)
+                          Передайте общий экземпляр, чтобы делить лимиты между клиентами/workers
+            cache: ResponseCache (или любой объект с get(url) / set(url, content, ...)) -
+                   ответ из кэша возвращается без запроса и без rate limiting
+            max_body_bytes: Лимит body страницы - остаток не скачивается (result['truncated'] = True)
         """
         self.timeout = timeout
         self.retries = retries
         self.delay_min = delay_min
         self.delay_max = delay_max
+
+        if rate_limiter is None:
+            avg_delay = (delay_min + delay_max) / 2
+            rate_limiter = DomainRateLimiter(per_domain_rate=1 / avg_delay if avg_delay > 0 else None)
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.max_body_bytes = max_body_bytes
         self.user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 
+        self.pooled = pooled
+        self.pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    def _get_session(self) -> requests.Session:
+        """
+        Lazy создание общего Session (double-checked locking - безопасно из нескольких потоков)
+        """
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    # pool_connections - сколько хостов держим в кэше пулов,
+                    # pool_maxsize - сколько keep-alive соединений на один хост
+                    adapter = HTTPAdapter(
+                        pool_connections=self.pool_size,
+                        pool_maxsize=self.pool_size
+                    )
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    session.headers['User-Agent'] = self.user_agent
+                    self._session = session
+        return self._session
+
+    def _get(self, url: str) -> requests.Response:
+        """GET через общий Session (pooled) или одиночный requests.get (stream - body читается отдельно)"""
+        if self.pooled:
+            return self._get_session().get(
+                url,
+                timeout=self.timeout,
+                allow_redirects=True,
+                stream=True
+            )
+
+        return requests.get(
+            url,
+            headers={'User-Agent': self.user_agent},
+            timeout=self.timeout,
+            allow_redirects=True,
+            stream=True
+        )
+
+    def close(self):
+        """Закрыть общий Session и все pooled соединения"""
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
     def fetch(self, url: str, check_content_length: bool = True) -> Dict:
         """
         Fetch URL с автоматическим retry и валидацией
@@ -51,63 +151,66 @@ class HTTPClient:
             {
                 'status': 'success' | 'timeout' | 'connection_error' | 'http_error' | 'dynamic',
                 'content': HTML content (если success),
+                'page': ParsedPage (если success и check_content_length - дерево уже распарсено),
                 'url': Final URL после редиректов,
-                'error': Описание ошибки (если failed)
+                'error': Описание ошибки (если failed),
+                'cached': True если ответ взят из кэша,
+                'truncated': True если body обрезан до max_body_bytes
             }
         """
         # Normalize URL
         if not url.startswith(('http://', 'https://')):
             url = 'https://' + url
 
-        # Rate limiting - случайная задержка между запросами
-        time.sleep(random.uniform(self.delay_min, self.delay_max))
+        # Persistent кэш - сеть и rate limiter не нужны
+        if self.cache is not None:
+            cached = self.cache.get(url)
+            if cached:
+                result = self._success_result(cached['content'], cached['url'], check_content_length)
+                result['cached'] = True
+                if cached['headers'].get(TRUNCATED_HEADER):
+                    result['truncated'] = True
+                return result
+
+        # Rate limiting - ждём только если этот домен уже запрашивали недавно
+        self.rate_limiter.acquire(url)
 
         for attempt in range(self.retries):
             try:
-                response = requests.get(
-                    url,
-                    headers={'User-Agent': self.user_agent},
-                    timeout=self.timeout,
-                    allow_redirects=True
-                )
+                response = self._get(url)
 
                 # Проверка статус кода
                 if response.status_code != 200:
+                    response.close()  # Освободить соединение в pool (body не читаем)
                     return {
                         'status': f'http_error_{response.status_code}',
                         'error': f'HTTP {response.status_code}',
                         'url': url
                     }
 
-                # Проверка что это HTML
+                # Проверка что это HTML - по headers, до скачивания body
                 content_type = response.headers.get('Content-Type', '')
-                if 'text/html' not in content_type:
+                if not is_html_content_type(content_type):
+                    response.close()
                     return {
                         'status': 'not_html',
                         'error': f'Content-Type: {content_type}',
                         'url': url
                     }
 
-                # Проверка на динамический сайт (если нужно)
-                if check_content_length:
-                    from bs4 import BeautifulSoup
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    text_content = soup.get_text().strip()
-
-                    # Если контента мало - вероятно динамический сайт (React/Vue/etc)
-                    if len(text_content) < 200:
-                        return {
-                            'status': 'dynamic',
-                            'error': 'Low content (likely JS-rendered)',
-                            'url': response.url
-                        }
+                content, truncated = read_body(response, max_bytes=self.max_body_bytes)
+                if self.cache is not None:
+                    headers = {'Content-Type': content_type}
+                    if truncated:
+                        headers[TRUNCATED_HEADER] = '1'
+                    self.cache.set(url, content, final_url=response.url, status=response.status_code,
+                                   headers=headers)
 
                 # Успех!
-                return {
-                    'status': 'success',
-                    'content': response.text,
-                    'url': response.url
-                }
+                result = self._success_result(content, response.url, check_content_length)
+                if truncated:
+                    result['truncated'] = True
+                return result
 
             except requests.Timeout:
                 if attempt < self.retries - 1:
@@ -143,10 +246,38 @@ class HTTPClient:
             'url': url
         }
 
+    def _success_result(self, content: str, final_url: str, check_content_length: bool) -> Dict:
+        """Результат для полученного HTML (+ проверка на динамический сайт если нужно)"""
+        result = {
+            'status': 'success',
+            'content': content,
+            'url': final_url
+        }
+
+        # Проверка на динамический сайт (если нужно)
+        if check_content_length:
+            # Парсим один раз - дерево отдаём дальше consumers (emails, text, links)
+            page = ParsedPage(content, url=final_url)
+            text_content = page.text().strip()
+
+            # Если контента мало - вероятно динамический сайт (React/Vue/etc)
+            if len(text_content) < 200:
+                return {
+                    'status': 'dynamic',
+                    'error': 'Low content (likely JS-rendered)',
+                    'url': final_url
+                }
+
+            result['page'] = page
+
+        return result
+
     def fetch_multiple_pages(self, base_url: str, paths: list) -> Dict:
         """
         Fetch несколько страниц на одном домене (для smart scraping)
 
+        В pooled режиме все страницы идут через keep-alive соединение к этому хосту.
+
         Args:
             base_url: Базовый URL (например, https://example.com)
             paths: Список путей для проверки (например, ['/about', '/contact'])
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Lead Priority - порядок scraping по ожидаемой пользе лида
+
+Раньше лиды шли в порядке файла: прерванный или ограниченный по времени прогон
+успевал обработать случайную часть списка. Scorer даёт каждому лиду score,
+batch сортируется по убыванию (stable - при равном score порядок файла), и
+ценные лиды обрабатываются первыми.
+
+Score (чем больше, тем раньше):
+- колонка priority во входном файле - если есть, берётся как есть
+- rating (0-5) и число reviews (log scale, насыщение на REVIEWS_SATURATION)
+- platform: website на соцсети / link-in-bio / каталоге (facebook, instagram,
+  linktr.ee, yelp, ...) - email почти никогда не находится, штраф
+- история: доля лидов с email по TLD в прошлых результатах (from_results,
+  сглаживание к среднему, чтобы редкие TLD не прыгали в 0 / 1)
+
+Использование:
+    priority = LeadPriority()                                  # rating / reviews / platform
+    priority = LeadPriority.from_results('previous_run.csv')   # + успех по TLD
+    df = priority.sort(df)
+"""
+
+import math
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import pandas as pd
+
+try:
+    from .domain_dedup import PLATFORM_HOSTS, canonical_domain
+except ImportError:
+    from domain_dedup import PLATFORM_HOSTS, canonical_domain
+
+# Колонки с числом отзывов (Google Maps exports / Places API)
+REVIEW_COLUMNS = ('reviews', 'user_ratings_total', 'reviews_count', 'review_count')
+
+# Отзывов, после которых score за reviews больше не растёт
+REVIEWS_SATURATION = 1000
+
+# Платформы, где бывает настоящий (хоть и простой) сайт бизнеса - половинный штраф
+HALF_PENALTY_PLATFORMS = ('business.site', 'sites.google.com')
+
+# Хосты, где homepage email почти никогда не находится (domain -> поправка к score)
+DEFAULT_PLATFORM_WEIGHTS = {
+    platform: -0.5 if platform in HALF_PENALTY_PLATFORMS else -1.0 for platform in PLATFORM_HOSTS
+}
+
+# Сглаживание TLD success rate: столько "виртуальных" лидов со средним rate
+TLD_PRIOR_WEIGHT = 20
+
+
+def tld_of(website) -> Optional[str]:
+    """TLD website (com, de, co.uk -> uk), None если домен не определить"""
+    domain = canonical_domain(website)
+    if not domain or '.' not in domain:
+        return None
+    return domain.rsplit('.', 1)[1]
+
+
+class LeadPriority:
+    """
+    Scorer лидов: score_frame(df) -> Series, sort(df) -> df по убыванию score
+    """
+
+    def __init__(self, rating_weight: float = 1.0, reviews_weight: float = 1.0, tld_weight: float = 1.0,
+                 platform_weights: Optional[Dict[str, float]] = None,
+                 tld_success: Optional[Dict[str, float]] = None, priority_column: str = 'priority',
+                 website_column: str = 'website'):
+        """
+        Args:
+            rating_weight / reviews_weight / tld_weight: Веса компонентов score
+            platform_weights: domain -> поправка (по умолчанию DEFAULT_PLATFORM_WEIGHTS)
+            tld_success: TLD -> доля лидов с email (см. from_results)
+            priority_column: Колонка с готовым score (если есть во входе - используется вместо расчёта)
+            website_column: Колонка с website
+        """
+        self.rating_weight = rating_weight
+        self.reviews_weight = reviews_weight
+        self.tld_weight = tld_weight
+        self.platform_weights = DEFAULT_PLATFORM_WEIGHTS if platform_weights is None else platform_weights
+        self.tld_success = tld_success or {}
+        self.priority_column = priority_column
+        self.website_column = website_column
+
+        # TLD без истории - средний rate
+        self._default_tld_rate = (sum(self.tld_success.values()) / len(self.tld_success)) if self.tld_success else 0.0
+
+    @classmethod
+    def from_results(cls, results: Union[str, Path, pd.DataFrame], **kwargs) -> 'LeadPriority':
+        """
+        Scorer с историей TLD из результатов прошлого прогона (CSV / DataFrame scraper output)
+        """
+        df = pd.read_csv(results, usecols=lambda column: column in ('website', 'email')) \
+            if not isinstance(results, pd.DataFrame) else results
+        if 'website' not in df.columns or 'email' not in df.columns:
+            return cls(**kwargs)
+
+        # Один лид может занимать несколько строк (email_format=separate)
+        found = df['email'].fillna('').astype(str).str.contains('@')
+        leads = found.groupby(df['website']).any()
+        tlds = leads.index.map(tld_of)
+        by_tld = leads.groupby(tlds).agg(['sum', 'count'])
+
+        overall = leads.mean() if len(leads) else 0.0
+        tld_success = {
+            tld: float((row['sum'] + overall * TLD_PRIOR_WEIGHT) / (row['count'] + TLD_PRIOR_WEIGHT))
+            for tld, row in by_tld.iterrows()
+        }
+        return cls(tld_success=tld_success, **kwargs)
+
+    def score_frame(self, df: pd.DataFrame) -> pd.Series:
+        """Score каждой строки (index как у df)"""
+        if self.priority_column in df.columns:
+            return pd.to_numeric(df[self.priority_column], errors='coerce').fillna(0.0)
+
+        score = pd.Series(0.0, index=df.index)
+
+        if 'rating' in df.columns:
+            rating = pd.to_numeric(df['rating'], errors='coerce').clip(0, 5) / 5
+            score += self.rating_weight * rating.fillna(0.5)
+
+        review_column = next((column for column in REVIEW_COLUMNS if column in df.columns), None)
+        if review_column:
+            reviews = pd.to_numeric(df[review_column], errors='coerce').fillna(0).clip(lower=0)
+            score += self.reviews_weight * (reviews.map(math.log1p) / math.log1p(REVIEWS_SATURATION)).clip(upper=1)
+
+        if self.website_column in df.columns:
+            websites = df[self.website_column]
+            if self.platform_weights:
+                score += websites.map(self._platform_weight)
+            if self.tld_success:
+                score += self.tld_weight * websites.map(
+                    lambda website: self.tld_success.get(tld_of(website), self._default_tld_rate))
+
+        return score
+
+    def sort(self, df: pd.DataFrame) -> pd.DataFrame:
+        """df по убыванию score (stable)"""
+        if len(df) < 2:
+            return df
+        # Позиции, а не labels - index входа может быть не уникальным
+        positions = self.score_frame(df).reset_index(drop=True).sort_values(ascending=False, kind='mergesort').index
+        return df.iloc[positions]
+
+    def _platform_weight(self, website) -> float:
+        domain = canonical_domain(website)
+        if not domain:
+            return 0.0
+        for platform, weight in self.platform_weights.items():
+            if domain == platform or domain.endswith('.' + platform):
+                return weight
+        return 0.0
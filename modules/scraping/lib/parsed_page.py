@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Parsed Page - HTML парсится ОДИН раз, все consumers работают с одним деревом
+
+Раньше одна homepage парсилась BeautifulSoup до 4 раз (HTTPClient dynamic check,
+extract_emails_from_html, clean_html_to_text, _extract_all_links). ParsedPage
+держит одно дерево и кэширует производные (text, clean text, links).
+
+Backend (в порядке приоритета):
+1. selectolax (lexbor, C-based) - самый быстрый
+2. BeautifulSoup + lxml
+3. BeautifulSoup + html.parser (всегда доступен)
+
+Использование:
+    page = ParsedPage(html, url='https://example.com')
+    emails = extract_emails_from_html(page)
+    text = clean_html_to_text(page, max_length=50000)
+    links = page.links()
+
+Дерево не модифицируется consumers - clean_text() не делает decompose(),
+поэтому порядок вызовов не важен.
+"""
+
+from typing import List, Optional, Union
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as _SelectolaxParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser as _SelectolaxParser
+        SELECTOLAX_AVAILABLE = True
+    except ImportError:
+        _SelectolaxParser = None
+        SELECTOLAX_AVAILABLE = False
+
+try:
+    import lxml  # noqa: F401
+    BS4_PARSER = 'lxml'
+except ImportError:
+    BS4_PARSER = 'html.parser'
+
+PARSER_BACKEND = 'selectolax' if SELECTOLAX_AVAILABLE else BS4_PARSER
+
+# Теги без полезного текста (не попадают в text())
+NON_TEXT_TAGS = ['script', 'style', 'noscript', 'template']
+
+# Дополнительно убираются из clean_text() (навигация, футер и т.д.)
+BOILERPLATE_TAGS = ['nav', 'footer', 'header', 'aside', 'iframe']
+
+
+class ParsedPage:
+    """
+    Один раз распарсенный HTML документ
+
+    Все методы lazy + кэшируются: если consumer не нужен (например, save_content=False),
+    соответствующий текст не вычисляется.
+    """
+
+    def __init__(self, html: str, url: str = '', backend: Optional[str] = None):
+        """
+        Args:
+            html: Сырой HTML
+            url: URL страницы (для логов / resolve относительных ссылок)
+            backend: 'selectolax' | 'lxml' | 'html.parser' (None = лучший доступный)
+        """
+        self.html = html or ''
+        self.url = url
+        self.backend = backend or PARSER_BACKEND
+
+        self._tree = None
+        self._html_lower = None
+        self._text = None
+        self._clean_text = None
+        self._links = None
+
+    @classmethod
+    def of(cls, html_or_page: Union[str, 'ParsedPage']) -> 'ParsedPage':
+        """Принять HTML строку или уже готовый ParsedPage (без повторного парсинга)"""
+        if isinstance(html_or_page, ParsedPage):
+            return html_or_page
+        return cls(html_or_page)
+
+    @property
+    def tree(self):
+        """Дерево документа (selectolax parser или BeautifulSoup)"""
+        if self._tree is None:
+            if self.backend == 'selectolax':
+                self._tree = _SelectolaxParser(self.html)
+            else:
+                from bs4 import BeautifulSoup
+                self._tree = BeautifulSoup(self.html, self.backend)
+        return self._tree
+
+    @property
+    def html_lower(self) -> str:
+        """HTML в lowercase (для строковых проверок - site type и т.д.)"""
+        if self._html_lower is None:
+            self._html_lower = self.html.lower()
+        return self._html_lower
+
+    def text(self) -> str:
+        """
+        Весь видимый текст страницы (без script/style), разделитель - пробел
+        """
+        if self._text is None:
+            self._compute_texts()
+        return self._text
+
+    def clean_text(self, max_length: int = None) -> str:
+        """
+        Чистый текст без скриптов, навигации, футера и т.д. (нормализованные пробелы)
+
+        Args:
+            max_length: Обрезка по длине
+        """
+        if self._clean_text is None:
+            self._compute_texts()
+
+        if max_length and len(self._clean_text) > max_length:
+            return self._clean_text[:max_length]
+        return self._clean_text
+
+    def _compute_texts(self):
+        """Вычислить text() и clean_text() за один проход (без изменения основного дерева)"""
+        if self.backend == 'selectolax':
+            # Работаем на копии, чтобы основное дерево (mailto, links, count) осталось целым
+            tree = self.tree.clone()
+            tree.strip_tags(NON_TEXT_TAGS)
+            root = tree.root
+            self._text = root.text(separator=' ') if root else ''
+
+            tree.strip_tags(BOILERPLATE_TAGS)
+            root = tree.root
+            clean = root.text(separator=' ', strip=True) if root else ''
+        else:
+            from bs4 import NavigableString, CData
+
+            skip = set(NON_TEXT_TAGS)
+            skip_clean = skip | set(BOILERPLATE_TAGS)
+            text_parts = []
+            clean_parts = []
+
+            for string in self.tree.find_all(string=True):
+                if type(string) not in (NavigableString, CData):
+                    continue  # Comment, Doctype, Script, Stylesheet и т.д.
+
+                parent_names = {parent.name for parent in string.parents}
+                if parent_names & skip:
+                    continue
+                text_parts.append(str(string))
+
+                if not parent_names & skip_clean:
+                    stripped = string.strip()
+                    if stripped:
+                        clean_parts.append(stripped)
+
+            self._text = ' '.join(text_parts)
+            clean = ' '.join(clean_parts)
+
+        self._clean_text = ' '.join(clean.split())
+
+    def tag_texts(self, tags: List[str]) -> List[str]:
+        """
+        Текст каждого тега из списка (каждый тег отдельно - против склейки соседних текстов)
+        """
+        if self.backend == 'selectolax':
+            return [node.text() for node in self.tree.css(', '.join(tags))]
+        return [tag.get_text() for tag in self.tree.find_all(tags)]
+
+    def mailto_hrefs(self) -> List[str]:
+        """href всех mailto: ссылок (case-insensitive)"""
+        return [href for href in self._hrefs() if href.lower().startswith('mailto:')]
+
+    def links(self) -> List[str]:
+        """
+        Все ссылки страницы без якорей, javascript: и mailto: (дедупликация)
+        """
+        if self._links is None:
+            self._links = list(set(
+                href for href in self._hrefs()
+                if href and not href.startswith(('#', 'javascript:', 'mailto:'))
+            ))
+        return self._links
+
+    def _hrefs(self) -> List[str]:
+        if self.backend == 'selectolax':
+            return [node.attributes.get('href') or '' for node in self.tree.css('a[href]')]
+        return [a_tag.get('href', '') for a_tag in self.tree.find_all('a', href=True)]
+
+    def count(self, selector: str) -> int:
+        """Количество элементов по CSS селектору (например 'script', 'div#root')"""
+        if self.backend == 'selectolax':
+            return len(self.tree.css(selector))
+        return len(self.tree.select(selector))
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter для web scraping
+Token bucket на каждый домен + общий (global) лимит запросов
+
+Заменяет безусловный time.sleep(random.uniform(...)) перед каждым запросом:
+задержка появляется только когда тот же хост запрашивается слишком часто.
+Первый запрос к новому домену уходит сразу.
+
+Использование:
+    limiter = DomainRateLimiter(per_domain_rate=1.0, global_rate=50)
+    client = HTTPClient(rate_limiter=limiter)
+
+    # Ограничение параллельных запросов к одному домену
+    with limiter.get_semaphore(url):
+        client.fetch(url)
+
+Pluggable: HTTPClient принимает любой объект с методом acquire(url) -> float
+"""
+
+import time
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """
+    Классический token bucket (thread-safe)
+
+    rate - сколько токенов добавляется в секунду
+    capacity - максимум накопленных токенов (burst)
+
+    Bucket стартует полным, поэтому первые capacity запросов проходят без ожидания.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Зарезервировать один токен
+
+        Returns:
+            Сколько секунд нужно подождать до использования токена (0 - можно сразу).
+            Токен уже списан, поэтому параллельные потоки получают разные слоты.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class DomainRateLimiter:
+    """
+    Per-domain token bucket + global cap + лимит параллельных запросов на домен
+
+    Thread-safe, один экземпляр делится между HTTPClient и scraper workers.
+    """
+
+    def __init__(self, per_domain_rate: Optional[float] = 1.0, per_domain_burst: float = 1.0,
+                 global_rate: Optional[float] = None, global_burst: Optional[float] = None,
+                 max_concurrent_per_domain: int = 3):
+        """
+        Args:
+            per_domain_rate: Запросов в секунду к одному домену (None = без ограничения)
+            per_domain_burst: Сколько запросов к домену можно сделать подряд без ожидания
+            global_rate: Общий лимит запросов в секунду на все домены (None = без ограничения)
+            global_burst: Burst для общего лимита (по умолчанию = global_rate)
+            max_concurrent_per_domain: Максимум одновременных запросов к одному домену
+        """
+        self.per_domain_rate = per_domain_rate
+        self.per_domain_burst = per_domain_burst
+        self.max_concurrent_per_domain = max_concurrent_per_domain
+
+        self._global_bucket = None
+        if global_rate:
+            self._global_bucket = TokenBucket(global_rate, global_burst or global_rate)
+
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+        # Статистика
+        self.total_wait = 0.0
+        self.delayed_requests = 0
+
+    @staticmethod
+    def domain_of(url: str) -> str:
+        """Домен (netloc) из URL, www. не различается"""
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+        domain = urlparse(url).netloc.lower() or url
+        if domain.startswith('www.'):
+            domain = domain[4:]
+        return domain
+
+    def _get_bucket(self, domain: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(domain)
+            if bucket is None:
+                bucket = TokenBucket(self.per_domain_rate, self.per_domain_burst)
+                self._buckets[domain] = bucket
+            return bucket
+
+    def get_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        """
+        Semaphore домена (max_concurrent_per_domain параллельных запросов)
+        """
+        domain = self.domain_of(url)
+        with self._lock:
+            semaphore = self._semaphores.get(domain)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.max_concurrent_per_domain)
+                self._semaphores[domain] = semaphore
+            return semaphore
+
+    def acquire(self, url: str) -> float:
+        """
+        Дождаться разрешения на запрос к URL (блокирует поток только если нужно)
+
+        Returns:
+            Сколько секунд поток ждал
+        """
+        waited = 0.0
+
+        if self.per_domain_rate:
+            wait = self._get_bucket(self.domain_of(url)).reserve()
+            if wait > 0:
+                time.sleep(wait)
+                waited += wait
+
+        if self._global_bucket:
+            wait = self._global_bucket.reserve()
+            if wait > 0:
+                time.sleep(wait)
+                waited += wait
+
+        if waited > 0:
+            with self._lock:
+                self.total_wait += waited
+                self.delayed_requests += 1
+
+        return waited
+
+    def get_stats(self) -> Dict:
+        """Статистика ожиданий"""
+        with self._lock:
+            return {
+                'domains': len(self._buckets),
+                'delayed_requests': self.delayed_requests,
+                'total_wait_seconds': round(self.total_wait, 2)
+            }
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Response Body - потоковое чтение HTML ответов с лимитом размера
+
+Раньше fetch paths читали response.text целиком: "homepage", который на деле
+40 MB PDF или бесконечный stream, попадал в память worker полностью, а
+Content-Type проверялся уже после скачивания. Здесь:
+1. Content-Type проверяется по headers - не HTML -> соединение закрывается, body не читается
+2. Body читается chunks до max_bytes (по умолчанию 2 MB), остальное отбрасывается
+3. Декодирование инкрементальное (codecs incremental decoder), charset - из header,
+   BOM или <meta charset> в первых CHARSET_SNIFF_BYTES (без chardet по всему body)
+
+При 500 одновременных fetch память на worker ограничена max_bytes.
+
+Использование (requests, stream=True):
+    response = session.get(url, stream=True)
+    if not is_html_content_type(response.headers.get('Content-Type')):
+        response.close()
+    text, truncated = read_body(response, max_bytes=DEFAULT_MAX_BODY_BYTES)
+
+Использование (aiohttp):
+    async with session.get(url) as response:
+        text, truncated = await read_body_async(response, max_bytes=DEFAULT_MAX_BODY_BYTES)
+"""
+
+import re
+import codecs
+from typing import Optional, Tuple
+
+# Лимит body одной страницы
+DEFAULT_MAX_BODY_BYTES = 2 * 1024 * 1024
+
+# Сколько первых байт смотрим в поисках <meta charset>
+CHARSET_SNIFF_BYTES = 8192
+
+CHUNK_SIZE = 64 * 1024
+
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+# Header в cached headers (ResponseCache): body обрезан до max_bytes - cache hit отдаёт truncated=True
+TRUNCATED_HEADER = 'X-Body-Truncated'
+
+_HEADER_CHARSET_RE = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+def is_html_content_type(content_type: Optional[str]) -> bool:
+    """
+    HTML по Content-Type header (text/html или application/xhtml+xml)
+
+    Как и раньше (проверка 'text/html' in content_type), ответ без Content-Type
+    HTML не считается.
+    """
+    if not content_type:
+        return False
+    media_type = content_type.split(';', 1)[0].strip().lower()
+    return media_type in HTML_CONTENT_TYPES
+
+
+def _valid_codec(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def detect_charset(content_type: Optional[str], head: bytes) -> str:
+    """
+    Charset страницы: header -> BOM -> <meta charset> в первых CHARSET_SNIFF_BYTES -> utf-8
+
+    Args:
+        content_type: Значение Content-Type header
+        head: Первые байты body
+    """
+    match = _HEADER_CHARSET_RE.search(content_type or '')
+    charset = _valid_codec(match.group(1)) if match else None
+    if charset:
+        return charset
+
+    for bom, name in _BOMS:
+        if head.startswith(bom):
+            return name
+
+    match = _META_CHARSET_RE.search(head[:CHARSET_SNIFF_BYTES])
+    charset = _valid_codec(match.group(1).decode('ascii', 'ignore')) if match else None
+    return charset or 'utf-8'
+
+
+class CappedBodyDecoder:
+    """
+    Инкрементальный decoder с лимитом байт
+
+    feed(chunk) -> False когда лимит достигнут (дальше читать не нужно)
+    """
+
+    def __init__(self, content_type: Optional[str], max_bytes: int = DEFAULT_MAX_BODY_BYTES):
+        self.content_type = content_type
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.truncated = False
+
+        self._head = b''
+        self._decoder = None
+        self._parts = []
+
+    def feed(self, chunk: bytes) -> bool:
+        if not chunk:
+            return True
+
+        remaining = self.max_bytes - self.size
+        if len(chunk) > remaining:
+            chunk = chunk[:remaining]
+            self.truncated = True
+        self.size += len(chunk)
+
+        if self._decoder is None:
+            # Ждём CHARSET_SNIFF_BYTES (или конец body) чтобы увидеть <meta charset>
+            self._head += chunk
+            if len(self._head) >= CHARSET_SNIFF_BYTES or self.truncated:
+                self._start_decoding()
+        else:
+            self._parts.append(self._decoder.decode(chunk))
+
+        return not self.truncated
+
+    def _start_decoding(self):
+        charset = detect_charset(self.content_type, self._head)
+        self._decoder = codecs.getincrementaldecoder(charset)(errors='replace')
+        self._parts.append(self._decoder.decode(self._head))
+        self._head = b''
+
+    def text(self) -> str:
+        if self._decoder is None:
+            self._start_decoding()
+        self._parts.append(self._decoder.decode(b'', final=True))
+        text = ''.join(self._parts)
+        self._parts = [text]
+        return text
+
+
+def read_body(response, max_bytes: int = DEFAULT_MAX_BODY_BYTES, chunk_size: int = CHUNK_SIZE) -> Tuple[str, bool]:
+    """
+    Прочитать body requests.Response (запрос с stream=True) не больше max_bytes
+
+    Returns:
+        (text, truncated) - если truncated, соединение закрыто (остаток body не читается)
+    """
+    decoder = CappedBodyDecoder(response.headers.get('Content-Type'), max_bytes)
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if not decoder.feed(chunk):
+                break
+    finally:
+        response.close()
+    return decoder.text(), decoder.truncated
+
+
+async def read_body_async(response, max_bytes: int = DEFAULT_MAX_BODY_BYTES,
+                          chunk_size: int = CHUNK_SIZE) -> Tuple[str, bool]:
+    """
+    Прочитать body aiohttp.ClientResponse не больше max_bytes
+
+    Returns:
+        (text, truncated) - если truncated, соединение закрывается (не возвращается в pool)
+    """
+    text, truncated = await read_chunks_async(response.content.iter_chunked(chunk_size),
+                                              response.headers.get('Content-Type'), max_bytes)
+    if truncated:
+        response.close()
+    return text, truncated
+
+
+async def read_chunks_async(chunks, content_type: Optional[str],
+                            max_bytes: int = DEFAULT_MAX_BODY_BYTES) -> Tuple[str, bool]:
+    """
+    Любой async iterator байтовых chunks (httpx response.aiter_bytes() и т.п.) не больше max_bytes
+
+    Returns:
+        (text, truncated) - при truncated закрыть response должен вызывающий
+    """
+    decoder = CappedBodyDecoder(content_type, max_bytes)
+    async for chunk in chunks:
+        if not decoder.feed(chunk):
+            break
+    return decoder.text(), decoder.truncated
+
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Response Cache - персистентный on-disk кэш HTTP ответов (SQLite)
+
+Одни и те же домены скрапятся снова и снова (reruns homepage scraper, rescrape
+скрипты, новые кампании). С кэшем повторный прогон extraction логики по 50k сайтов
+не ходит в сеть - ответы читаются с диска.
+
+Хранение:
+- responses: нормализованный URL -> final URL, status, headers, fetched_at, body_hash
+- bodies: sha256(body) -> zlib-сжатый body (content-addressed: одинаковые страницы,
+  например www / без www, хранятся один раз)
+
+Политики:
+- TTL: записи старше ttl_seconds не отдаются (и удаляются при eviction)
+- Size: если суммарный размер сжатых bodies > max_size_mb - удаляются самые старые записи
+
+Кэшируются только успешные HTML ответы (status 200).
+
+Использование:
+    cache = ResponseCache('data/cache/responses.sqlite', ttl_seconds=7 * 86400)
+    client = HTTPClient(pooled=True, cache=cache)
+    stage = AsyncFetchStage(cache=cache)
+
+    hit = cache.get('https://example.com')
+    if hit:
+        html = hit['content']
+"""
+
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Union
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent.parent.parent / 'data' / 'cache' / 'http_responses.sqlite'
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_SIZE_MB = 2048
+
+# Eviction проверяется не на каждой записи, а раз в N записей
+EVICT_EVERY = 500
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Ключ кэша: lowercase scheme/host, без default port, fragment и trailing slash,
+    query параметры отсортированы
+
+    'HTTPS://Example.com:443/About/?b=2&a=1#team' -> 'https://example.com/About?a=1&b=2'
+    """
+    url = url.strip()
+    if not url.lower().startswith(('http://', 'https://')):
+        url = 'https://' + url
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{parts.port}'
+
+    path = parts.path.rstrip('/')
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+
+    return urlunsplit((scheme, host, path, query, ''))
+
+
+class ResponseCache:
+    """
+    Thread-safe SQLite кэш ответов (один экземпляр на все потоки / event loop)
+    """
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_CACHE_PATH, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_size_mb: float = DEFAULT_MAX_SIZE_MB, compress_level: int = 6):
+        """
+        Args:
+            path: SQLite файл (создаётся вместе с директорией)
+            ttl_seconds: Время жизни записи (None = бессрочно)
+            max_size_mb: Максимальный суммарный размер сжатых bodies
+            compress_level: zlib level (1 - быстрее, 9 - меньше)
+        """
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024) if max_size_mb else None
+        self.compress_level = compress_level
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS bodies (
+                hash TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS responses (
+                url_key TEXT PRIMARY KEY,
+                final_url TEXT,
+                status INTEGER,
+                headers TEXT,
+                body_hash TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_responses_fetched_at ON responses(fetched_at);
+            CREATE INDEX IF NOT EXISTS idx_responses_body_hash ON responses(body_hash);
+        ''')
+
+        # Статистика
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+        self.evict()
+
+    def get(self, url: str) -> Optional[Dict]:
+        """
+        Returns:
+            {'url': final URL, 'content': str, 'status': int, 'headers': dict,
+             'fetched_at': float} или None (нет / истёк TTL)
+        """
+        key = normalize_url(url)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT r.final_url, r.status, r.headers, r.fetched_at, b.body '
+                'FROM responses r JOIN bodies b ON b.hash = r.body_hash WHERE r.url_key = ?',
+                (key,)
+            ).fetchone()
+
+            if row is None or self._expired(row[3]):
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        final_url, status, headers, fetched_at, body = row
+        return {
+            'url': final_url,
+            'content': zlib.decompress(body).decode('utf-8', errors='replace'),
+            'status': status,
+            'headers': json.loads(headers) if headers else {},
+            'fetched_at': fetched_at
+        }
+
+    def set(self, url: str, content: str, final_url: Optional[str] = None, status: int = 200,
+            headers: Optional[Dict] = None):
+        """Сохранить ответ (перезаписывает прежний для этого URL)"""
+        if content is None:
+            return
+
+        raw = content.encode('utf-8', errors='replace')
+        body_hash = hashlib.sha256(raw).hexdigest()
+        key = normalize_url(url)
+        headers_json = json.dumps(dict(headers)) if headers else None
+
+        with self._lock:
+            exists = self._conn.execute('SELECT 1 FROM bodies WHERE hash = ?', (body_hash,)).fetchone()
+            if not exists:
+                body = zlib.compress(raw, self.compress_level)
+                self._conn.execute('INSERT OR IGNORE INTO bodies (hash, body, size) VALUES (?, ?, ?)',
+                                   (body_hash, body, len(body)))
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (url_key, final_url, status, headers, body_hash, fetched_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, final_url or url, status, headers_json, body_hash, time.time())
+            )
+            self.stores += 1
+            should_evict = self.stores % EVICT_EVERY == 0
+
+        if should_evict:
+            self.evict()
+
+    def _expired(self, fetched_at: float) -> bool:
+        return bool(self.ttl_seconds) and time.time() - fetched_at > self.ttl_seconds
+
+    def evict(self) -> int:
+        """
+        Удалить истёкшие записи и самые старые - пока размер не меньше max_size_mb
+
+        Returns:
+            Сколько записей удалено
+        """
+        removed = 0
+        with self._lock:
+            if self.ttl_seconds:
+                cursor = self._conn.execute('DELETE FROM responses WHERE fetched_at < ?',
+                                            (time.time() - self.ttl_seconds,))
+                removed += cursor.rowcount
+
+            self._delete_orphan_bodies()
+
+            if self.max_size_bytes:
+                total = self._total_size()
+                while total > self.max_size_bytes:
+                    # Самые старые 10% записей за раз
+                    batch = max(1, self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0] // 10)
+                    cursor = self._conn.execute(
+                        'DELETE FROM responses WHERE url_key IN '
+                        '(SELECT url_key FROM responses ORDER BY fetched_at LIMIT ?)', (batch,)
+                    )
+                    if cursor.rowcount == 0:
+                        break
+                    removed += cursor.rowcount
+                    self._delete_orphan_bodies()
+                    total = self._total_size()
+
+        return removed
+
+    def _delete_orphan_bodies(self):
+        self._conn.execute('DELETE FROM bodies WHERE hash NOT IN (SELECT body_hash FROM responses)')
+
+    def _total_size(self) -> int:
+        return self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM bodies').fetchone()[0]
+
+    def get_stats(self) -> Dict:
+        """Статистика кэша (hits/misses за этот процесс + размер на диске)"""
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+            size = self._total_size()
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'size_mb': round(size / (1024 * 1024), 2),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': f"{(self.hits / lookups * 100):.1f}%" if lookups else "0%",
+            'stores': self.stores
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
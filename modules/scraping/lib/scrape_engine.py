@@ -0,0 +1,1232 @@
+#!/usr/bin/env python3
+"""
+Scrape Engine - единое asyncio ядро для homepage scrapers
+
+Раньше было три независимых движка (SimpleHomepageScraper, UltraFastScraper,
+scraper_robust), у каждого своя чистка email, site type detection и stats dict.
+Здесь всё это написано один раз:
+
+Общие helpers (sync):
+    clean_email, classify_site_type, extract_social_links, generate_url_variants,
+    validate_url, new_base_result, build_email_rows, ScrapeStats
+
+Pluggable async stages:
+    fetch        -> AsyncFetchStage (pooled aiohttp session, DNS cache, keep-alive,
+                    progressive timeouts, fallback на URL variants)
+    parse        -> ParsedPage (один парсинг на страницу)
+    extract      -> ExtractStage (emails, clean text, site type, links)
+    deep search  -> DeepSearchStage (contact/about pages параллельно, или SitemapParser)
+    ai           -> любой async callable(content, row_data) -> Optional[str]
+    dns          -> DNSPreResolver (bulk pre-resolution: NXDOMAIN строки не занимают worker)
+    thread fetch -> ThreadFetchStage / ThreadDeepSearchStage: sync HTTPClient (requests) в thread
+                    pool - SimpleHomepageScraper / IncrementalScraper идут через тот же ScrapeEngine
+    http2        -> AsyncFetchStage(http2=True): https запросы через httpx + h2 - homepage и
+                    deep search pages одного host мультиплексируются в одном соединении
+                    (pip install 'httpx[http2]'; без него / при protocol error - HTTP/1.1 aiohttp)
+    concurrency  -> AdaptiveConcurrency (AIMD: лидов в обработке по latency / ошибкам /
+                    event loop lag / RSS, workers = верхняя граница)
+
+Использование:
+    engine = ScrapeEngine(fetch=AsyncFetchStage(concurrency=200),
+                          deep_search=DeepSearchStage(max_pages=5))
+    async with engine:
+        rows = await engine.run(df.to_dict('records'))
+    print(engine.stats.get_analytics())
+
+Отдельные stages можно использовать без ScrapeEngine (scraper_robust берёт только
+AsyncFetchStage с retry + URL variants).
+"""
+
+import re
+import ssl as ssl_module
+import time
+import socket
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterable, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urlsplit
+
+try:
+    from .parsed_page import ParsedPage
+    from .text_utils import extract_emails_from_html, clean_html_to_text
+    from .dns_resolver import CachedResolver
+    from .adaptive_concurrency import rows_congested
+    from .response_body import (DEFAULT_MAX_BODY_BYTES, CHUNK_SIZE, TRUNCATED_HEADER, is_html_content_type,
+                                read_body_async, read_chunks_async)
+except ImportError:
+    from parsed_page import ParsedPage
+    from text_utils import extract_emails_from_html, clean_html_to_text
+    from dns_resolver import CachedResolver
+    from adaptive_concurrency import rows_congested
+    from response_body import (DEFAULT_MAX_BODY_BYTES, CHUNK_SIZE, TRUNCATED_HEADER, is_html_content_type,
+                               read_body_async, read_chunks_async)
+
+try:
+    import httpx
+    import h2  # noqa: F401 - httpx http2=True требует h2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# Мусорные / бесполезные emails (substring match)
+EXCLUDE_EMAIL_PATTERNS = [
+    'example.com', 'domain.com', 'yoursite.com', 'test.com',
+    'filler@godaddy', 'noreply@', 'no-reply@', 'donotreply@',
+    'webmaster@', 'postmaster@', 'mailer-daemon@',
+    'privacy@', 'abuse@', 'hostmaster@'
+]
+
+# NPS generic emails (exact match)
+NPS_GENERIC_EMAILS = {'abli_education@nps.gov', 'abli_interpretation@nps.gov', 'abli_administration@nps.gov'}
+
+# SPA frameworks
+DYNAMIC_INDICATORS = [
+    'react', 'vue', 'angular', 'next.js', 'nuxt',
+    'app.js', 'bundle.js', 'main.js',
+    '<div id="root"', '<div id="app"',
+    'ng-app', 'v-app', 'data-react',
+]
+
+# Базовая HTML структура без SPA frameworks
+STATIC_INDICATORS = ['<html', '<body', '<p>', '<div>']
+
+SOCIAL_DOMAINS = ['facebook.com', 'twitter.com', 'linkedin.com', 'instagram.com',
+                  'youtube.com', 'tiktok.com', 'pinterest.com']
+
+SOCIAL_LINK_RE = re.compile(
+    r'https?://(?:www\.)?(?:' + '|'.join(re.escape(d) for d in SOCIAL_DOMAINS) + r')/[^\s"\'>]+',
+    re.IGNORECASE
+)
+
+# error_message строки, чей домен не существует (DNS pre-resolution)
+NXDOMAIN_ERROR = 'DNS NXDOMAIN (domain does not exist)'
+
+# Больше email на deep pages - скорее всего спарсили не тот контент (каталог, список)
+MAX_DEEP_EMAILS = 20
+
+STATS_FIELDS = [
+    "total_processed", "success", "failed",
+    "emails_found", "emails_from_homepage", "emails_from_deep", "no_emails",
+    "static_sites", "dynamic_sites",
+    "failed_static", "failed_dynamic", "failed_other",
+]
+
+
+# ---------------------------------------------------------------------------
+# Shared helpers
+# ---------------------------------------------------------------------------
+
+def clean_email(email: str) -> Optional[str]:
+    """Clean and validate email (None = мусор)"""
+    if not email:
+        return None
+
+    email = email.strip().lower()
+
+    if any(pattern in email for pattern in EXCLUDE_EMAIL_PATTERNS):
+        return None
+
+    if email in NPS_GENERIC_EMAILS:
+        return None
+
+    # Basic validation
+    if '@' not in email or '.' not in email.split('@')[-1]:
+        return None
+
+    if len(email) < 5 or len(email) > 100:
+        return None
+
+    return email
+
+
+def clean_emails(emails: Iterable[str]) -> List[str]:
+    """clean_email для списка: мусор выброшен, дубликаты убраны (порядок сохранён)"""
+    result = []
+    seen = set()
+    for email in emails:
+        clean = clean_email(email)
+        if clean and clean not in seen:
+            seen.add(clean)
+            result.append(clean)
+    return result
+
+
+def classify_site_type(html_or_page: Union[str, ParsedPage]) -> str:
+    """
+    Static или dynamic (React/Vue/Angular/etc) сайт
+
+    Returns:
+        'static' | 'dynamic' | 'unknown'
+    """
+    html_lower = ParsedPage.of(html_or_page).html_lower
+
+    for indicator in DYNAMIC_INDICATORS:
+        if indicator in html_lower:
+            return 'dynamic'
+
+    if any(indicator in html_lower for indicator in STATIC_INDICATORS):
+        return 'static'
+
+    return 'unknown'
+
+
+def extract_social_links(html: Union[str, ParsedPage]) -> List[str]:
+    """Social media ссылки из HTML (дедупликация)"""
+    html = html.html if isinstance(html, ParsedPage) else html
+    return list(set(SOCIAL_LINK_RE.findall(html or '')))
+
+
+def normalize_website(website) -> Optional[str]:
+    """
+    URL для запроса (https:// добавляется если нет схемы)
+
+    Returns:
+        None если website пустой / NaN
+    """
+    if website is None or (isinstance(website, float) and website != website):  # NaN
+        return None
+    website = str(website).strip()
+    if not website:
+        return None
+    if not website.startswith('http'):
+        website = f'https://{website}'
+    return website
+
+
+def validate_url(url) -> bool:
+    """Check if string looks like a valid URL"""
+    if url is None or (isinstance(url, float) and url != url):  # NaN
+        return False
+    url_str = str(url).strip().lower()
+    if not url_str:
+        return False
+    # Check for valid URL patterns
+    has_domain = ('.' in url_str and len(url_str) > 4)
+    has_protocol = url_str.startswith(('http://', 'https://'))
+    looks_like_url = any(x in url_str for x in ['www.', '.com', '.org', '.net', '.io', '.co'])
+    return has_domain and (has_protocol or looks_like_url)
+
+
+def generate_url_variants(url: str) -> List[str]:
+    """
+    Generate URL variants to try as fallbacks.
+
+    Returns list: [original, without_www, with_www, http_version, etc]
+    """
+    url = url.strip()
+    if not url:
+        return []
+
+    variants = []
+
+    # Normalize base URL
+    if not url.startswith(('http://', 'https://')):
+        base_url = url
+    else:
+        base_url = url.replace('https://', '').replace('http://', '')
+
+    # Remove trailing slash
+    base_url = base_url.rstrip('/')
+
+    # 1. https with www
+    if not base_url.startswith('www.'):
+        variants.append(f'https://www.{base_url}')
+    else:
+        variants.append(f'https://{base_url}')
+
+    # 2. https without www
+    no_www = base_url.replace('www.', '', 1)
+    variants.append(f'https://{no_www}')
+
+    # 3. http with www
+    if not base_url.startswith('www.'):
+        variants.append(f'http://www.{base_url}')
+    else:
+        variants.append(f'http://{base_url}')
+
+    # 4. http without www
+    variants.append(f'http://{no_www}')
+
+    # Remove duplicates while preserving order
+    return list(dict.fromkeys(variants))
+
+
+def new_base_result(row_data: Dict, save_sitemap: bool = False, save_social_links: bool = False,
+                    save_other_links: bool = False, save_deep_content: bool = False) -> Dict:
+    """
+    Base result row: ВСЕ исходные колонки + колонки scraper (одинаковые для всех engines)
+    """
+    base_result = dict(row_data)
+    base_result.update({
+        'email': '',
+        'homepage_content': '',
+        'site_type': 'unknown',
+        'scrape_status': 'failed',
+        'error_message': '',
+        'email_source': '',
+        'sitemap_links': '' if save_sitemap else None,
+        'social_media_links': '' if save_social_links else None,
+        'other_links': '' if save_other_links else None,
+        'deep_pages_content': '' if save_deep_content else None
+    })
+    return base_result
+
+
+def categorize_failure(row: Dict) -> str:
+    """
+    failure_reason для failed строки (колонка в failed / all_combined выгрузках)
+
+    Returns:
+        no_email_found_static | no_email_found_dynamic | connection_timeout | page_not_found |
+        исходный error_message | unknown_error
+    """
+    error_msg = row.get('error_message')
+    error_msg = '' if error_msg is None or error_msg != error_msg else str(error_msg)  # None / NaN
+    if 'no_email_found_static' in error_msg:
+        return 'no_email_found_static'
+    elif 'no_email_found_dynamic' in error_msg:
+        return 'no_email_found_dynamic'
+    elif 'timeout' in error_msg.lower():
+        return 'connection_timeout'
+    elif '404' in error_msg or 'not found' in error_msg.lower():
+        return 'page_not_found'
+    elif error_msg:
+        return error_msg
+    else:
+        return 'unknown_error'
+
+
+def build_email_rows(base_result: Dict, emails: List[str], email_format: str, source: str) -> List[Dict]:
+    """
+    Строки результата для найденных emails
+
+    Args:
+        email_format: 'all' (через запятую) | 'primary' (первый) | 'separate' (строка на email)
+        source: 'homepage' | 'deep_search'
+    """
+    if email_format == 'all':
+        values = [', '.join(emails)]
+    elif email_format == 'primary':
+        values = [emails[0]]
+    else:  # separate
+        values = emails
+
+    rows = []
+    for value in values:
+        row = base_result.copy()
+        row['email'] = value
+        row['scrape_status'] = 'success'
+        row['email_source'] = source
+        rows.append(row)
+    return rows
+
+
+class ScrapeStats(dict):
+    """
+    Thread-safe счётчики scraping (обычный dict - сериализуется в checkpoint JSON)
+
+    Один и тот же формат stats / get_analytics() для thread-based и async engines.
+    """
+
+    def __init__(self):
+        super().__init__((field, 0) for field in STATS_FIELDS)
+        self._lock = threading.Lock()
+        self.start_time = time.time()
+
+    def add(self, **counts):
+        """Увеличить счётчики: stats.add(total_processed=1, success=1)"""
+        with self._lock:
+            for key, value in counts.items():
+                self[key] = self.get(key, 0) + value
+
+    def record_site_type(self, site_type: str):
+        if site_type == 'static':
+            self.add(static_sites=1)
+        elif site_type == 'dynamic':
+            self.add(dynamic_sites=1)
+
+    def record_no_website(self):
+        self.add(total_processed=1, failed=1)
+
+    def record_emails(self, count: int, source: str):
+        """Лид с emails (source: 'homepage' | 'deep_search')"""
+        source_key = 'emails_from_homepage' if source == 'homepage' else 'emails_from_deep'
+        self.add(**{'emails_found': count, source_key: count, 'total_processed': 1, 'success': 1})
+
+    def record_content_only(self):
+        """Контент получен, emails не запрашивались"""
+        self.add(total_processed=1, success=1)
+
+    def record_no_email(self, failure_type: str):
+        """Emails запрашивались, но не найдены (failure_type: 'static' | 'dynamic')"""
+        self.add(**{'total_processed': 1, 'no_emails': 1, f'failed_{failure_type}': 1})
+
+    def record_error(self):
+        """Fetch / processing error"""
+        self.add(total_processed=1, failed=1, failed_other=1)
+
+    def get_analytics(self) -> Dict:
+        """
+        Get comprehensive analytics in JSON format
+
+        Returns:
+            Dict with detailed metrics
+        """
+        elapsed = time.time() - self.start_time
+        total = self['total_processed']
+
+        def percentage(value: int) -> str:
+            return f"{(value / total * 100):.2f}%" if total > 0 else "0%"
+
+        return {
+            "summary": {
+                "total_sites": total,
+                "success_rate": percentage(self['success']),
+                "duration_seconds": round(elapsed, 2),
+                "duration_minutes": round(elapsed / 60, 2),
+                "sites_per_second": round(total / elapsed, 2) if elapsed > 0 else 0
+            },
+            "results": {
+                "success": {
+                    "count": self['success'],
+                    "percentage": percentage(self['success']),
+                    "total_emails": self['emails_found'],
+                    "from_homepage": self['emails_from_homepage'],
+                    "from_deep_search": self['emails_from_deep']
+                },
+                "failed": {
+                    "total": self['failed'],
+                    "static_no_email": {
+                        "count": self['failed_static'],
+                        "percentage": percentage(self['failed_static'])
+                    },
+                    "dynamic_no_email": {
+                        "count": self['failed_dynamic'],
+                        "percentage": percentage(self['failed_dynamic'])
+                    },
+                    "other_errors": {
+                        "count": self['failed_other'],
+                        "percentage": percentage(self['failed_other'])
+                    }
+                }
+            },
+            "site_types": {
+                "static": self['static_sites'],
+                "dynamic": self['dynamic_sites']
+            }
+        }
+
+
+# ---------------------------------------------------------------------------
+# Stages
+# ---------------------------------------------------------------------------
+
+class ExtractStage:
+    """
+    Extract stage: emails + clean text + site type + links из одного ParsedPage (sync)
+    """
+
+    def __init__(self, extract_emails: bool = True, save_content: bool = True,
+                 content_max_length: int = 50000, save_social_links: bool = False,
+                 save_other_links: bool = False, max_links: int = 50):
+        self.extract_emails = extract_emails
+        self.save_content = save_content
+        self.content_max_length = content_max_length
+        self.save_social_links = save_social_links
+        self.save_other_links = save_other_links
+        self.max_links = max_links
+
+    def run(self, page: ParsedPage) -> Dict:
+        """
+        Returns:
+            {'emails': [...], 'content': str, 'site_type': str,
+             'social_links': str, 'other_links': str}  (links - через ' | ')
+        """
+        result = {
+            'emails': clean_emails(extract_emails_from_html(page)) if self.extract_emails else [],
+            'content': clean_html_to_text(page, max_length=self.content_max_length) if self.save_content else '',
+            'site_type': classify_site_type(page),
+            'social_links': '',
+            'other_links': ''
+        }
+
+        if self.save_social_links:
+            result['social_links'] = ' | '.join(extract_social_links(page))
+
+        if self.save_other_links:
+            links = page.links()
+            # Social links уже в своей колонке
+            if self.save_social_links:
+                links = [link for link in links if not any(domain in link.lower() for domain in SOCIAL_DOMAINS)]
+            result['other_links'] = ' | '.join(links[:self.max_links])
+
+        return result
+
+
+def _caused_by(error: BaseException, error_type) -> bool:
+    """error или одна из его причин (__cause__ / __context__) - error_type"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, error_type):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class AsyncFetchStage:
+    """
+    Fetch stage на aiohttp: одна pooled session на весь batch
+
+    - TCPConnector с keep-alive, лимитом соединений (общим и per-host) и DNS cache
+      (с DNSPreResolver - адреса из pre-resolution, без повторного резолва)
+    - progressive timeouts (следующая попытка с большим timeout)
+    - fallback на generate_url_variants (https/http, www/без www)
+    - классификация ошибок: timeout, ssl_error, dns_error, connection_error, http_error, error
+    - persistent кэш ответов (ResponseCache) - при попадании сеть не используется
+    - http2=True: https URL идут через httpx AsyncClient(http2=True) - все запросы к host
+      (homepage, retry, deep search pages) мультиплексируются в одном h2 соединении;
+      host без h2 (ALPN) httpx обслуживает по HTTP/1.1, при h2 protocol error host
+      переключается на aiohttp. get_protocol_stats() - доля hosts, обслуженных по h2
+
+    404 не повторяется (ни retry, ни другие variants) - страницы нет.
+    """
+
+    RETRY_ALL = None
+
+    def __init__(self, concurrency: int = 100, limit_per_host: int = 20,
+                 timeouts: Sequence[float] = (3, 5, 10), retry_on: Optional[Sequence[str]] = ('timeout',),
+                 retry_delay: float = 0.0, try_url_variants: bool = False, ssl=None,
+                 dns_cache_ttl: int = 300, user_agent: str = DEFAULT_USER_AGENT,
+                 on_attempt: Optional[Callable[[Dict], None]] = None, cache=None, dns_resolver=None,
+                 max_body_bytes: int = DEFAULT_MAX_BODY_BYTES, http2: bool = False):
+        """
+        Args:
+            concurrency: Максимум одновременных соединений (TCPConnector limit)
+            limit_per_host: Максимум соединений к одному хосту
+            timeouts: Timeout каждой попытки (количество попыток = len(timeouts))
+            retry_on: Статусы, после которых делается следующая попытка (None = любая ошибка)
+            retry_delay: Пауза между попытками (секунды)
+            try_url_variants: Пробовать https/http, www/без www если URL не ответил
+            ssl: Передаётся в aiohttp (False = не проверять сертификаты)
+            dns_cache_ttl: DNS cache TTL (секунды)
+            on_attempt: Callback(result) после каждой неуспешной попытки (статистика ошибок)
+            cache: ResponseCache - проверяется до запроса, успешные ответы сохраняются
+            dns_resolver: DNSPreResolver - connector берёт адреса из его cache
+            max_body_bytes: Лимит body страницы (потоковое чтение, остаток не скачивается)
+            http2: https запросы через httpx + h2 (если установлен, иначе HTTP/1.1 aiohttp)
+        """
+        self.concurrency = concurrency
+        self.limit_per_host = limit_per_host
+        self.timeouts = list(timeouts)
+        self.retry_on = set(retry_on) if retry_on is not None else None
+        self.retry_delay = retry_delay
+        self.try_url_variants = try_url_variants
+        self.ssl = ssl
+        self.dns_cache_ttl = dns_cache_ttl
+        self.user_agent = user_agent
+        self.on_attempt = on_attempt
+        self.cache = cache
+        self.dns_resolver = dns_resolver
+        self.max_body_bytes = max_body_bytes
+
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("HTTP/2 requested but httpx[http2] is not installed - using HTTP/1.1")
+        self.http2 = http2 and HTTP2_AVAILABLE
+
+        self.session = None
+        self.h2_client = None
+        self._host_protocols: Dict[str, set] = {}   # host -> {'HTTP/2', 'HTTP/1.1'}
+        self._h1_fallback_hosts = set()             # h2 protocol error -> дальше только aiohttp
+
+    async def open(self):
+        """Создать pooled session (если ещё нет)"""
+        if self.session is None or self.session.closed:
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(
+                limit=self.concurrency,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                resolver=CachedResolver(self.dns_resolver) if self.dns_resolver is not None else None,
+                enable_cleanup_closed=True,
+                force_close=False  # Keep-alive connections
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=max(self.timeouts), connect=5),
+                headers={'User-Agent': self.user_agent}
+            )
+
+        if self.http2 and self.h2_client is None:
+            self.h2_client = httpx.AsyncClient(
+                http2=True,
+                verify=self.ssl is not False,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+                timeout=httpx.Timeout(max(self.timeouts), connect=5),
+                headers={'User-Agent': self.user_agent}
+            )
+        return self
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+        if self.h2_client is not None:
+            await self.h2_client.aclose()
+            self.h2_client = None
+
+    def _record_protocol(self, url: str, http_version: str):
+        host = (urlsplit(url).hostname or '').lower()
+        if host:
+            self._host_protocols.setdefault(host, set()).add(http_version)
+
+    def get_protocol_stats(self) -> Dict:
+        """Hosts с ответом и доля обслуженных по HTTP/2"""
+        hosts = len(self._host_protocols)
+        h2_hosts = sum(1 for protocols in self._host_protocols.values() if 'HTTP/2' in protocols)
+        return {
+            'http2_enabled': self.http2,
+            'hosts': hosts,
+            'h2_hosts': h2_hosts,
+            'h2_share': round(h2_hosts / hosts, 3) if hosts else 0.0,
+            'h1_fallback_hosts': len(self._h1_fallback_hosts)
+        }
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _retryable(self, result: Dict) -> bool:
+        if result.get('http_status') == 404 or result['status'] == 'not_html':
+            return False
+        return self.retry_on is None or result['status'] in self.retry_on
+
+    async def fetch(self, url: str, timeouts: Optional[Sequence[float]] = None,
+                    try_url_variants: Optional[bool] = None, session=None) -> Dict:
+        """
+        Получить страницу (retry + URL variants)
+
+        Args:
+            timeouts: Переопределить timeouts для этого запроса (например (5,) для deep pages)
+            try_url_variants: Переопределить fallback на URL variants
+            session: Внешняя aiohttp session (по умолчанию - pooled session stage)
+
+        Returns:
+            {'status': 'success'|'timeout'|'http_error'|'not_html'|..., 'url', 'content', 'error',
+             'http_status', 'attempt', 'variant', 'tried_urls', 'cached', 'truncated'}
+        """
+        # sqlite + zlib блокируют - в thread, не в event loop
+        if self.cache is not None:
+            cached = await asyncio.to_thread(self.cache.get, url)
+            if cached:
+                result = {'status': 'success', 'url': cached['url'], 'content': cached['content'], 'error': None,
+                          'http_status': cached['status'], 'attempt': 0, 'variant': 0, 'tried_urls': [],
+                          'cached': True}
+                if cached['headers'].get(TRUNCATED_HEADER):
+                    result['truncated'] = True
+                return result
+
+        timeouts = list(timeouts) if timeouts is not None else self.timeouts
+        if try_url_variants is None:
+            try_url_variants = self.try_url_variants
+
+        if session is None:
+            await self.open()
+            session = self.session
+
+        candidates = generate_url_variants(url) if try_url_variants else [normalize_website(url)]
+        candidates = [candidate for candidate in candidates if candidate]
+        if not candidates:
+            return {'status': 'error', 'url': url, 'content': None, 'error': 'Empty URL',
+                    'http_status': None, 'attempt': 0, 'variant': 0, 'tried_urls': []}
+
+        result = None
+        tried_urls = []
+        for variant_idx, candidate in enumerate(candidates, 1):
+            tried_urls.append(candidate)
+
+            for attempt, timeout in enumerate(timeouts, 1):
+                result = await self._fetch_once(session, candidate, timeout)
+                result.update(attempt=attempt, variant=variant_idx, tried_urls=tried_urls)
+
+                if result['status'] == 'success':
+                    if self.cache is not None:
+                        await asyncio.to_thread(self.cache.set, url, result['content'],
+                                                final_url=result['url'], status=result['http_status'],
+                                                headers={TRUNCATED_HEADER: '1'} if result.get('truncated') else None)
+                    return result
+
+                if self.on_attempt:
+                    self.on_attempt(result)
+
+                if not self._retryable(result):
+                    break
+
+                if self.retry_delay and attempt < len(timeouts):
+                    await asyncio.sleep(self.retry_delay)
+
+            # 404 / не HTML - нет смысла пробовать другие variants
+            if result.get('http_status') == 404 or result['status'] == 'not_html':
+                break
+
+        return result
+
+    def _use_h2(self, session, url: str) -> bool:
+        # h2 только по TLS (ALPN) и только для pooled session stage
+        if self.h2_client is None or session is not self.session or not url.lower().startswith('https://'):
+            return False
+        return (urlsplit(url).hostname or '').lower() not in self._h1_fallback_hosts
+
+    async def _fetch_once(self, session, url: str, timeout: float) -> Dict:
+        """Одна попытка (без retry)"""
+        import aiohttp
+
+        if self._use_h2(session, url):
+            result = await self._fetch_once_h2(url, timeout)
+            if result is not None:
+                return result
+            # h2 protocol error - host дальше идёт по HTTP/1.1
+            self._h1_fallback_hosts.add((urlsplit(url).hostname or '').lower())
+
+        result = {'status': 'error', 'url': url, 'content': None, 'error': None, 'http_status': None}
+
+        try:
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout), ssl=self.ssl) as response:
+                self._record_protocol(url, f"HTTP/{response.version.major}.{response.version.minor}")
+                result['http_status'] = response.status
+                if response.status != 200:
+                    result['status'] = 'http_error'
+                    result['error'] = f"HTTP {response.status} {response.reason or ''}".strip()
+                    return result
+
+                # Не HTML (PDF, images, ...) - отбрасываем по headers, body не читаем
+                content_type = response.headers.get('Content-Type', '')
+                if not is_html_content_type(content_type):
+                    result['status'] = 'not_html'
+                    result['error'] = f"Content-Type: {content_type}"
+                    response.close()
+                    return result
+
+                result['content'], truncated = await read_body_async(response, max_bytes=self.max_body_bytes)
+                result['url'] = str(response.url)
+                result['status'] = 'success'
+                if truncated:
+                    result['truncated'] = True
+
+        except asyncio.TimeoutError:
+            result['status'] = 'timeout'
+            result['error'] = f"Timeout ({timeout}s)"
+        except aiohttp.ClientSSLError:
+            result['status'] = 'ssl_error'
+            result['error'] = "SSL Error"
+        except aiohttp.ClientConnectorDNSError:
+            result['status'] = 'dns_error'
+            result['error'] = "DNS Error"
+        except aiohttp.ClientConnectorError:
+            result['status'] = 'connection_error'
+            result['error'] = "Connection Error"
+        except aiohttp.ClientConnectionError:
+            result['status'] = 'connection_error'
+            result['error'] = "Connection Error"
+        except Exception as e:
+            result['status'] = 'error'
+            result['error'] = f"Error: {type(e).__name__}"
+
+        return result
+
+    async def _fetch_once_h2(self, url: str, timeout: float) -> Optional[Dict]:
+        """Одна попытка через httpx (h2 / HTTP/1.1 по ALPN); None - protocol error, нужен fallback"""
+        result = {'status': 'error', 'url': url, 'content': None, 'error': None, 'http_status': None}
+
+        try:
+            async with self.h2_client.stream('GET', url, timeout=httpx.Timeout(timeout, connect=min(5, timeout))) as response:
+                self._record_protocol(url, response.http_version)
+                result['http_status'] = response.status_code
+                if response.status_code != 200:
+                    result['status'] = 'http_error'
+                    result['error'] = f"HTTP {response.status_code} {response.reason_phrase or ''}".strip()
+                    return result
+
+                content_type = response.headers.get('Content-Type', '')
+                if not is_html_content_type(content_type):
+                    result['status'] = 'not_html'
+                    result['error'] = f"Content-Type: {content_type}"
+                    return result
+
+                # Выход из stream() закрывает h2 stream - остаток body не скачивается
+                result['content'], truncated = await read_chunks_async(response.aiter_bytes(CHUNK_SIZE),
+                                                                       content_type, self.max_body_bytes)
+                result['url'] = str(response.url)
+                result['status'] = 'success'
+                if truncated:
+                    result['truncated'] = True
+
+        except httpx.TimeoutException:
+            result['status'] = 'timeout'
+            result['error'] = f"Timeout ({timeout}s)"
+        except (httpx.RemoteProtocolError, httpx.LocalProtocolError):
+            return None
+        except httpx.ConnectError as e:
+            if _caused_by(e, socket.gaierror):
+                result['status'] = 'dns_error'
+                result['error'] = "DNS Error"
+            elif _caused_by(e, ssl_module.SSLError):
+                result['status'] = 'ssl_error'
+                result['error'] = "SSL Error"
+            else:
+                result['status'] = 'connection_error'
+                result['error'] = "Connection Error"
+        except httpx.TransportError:
+            result['status'] = 'connection_error'
+            result['error'] = "Connection Error"
+        except Exception as e:
+            result['status'] = 'error'
+            result['error'] = f"Error: {type(e).__name__}"
+
+        return result
+
+
+class DeepSearchStage:
+    """
+    Deep search: contact/about/team pages скачиваются параллельно
+
+    Pages - фиксированные paths, или SitemapParser.get_smart_pages (если передан,
+    выполняется в thread - он sync).
+    """
+
+    PATHS = ['/contact', '/about', '/team', '/contact-us', '/about-us']
+
+    def __init__(self, max_pages: int = 5, timeout: float = 5, sitemap_parser=None,
+                 save_content: bool = False, content_max_length: int = 10000,
+                 max_emails: int = MAX_DEEP_EMAILS):
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.sitemap_parser = sitemap_parser
+        self.save_content = save_content
+        self.content_max_length = content_max_length
+        self.max_emails = max_emails
+
+    async def candidate_pages(self, website: str) -> List[str]:
+        if self.sitemap_parser is not None:
+            discovery = await asyncio.to_thread(self.sitemap_parser.get_smart_pages, website, self.max_pages)
+            return discovery.get('pages', [])[:self.max_pages]
+
+        base = website.rstrip('/')
+        return [f"{base}{path}" for path in self.PATHS][:self.max_pages]
+
+    async def run(self, fetch: AsyncFetchStage, website: str, session=None) -> Tuple[List[str], str]:
+        """
+        Returns:
+            (emails, pages_content) - emails пустой если найдено > max_emails
+        """
+        pages = await self.candidate_pages(website)
+        responses = await asyncio.gather(*(
+            fetch.fetch(page_url, timeouts=(self.timeout,), try_url_variants=False, session=session)
+            for page_url in pages
+        ))
+
+        all_emails = []
+        pages_content = []
+        for page_url, response in zip(pages, responses):
+            if response['status'] != 'success':
+                continue
+
+            page = ParsedPage(response['content'], url=response['url'])
+            all_emails.extend(extract_emails_from_html(page))
+
+            if self.save_content:
+                page_text = clean_html_to_text(page, max_length=self.content_max_length)
+                if page_text:
+                    pages_content.append(f"=== {page_url} ===\n{page_text}\n")
+
+        emails = clean_emails(all_emails)
+        if len(emails) > self.max_emails:
+            logger.warning(f"Too many emails found ({len(emails)}), likely scraped wrong content - ignoring")
+            emails = []
+
+        return emails, '\n\n'.join(pages_content)
+
+
+class ThreadFetchStage:
+    """
+    Fetch stage поверх sync клиента (HTTPClient на requests): каждый fetch - в thread pool
+
+    Так thread-based SimpleHomepageScraper идёт через тот же ScrapeEngine
+    (dead domains, DNS pre-resolve, extract, deep search, adaptive concurrency),
+    меняется только транспорт.
+    """
+
+    def __init__(self, fetch_func: Callable[[str], Dict], max_workers: int = 50):
+        """
+        Args:
+            fetch_func: sync callable(url) -> dict в формате HTTPClient.fetch
+            max_workers: Потоков в pool (не меньше workers engine - каждый лид занимает один поток)
+        """
+        self.fetch_func = fetch_func
+        self.max_workers = max_workers
+        self.try_url_variants = False
+        self.executor: Optional[ThreadPoolExecutor] = None
+
+    async def open(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='fetch')
+        return self
+
+    async def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def run_sync(self, func: Callable, *args):
+        """func(*args) в pool stage (sync deep search и т.п.)"""
+        await self.open()
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def fetch(self, url: str, session=None, **kwargs) -> Dict:
+        return await self.run_sync(self.fetch_func, url)
+
+
+class ThreadDeepSearchStage:
+    """
+    Deep search stage поверх sync callable(website) -> (emails, pages_content),
+    выполняется в pool ThreadFetchStage
+    """
+
+    def __init__(self, search_func: Callable[[str], Tuple[List[str], str]]):
+        self.search_func = search_func
+
+    async def run(self, fetch: ThreadFetchStage, website: str, session=None) -> Tuple[List[str], str]:
+        return await fetch.run_sync(self.search_func, website)
+
+
+# ---------------------------------------------------------------------------
+# Engine
+# ---------------------------------------------------------------------------
+
+class ScrapeEngine:
+    """
+    Homepage -> emails pipeline: fetch -> parse -> extract -> deep search -> ai
+
+    Результат - строки в едином формате (new_base_result + build_email_rows),
+    stats - ScrapeStats.
+    """
+
+    def __init__(self, fetch: Optional[AsyncFetchStage] = None, extract: Optional[ExtractStage] = None,
+                 deep_search: Optional[DeepSearchStage] = None,
+                 ai: Optional[Callable[[str, Dict], Awaitable[Optional[str]]]] = None,
+                 parser: Callable[..., ParsedPage] = ParsedPage, stats: Optional[ScrapeStats] = None,
+                 workers: int = 100, email_format: str = 'separate', sitemap_parser=None,
+                 save_sitemap: bool = False, save_deep_content: bool = False,
+                 deep_search_timeout: float = 90, dead_domains=None, dns_resolver=None,
+                 dns_batch_size: int = 1000, concurrency=None):
+        """
+        Args:
+            fetch: Fetch stage (по умолчанию AsyncFetchStage(concurrency=workers); ThreadFetchStage - sync HTTPClient)
+            extract: Extract stage (по умолчанию ExtractStage())
+            deep_search: Deep search stage (None = homepage only)
+            ai: async callable(content, row_data) -> summary (None = без AI)
+            parser: Parse stage - фабрика ParsedPage(html, url=...)
+            workers: Максимум строк в обработке одновременно
+            sitemap_parser: SitemapParser для колонки sitemap_links (save_sitemap)
+            deep_search_timeout: Общий timeout deep search на один сайт
+            dead_domains: DeadDomainCache - домены в cooldown пропускаются без запроса
+            dns_resolver: DNSPreResolver - stream() резолвит hosts пачками по dns_batch_size,
+                NXDOMAIN строки сразу идут в результат (failed_other) без worker slot
+            concurrency: AdaptiveConcurrency - сколько из workers задач обрабатывают лиды
+                одновременно решает контроллер (workers = max_limit контроллера)
+        """
+        self.fetch = fetch or AsyncFetchStage(concurrency=workers)
+        self.extract = extract or ExtractStage()
+        self.deep_search = deep_search
+        self.ai = ai
+        self.parser = parser
+        self.stats = stats if stats is not None else ScrapeStats()
+        self.workers = workers
+        self.email_format = email_format
+        self.sitemap_parser = sitemap_parser
+        self.save_sitemap = save_sitemap
+        self.save_deep_content = save_deep_content
+        self.deep_search_timeout = deep_search_timeout
+        self.dead_domains = dead_domains
+        self.dns_resolver = dns_resolver
+        self.dns_batch_size = dns_batch_size
+        self.concurrency = concurrency
+        if concurrency is not None:
+            self.workers = max(workers, concurrency.max_limit)
+
+    async def __aenter__(self):
+        await self.fetch.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.fetch.close()
+
+    def new_base_result(self, row_data: Dict) -> Dict:
+        return new_base_result(row_data, save_sitemap=self.save_sitemap,
+                               save_social_links=self.extract.save_social_links,
+                               save_other_links=self.extract.save_other_links,
+                               save_deep_content=self.save_deep_content)
+
+    async def scrape_row(self, row_data: Dict, session=None) -> List[Dict]:
+        """
+        Один лид -> строки результата (одна на email или одна без email)
+
+        Args:
+            row_data: Строка CSV (все колонки сохраняются), нужен 'website'
+            session: Внешняя aiohttp session (по умолчанию - session fetch stage)
+        """
+        name = row_data.get('name', '')
+        base_result = self.new_base_result(row_data)
+
+        website = normalize_website(row_data.get('website'))
+        if not website:
+            base_result['error_message'] = 'No website provided'
+            self.stats.record_no_website()
+            return [base_result]
+
+        if self.dead_domains is not None:
+            dead = self.dead_domains.check(website)
+            if dead:
+                base_result['error_message'] = self.dead_domains.describe(dead)
+                base_result['email_source'] = 'none'
+                self.stats.record_error()
+                logger.info(f"⏭ {name}: {base_result['error_message']}")
+                return [base_result]
+
+        try:
+            response = await self.fetch.fetch(website, session=session)
+            if self.dead_domains is not None:
+                self.dead_domains.record(website, response['status'])
+
+            if response['status'] != 'success':
+                base_result['error_message'] = response.get('error') or 'Unknown error'
+                base_result['email_source'] = 'none'
+                self.stats.record_error()
+                logger.warning(f"✗ {name}: {base_result['error_message']}")
+                return [base_result]
+
+            # HTTPClient может отдать уже распарсенное дерево
+            page = response.get('page') or self.parser(response['content'], url=response['url'])
+            extracted = self.extract.run(page)
+            site_type = extracted['site_type']
+            self.stats.record_site_type(site_type)
+
+            base_result['homepage_content'] = extracted['content']
+            base_result['site_type'] = site_type
+            if self.extract.save_social_links:
+                base_result['social_media_links'] = extracted['social_links']
+            if self.extract.save_other_links:
+                base_result['other_links'] = extracted['other_links']
+            if self.save_sitemap and self.sitemap_parser is not None:
+                base_result['sitemap_links'] = await self._sitemap_links(website)
+
+            if self.ai is not None:
+                base_result['ai_summary'] = await self.ai(extracted['content'] or page.clean_text(), row_data)
+
+            emails = extracted['emails']
+            if emails:
+                self.stats.record_emails(len(emails), 'homepage')
+                logger.info(f"✓ {name}: {len(emails)} emails (homepage), {site_type}")
+                return build_email_rows(base_result, emails, self.email_format, 'homepage')
+
+            deep_emails = []
+            if self.extract.extract_emails and self.deep_search is not None:
+                deep_emails, deep_content = await self._run_deep_search(name, website, session)
+                if self.save_deep_content and deep_content:
+                    base_result['deep_pages_content'] = deep_content
+
+            if deep_emails:
+                self.stats.record_emails(len(deep_emails), 'deep_search')
+                logger.info(f"✓ {name}: {len(deep_emails)} emails (deep search), {site_type}")
+                return build_email_rows(base_result, deep_emails, self.email_format, 'deep_search')
+
+            row = base_result.copy()
+            row['email_source'] = 'none'
+
+            if not self.extract.extract_emails:
+                # Success: content extracted, emails not requested
+                row['scrape_status'] = 'success'
+                self.stats.record_content_only()
+                logger.info(f"✓ {name}: Content extracted (no email extraction), {site_type}")
+            else:
+                failure_type = 'dynamic' if site_type == 'dynamic' else 'static'
+                row['error_message'] = f'no_email_found_{failure_type}'
+                self.stats.record_no_email(failure_type)
+                logger.warning(f"✗ {name}: No emails found, {site_type}")
+
+            return [row]
+
+        except Exception as e:
+            base_result['error_message'] = str(e)
+            base_result['email_source'] = 'none'
+            self.stats.record_error()
+            logger.error(f"✗ {name}: {e}")
+            return [base_result]
+
+    def unresolvable_result(self, row_data: Dict) -> List[Dict]:
+        """Строка результата для лида, чей домен не существует (без запроса)"""
+        base_result = self.new_base_result(row_data)
+        base_result['error_message'] = NXDOMAIN_ERROR
+        base_result['email_source'] = 'none'
+        self.stats.record_error()
+        # В dead_domains не пишем: вердикт pre-resolution не переживает прогон (сбой резолвера != мёртвый домен)
+        logger.info(f"⏭ {row_data.get('name', '')}: {NXDOMAIN_ERROR}")
+        return [base_result]
+
+    async def _run_deep_search(self, name: str, website: str, session=None) -> Tuple[List[str], str]:
+        try:
+            return await asyncio.wait_for(self.deep_search.run(self.fetch, website, session=session),
+                                          timeout=self.deep_search_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⏱ {name}: Deep search timed out after {self.deep_search_timeout} seconds")
+        except Exception as e:
+            logger.error(f"✗ {name}: Deep search error: {e}")
+        return [], ''
+
+    async def _sitemap_links(self, website: str) -> str:
+        try:
+            result = await asyncio.to_thread(self.sitemap_parser.get_smart_pages, website, 100)
+            return ' | '.join(result.get('pages', [])[:50])
+        except Exception:
+            return ''
+
+    async def stream(self, rows: Union[Iterable[Dict], AsyncIterable[Dict]],
+                     on_result: Optional[Callable[[List[Dict]], None]] = None,
+                     queue_size: Optional[int] = None) -> int:
+        """
+        Bounded worker pool: workers задач берут строки из очереди по мере готовности
+
+        В памяти одновременно не больше workers + queue_size строк (задачи не создаются
+        на весь input заранее) - подходит для async iterator по файлу любого размера.
+        С dns_resolver строки резолвятся пачками до очереди: NXDOMAIN сразу в on_result.
+
+        Args:
+            rows: Iterable или AsyncIterable строк (dicts)
+            on_result: Callback(result_rows) после каждого лида (запись на диск, progress)
+            queue_size: Размер очереди между reader и workers (по умолчанию 2 * workers)
+
+        Returns:
+            Количество обработанных лидов
+        """
+        queue = asyncio.Queue(maxsize=queue_size or self.workers * 2)
+        stop = object()
+        processed = 0
+
+        async def enqueue(batch: List[Dict]):
+            nonlocal processed
+            dead_urls = await self.dns_resolver.find_unresolvable(
+                [normalize_website(row_data.get('website')) for row_data in batch],
+                www_variants=self.fetch.try_url_variants
+            )
+            for row_data in batch:
+                if normalize_website(row_data.get('website')) in dead_urls:
+                    result_rows = self.unresolvable_result(row_data)
+                    processed += 1
+                    if on_result:
+                        on_result(result_rows)
+                else:
+                    await queue.put(row_data)
+
+        async def source():
+            if hasattr(rows, '__aiter__'):
+                async for row_data in rows:
+                    yield row_data
+            else:
+                for row_data in rows:
+                    yield row_data
+
+        async def producer():
+            batch = []
+            async for row_data in source():
+                if self.dns_resolver is None:
+                    await queue.put(row_data)
+                    continue
+                batch.append(row_data)
+                if len(batch) >= self.dns_batch_size:
+                    await enqueue(batch)
+                    batch = []
+            if batch:
+                await enqueue(batch)
+            # Ошибка reader - без stop, workers отменяются ниже
+            for _ in range(self.workers):
+                await queue.put(stop)
+
+        async def worker():
+            nonlocal processed
+            while True:
+                row_data = await queue.get()
+                if row_data is stop:
+                    return
+                try:
+                    result_rows = await self.scrape_adaptive(row_data)
+                except Exception as e:
+                    logger.error(f"Task failed: {e}")
+                    continue
+                processed += 1
+                # Ошибки on_result (запись на диск) не глотаются - stream падает
+                if on_result:
+                    on_result(result_rows)
+
+        lag_monitor = None
+        if self.concurrency is not None:
+            lag_monitor = asyncio.create_task(self.concurrency.monitor_loop_lag())
+        tasks = [asyncio.ensure_future(producer())] + [asyncio.ensure_future(worker()) for _ in range(self.workers)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # Producer / on_result упал - остальные задачи не должны висеть на очереди
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if lag_monitor is not None:
+                lag_monitor.cancel()
+        return processed
+
+    async def scrape_adaptive(self, row_data: Dict, session=None) -> List[Dict]:
+        """scrape_row через slot AdaptiveConcurrency (без контроллера - напрямую)"""
+        if self.concurrency is None:
+            return await self.scrape_row(row_data, session=session)
+
+        await self.concurrency.acquire_async()
+        started = time.monotonic()
+        result_rows = None
+        try:
+            result_rows = await self.scrape_row(row_data, session=session)
+            return result_rows
+        finally:
+            self.concurrency.release(time.monotonic() - started,
+                                     congested=result_rows is None or rows_congested(result_rows))
+
+    async def run(self, rows: Union[Iterable[Dict], AsyncIterable[Dict]],
+                  on_result: Optional[Callable[[List[Dict]], None]] = None) -> List[Dict]:
+        """
+        Обработать все строки (не больше workers одновременно) и вернуть результат
+
+        Args:
+            on_result: Callback(result_rows) после каждого лида (progress / incremental save)
+
+        Returns:
+            Все строки результата
+        """
+        all_rows = []
+
+        def collect(result_rows: List[Dict]):
+            all_rows.extend(result_rows)
+            if on_result:
+                on_result(result_rows)
+
+        await self.stream(rows, on_result=collect)
+        return all_rows
@@ -4,22 +4,282 @@ Sitemap Utilities for Smart Multi-Page Scraping
 
 Extracts URLs from sitemap.xml and robots.txt for intelligent page discovery.
 Provides sitemap-first strategy with pattern guessing fallback.
+
+Discovery is concurrent: robots.txt and the common sitemap locations are fetched
+in parallel, child sitemaps of an index too. Contact pages found in a domain's
+sitemap are cached per domain (TTL), so repeated lookups don't touch the network.
+
+Sitemaps are parsed as a stream (iterparse over the response, .xml.gz supported):
+URLs are scored against the contact keywords on the fly - only matches are kept,
+product/blog child sitemaps are skipped by name, and parsing stops once enough
+strong candidates are found. Memory per worker stays bounded on sitemaps with
+hundreds of thousands of product URLs.
 """
 
+import io
+import time
+import itertools
+import gzip
+import threading
 import requests
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin, urlparse
-from typing import List, Optional, Dict
+from typing import Iterator, List, Optional, Dict, Tuple
 import re
 
+# Common sitemap locations (fallback when robots.txt has no Sitemap: directive)
+COMMON_SITEMAP_PATHS = [
+    '/sitemap.xml',
+    '/sitemap_index.xml',
+    '/sitemap-misc.xml',
+    '/sitemap-pages.xml'
+]
+
+# Max child sitemaps fetched from a sitemap index
+MAX_CHILD_SITEMAPS = 10
+
+# Child sitemaps that never list contact pages (matched against the sitemap file name)
+SKIP_CHILD_SITEMAP_RE = re.compile(
+    r'product|collection|categor|blog|post|article|news|tag|author|image|video|review|event|job',
+    re.IGNORECASE
+)
+
+# Child sitemaps most likely to list contact/about pages - fetched first
+PREFERRED_CHILD_SITEMAP_RE = re.compile(r'page|misc|static|main|general|site', re.IGNORECASE)
+
+# Priority keywords (higher score = more relevant)
+CONTACT_KEYWORDS = {
+    # Priority 1 (100 points): Exact contact pages
+    'contact': 100, 'contactus': 100, 'contact-us': 100, 'kontakt': 100,
+    'contacto': 100, 'contatto': 100, 'get-in-touch': 100, 'reach-us': 100,
+    'contact-information': 100, 'contact-info': 100,
+
+    # Priority 2 (80 points): About & info pages
+    'about': 80, 'aboutus': 80, 'about-us': 80, 'our-story': 80,
+    'policies': 80, 'policy': 80, 'info': 80, 'information': 80,
+
+    # Priority 3 (60 points): Team & support
+    'team': 60, 'staff': 60, 'leadership': 60, 'management': 60,
+    'support': 60, 'help': 60, 'customer-service': 60, 'customer-support': 60,
+
+    # Priority 4 (40 points): Business pages
+    'quote': 40, 'quotes': 40, 'request-quote': 40, 'get-quote': 40,
+    'location': 40, 'locations': 40, 'find-us': 40, 'directions': 40,
+    'schedule': 40, 'appointment': 40, 'inquiry': 40, 'enquiry': 40,
+
+    # Priority 5 (20 points): Generic business terms
+    'office': 20, 'offices': 20, 'branch': 20, 'call': 20, 'phone': 20,
+    'email': 20, 'mail': 20, 'message': 20, 'feedback': 20,
+    'corporate': 20, 'business': 20, 'partner': 20, 'press': 20, 'media': 20,
+
+    # Low priority (10 points): Weak signals
+    'services': 10, 'faq': 10, 'helpdesk': 10, 'book': 10, 'reservation': 10
+}
+
+# Score of a "strong" candidate (contact / about pages) - enough of these stops parsing
+STRONG_CANDIDATE_SCORE = 80
+
+# Hard limits per sitemap file (sitemaps.org allows 50k URLs / 50MB uncompressed)
+MAX_URLS_PER_SITEMAP = 50000
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+def score_url(url: str) -> Tuple[int, List[str]]:
+    """
+    Contact relevance of a URL
+
+    Returns:
+        (score, matched keywords) - score 0 = not a contact candidate
+    """
+    url_lower = url.lower()
+
+    # Skip product pages (very low priority for contact info)
+    if '/products/' in url_lower or '/collections/' in url_lower:
+        return 0, []
+
+    score = 0
+    matched_keywords = []
+    for keyword, priority in CONTACT_KEYWORDS.items():
+        if keyword in url_lower:
+            score += priority
+            matched_keywords.append(keyword)
+
+    # Bonus: /pages/ or /policies/ paths are more likely to have contact info
+    # (only if at least one keyword matched)
+    if score > 0 and ('/pages/' in url_lower or '/policies/' in url_lower):
+        score += 50
+
+    return score, matched_keywords
+
+
+class _LimitedReader(io.RawIOBase):
+    """File-like wrapper: stops reading after max_bytes (bounded work per sitemap)"""
+
+    def __init__(self, stream, max_bytes: int):
+        self.stream = stream
+        self.remaining = max_bytes
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self.remaining <= 0:
+            return 0
+        data = self.stream.read(min(len(buffer), self.remaining))
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+
+def open_sitemap_stream(source, max_bytes: int = MAX_SITEMAP_BYTES):
+    """
+    Binary stream of sitemap XML (gzip detected by magic bytes and decompressed on the fly)
+
+    Args:
+        source: requests.Response (opened with stream=True), bytes or binary file-like
+    """
+    if isinstance(source, requests.Response):
+        source.raw.decode_content = True  # Content-Encoding: gzip
+        stream = source.raw
+    elif isinstance(source, (bytes, bytearray)):
+        stream = io.BytesIO(source)
+    else:
+        stream = source
+
+    stream = io.BufferedReader(_LimitedReader(stream, max_bytes))
+    if stream.peek(2)[:2] == _GZIP_MAGIC:  # .xml.gz
+        stream = io.BufferedReader(_LimitedReader(gzip.GzipFile(fileobj=stream), max_bytes))
+    return stream
+
+
+def iter_sitemap_entries(stream) -> Iterator[Tuple[str, str]]:
+    """
+    Incremental sitemap parser (constant memory - elements are cleared as they end)
+
+    Yields:
+        ('sitemap', loc) for sitemap index entries, ('url', loc) for page URLs
+    """
+    root = None
+    try:
+        for event, elem in ET.iterparse(stream, events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = elem
+                continue
+
+            tag = elem.tag.rsplit('}', 1)[-1]
+            if tag in ('url', 'sitemap'):
+                for child in elem:
+                    if child.tag.rsplit('}', 1)[-1] == 'loc' and child.text:
+                        yield tag, child.text.strip()
+                        break
+                # Drop processed entries
+                root.clear()
+    except ET.ParseError:
+        return
+
 
 class SitemapParser:
     """Parse sitemaps and extract relevant URLs for email scraping"""
 
-    def __init__(self, timeout: int = 10, debug_logger=None):
+    def __init__(self, timeout: int = 10, debug_logger=None, cache_ttl: Optional[float] = 3600,
+                 cache_max_domains: int = 10000, max_urls_per_sitemap: int = MAX_URLS_PER_SITEMAP):
+        """
+        Args:
+            timeout: Timeout per request (seconds)
+            debug_logger: Optional logger for discovery details
+            cache_ttl: Seconds a domain's sitemap result is reused (None/0 = no cache)
+            cache_max_domains: Max cached domains (oldest dropped first)
+            max_urls_per_sitemap: Stop scanning a sitemap file after this many URLs
+        """
         self.timeout = timeout
         self.user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         self.debug_logger = debug_logger
+        self.cache_ttl = cache_ttl
+        self.cache_max_domains = cache_max_domains
+        self.max_urls_per_sitemap = max_urls_per_sitemap
+
+        # domain -> (cached_at, contact pages from sitemap or None if no sitemap,
+        #            max_pages the scan stopped early for or None if the scan was complete)
+        self._cache: Dict[str, tuple] = {}
+        self._cache_lock = threading.Lock()
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    def _get_session(self) -> requests.Session:
+        """Shared keep-alive session (thread-safe lazy init)"""
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=100, pool_maxsize=100)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers['User-Agent'] = self.user_agent
+                self._session = session
+            return self._session
+
+    def _get(self, url: str, stream: bool = False) -> Optional[requests.Response]:
+        """GET (None on network error). stream=True - body is read later (or never)"""
+        try:
+            return self._get_session().get(url, timeout=self.timeout, stream=stream)
+        except Exception:
+            return None
+
+    def _get_many(self, urls: List[str], stream: bool = False) -> List[Optional[requests.Response]]:
+        """GET all URLs concurrently (results in the same order)"""
+        if len(urls) <= 1:
+            return [self._get(url, stream) for url in urls]
+        with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+            return list(executor.map(lambda url: self._get(url, stream), urls))
+
+    @staticmethod
+    def _close(response: Optional[requests.Response]):
+        if response is not None:
+            response.close()
+
+    @staticmethod
+    def _cache_key(domain: str) -> str:
+        if not domain.startswith(('http://', 'https://')):
+            domain = 'https://' + domain
+        netloc = urlparse(domain).netloc.lower()
+        return netloc[4:] if netloc.startswith('www.') else netloc
+
+    def _cache_get(self, domain: str, max_pages: int):
+        """Returns (hit, contact_pages)"""
+        if not self.cache_ttl:
+            return False, None
+        key = self._cache_key(domain)
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return False, None
+            cached_at, contact_pages, stopped_for = entry
+            if time.time() - cached_at > self.cache_ttl:
+                del self._cache[key]
+                return False, None
+            # Scan stopped early for fewer pages than needed now - discover again
+            if stopped_for is not None and max_pages > stopped_for:
+                return False, None
+            return True, contact_pages
+
+    def _cache_set(self, domain: str, contact_pages: Optional[List[str]], stopped_for: Optional[int]):
+        if not self.cache_ttl:
+            return
+        with self._cache_lock:
+            while len(self._cache) >= self.cache_max_domains:
+                del self._cache[next(iter(self._cache))]
+            self._cache[self._cache_key(domain)] = (time.time(), contact_pages, stopped_for)
+
+    @staticmethod
+    def _sitemap_from_robots_text(robots_text: str) -> Optional[str]:
+        # Find "Sitemap:" directive
+        for line in robots_text.split('\n'):
+            if line.lower().startswith('sitemap:'):
+                return line.split(':', 1)[1].strip()
+        return None
 
     def get_sitemap_from_robots(self, domain: str) -> Optional[str]:
         """
@@ -31,118 +291,153 @@ class SitemapParser:
         Returns:
             Sitemap URL or None
         """
-        robots_url = urljoin(domain, '/robots.txt')
-
-        try:
-            response = requests.get(
-                robots_url,
-                headers={'User-Agent': self.user_agent},
-                timeout=self.timeout
-            )
-
-            if response.status_code == 200:
-                # Find "Sitemap:" directive
-                for line in response.text.split('\n'):
-                    if line.lower().startswith('sitemap:'):
-                        sitemap_url = line.split(':', 1)[1].strip()
-                        return sitemap_url
-
-        except Exception:
-            pass
-
+        response = self._get(urljoin(domain, '/robots.txt'))
+        if response is not None and response.status_code == 200:
+            return self._sitemap_from_robots_text(response.text)
         return None
 
-    def fetch_sitemap(self, domain: str) -> Optional[str]:
+    def open_sitemap(self, domain: str) -> Optional[requests.Response]:
         """
-        Fetch sitemap.xml from common locations
+        Find the domain's sitemap - response opened with stream=True (body not read yet)
 
-        Tries multiple locations:
+        robots.txt and all common locations are requested in parallel; the first
+        usable one wins in priority order:
         1. robots.txt (most reliable)
         2. /sitemap.xml
         3. /sitemap_index.xml
         4. /sitemap-misc.xml
+        5. /sitemap-pages.xml
+
+        The caller must close() the response.
+        """
+        common_urls = [urljoin(domain, path) for path in COMMON_SITEMAP_PATHS]
+        robots_url = urljoin(domain, '/robots.txt')
+        with ThreadPoolExecutor(max_workers=len(common_urls) + 1) as executor:
+            robots_future = executor.submit(self._get, robots_url)
+            common_responses = list(executor.map(lambda url: self._get(url, True), common_urls))
+            robots_response = robots_future.result()
+
+        selected = None
+
+        # robots.txt first
+        if robots_response is not None and robots_response.status_code == 200:
+            sitemap_url = self._sitemap_from_robots_text(robots_response.text)
+            if sitemap_url:
+                # Already requested if robots points to a common location
+                response = dict(zip(common_urls, common_responses)).get(sitemap_url) or self._get(sitemap_url, True)
+                if response is not None and response.status_code == 200:
+                    selected = response
+                elif not any(response is common for common in common_responses):
+                    self._close(response)  # common responses are closed below
+
+        # Fallback: common sitemap locations
+        if selected is None:
+            for response in common_responses:
+                if response is not None and response.status_code == 200 \
+                        and 'xml' in response.headers.get('Content-Type', ''):
+                    selected = response
+                    break
+
+        # Bodies of the other candidates are never downloaded
+        for response in common_responses:
+            if response is not selected:
+                self._close(response)
+
+        return selected
+
+    def fetch_sitemap(self, domain: str) -> Optional[str]:
+        """
+        Fetch sitemap.xml from common locations (see open_sitemap)
 
         Returns:
-            Sitemap XML content or None
+            Sitemap XML content (gzip decompressed) or None
         """
-        # Try robots.txt first
-        sitemap_url = self.get_sitemap_from_robots(domain)
-        if sitemap_url:
-            try:
-                response = requests.get(
-                    sitemap_url,
-                    headers={'User-Agent': self.user_agent},
-                    timeout=self.timeout
-                )
-                if response.status_code == 200:
-                    return response.text
-            except Exception:
-                pass
-
-        # Fallback: Try common sitemap locations
-        common_paths = [
-            '/sitemap.xml',
-            '/sitemap_index.xml',
-            '/sitemap-misc.xml',
-            '/sitemap-pages.xml'
-        ]
+        response = self.open_sitemap(domain)
+        if response is None:
+            return None
+        try:
+            return open_sitemap_stream(response).read().decode('utf-8', errors='replace')
+        except Exception:
+            return None
+        finally:
+            response.close()
 
-        for path in common_paths:
-            try:
-                sitemap_url = urljoin(domain, path)
-                response = requests.get(
-                    sitemap_url,
-                    headers={'User-Agent': self.user_agent},
-                    timeout=self.timeout
-                )
+    def parse_sitemap_xml(self, xml_content) -> List[str]:
+        """
+        Parse sitemap XML and extract all URLs
 
-                if response.status_code == 200 and 'xml' in response.headers.get('Content-Type', ''):
-                    return response.text
+        Handles both regular sitemaps and sitemap indexes.
 
-            except Exception:
-                continue
+        Args:
+            xml_content: XML string, bytes (gzip ok) or binary stream
 
-        return None
+        Returns:
+            List of URLs (child sitemap URLs for a sitemap index)
+        """
+        if isinstance(xml_content, str):
+            xml_content = xml_content.encode('utf-8')
+
+        sitemaps, urls = [], []
+        for kind, loc in iter_sitemap_entries(open_sitemap_stream(xml_content)):
+            (sitemaps if kind == 'sitemap' else urls).append(loc)
+
+        # Sitemap index - return child sitemap URLs
+        return sitemaps or urls
 
-    def parse_sitemap_xml(self, xml_content: str) -> List[str]:
+    def scan_sitemap(self, source, max_pages: int, stop: Optional[threading.Event] = None,
+                     strong_counter: Optional[Iterator[int]] = None) -> Dict:
         """
-        Parse sitemap XML and extract all URLs
+        Stream one sitemap and keep only contact candidates
 
-        Handles both regular sitemaps and sitemap indexes.
+        Args:
+            source: Streamed requests.Response, bytes or binary stream
+            max_pages: Stop once this many strong candidates are found (all scans together)
+            stop: Shared event - set by whichever scan reaches max_pages, checked by all
+            strong_counter: Shared itertools.count(1) of strong candidates across concurrent scans
+                (next() on it is atomic - no lock needed)
 
         Returns:
-            List of URLs
+            {'candidates': [(url, score), ...], 'child_sitemaps': [...],
+             'urls_scanned': int, 'stopped_early': bool}
         """
-        urls = []
+        stop = stop or threading.Event()
+        strong_counter = strong_counter if strong_counter is not None else itertools.count(1)
+        result = {'candidates': [], 'child_sitemaps': [], 'urls_scanned': 0, 'stopped_early': False}
 
-        try:
-            root = ET.fromstring(xml_content)
+        for kind, loc in iter_sitemap_entries(open_sitemap_stream(source)):
+            if kind == 'sitemap':
+                result['child_sitemaps'].append(loc)
+                continue
 
-            # Handle XML namespaces
-            namespaces = {
-                'sm': 'http://www.sitemaps.org/schemas/sitemap/0.9',
-                'xhtml': 'http://www.w3.org/1999/xhtml'
-            }
+            result['urls_scanned'] += 1
+            score, _ = score_url(loc)
+            if score > 0:
+                result['candidates'].append((loc, score))
+                if score >= STRONG_CANDIDATE_SCORE:
+                    if next(strong_counter) >= max_pages:
+                        stop.set()
 
-            # Check if this is a sitemap index (contains <sitemap> elements)
-            sitemap_elements = root.findall('.//sm:sitemap/sm:loc', namespaces)
-            if sitemap_elements:
-                # This is a sitemap index - return child sitemap URLs
-                return [elem.text for elem in sitemap_elements if elem.text]
+            if stop.is_set() or result['urls_scanned'] >= self.max_urls_per_sitemap:
+                result['stopped_early'] = True
+                break
 
-            # Regular sitemap - extract <url><loc> elements
-            url_elements = root.findall('.//sm:url/sm:loc', namespaces)
-            urls = [elem.text for elem in url_elements if elem.text]
+        return result
 
-            # Fallback: try without namespace
-            if not urls:
-                url_elements = root.findall('.//url/loc')
-                urls = [elem.text for elem in url_elements if elem.text]
+    def rank_child_sitemaps(self, child_sitemaps: List[str]) -> List[str]:
+        """
+        Child sitemaps worth fetching: product/blog/... sitemaps dropped,
+        pages/misc sitemaps first, at most MAX_CHILD_SITEMAPS
+        """
+        def file_name(url: str) -> str:
+            return urlparse(url).path.rsplit('/', 1)[-1].lower().replace('sitemap', '')
+
+        kept = [url for url in child_sitemaps if not SKIP_CHILD_SITEMAP_RE.search(file_name(url))]
+        kept.sort(key=lambda url: 0 if PREFERRED_CHILD_SITEMAP_RE.search(file_name(url)) else 1)
 
-        except ET.ParseError:
-            pass
+        if self.debug_logger and len(kept) < len(child_sitemaps):
+            self.debug_logger.info(f"Skipped {len(child_sitemaps) - len(kept)} product/blog child sitemaps")
 
-        return urls
+        return kept[:MAX_CHILD_SITEMAPS]
 
     def filter_contact_pages(self, urls: List[str], keywords: List[str] = None) -> List[str]:
         """
@@ -155,61 +450,11 @@ class SitemapParser:
         Returns:
             Filtered list of URLs sorted by relevance (highest priority first)
         """
-        # Priority keywords (higher score = more relevant)
-        priority_keywords = {
-            # Priority 1 (100 points): Exact contact pages
-            'contact': 100, 'contactus': 100, 'contact-us': 100, 'kontakt': 100,
-            'contacto': 100, 'contatto': 100, 'get-in-touch': 100, 'reach-us': 100,
-            'contact-information': 100, 'contact-info': 100,
-
-            # Priority 2 (80 points): About & info pages
-            'about': 80, 'aboutus': 80, 'about-us': 80, 'our-story': 80,
-            'policies': 80, 'policy': 80, 'info': 80, 'information': 80,
-
-            # Priority 3 (60 points): Team & support
-            'team': 60, 'staff': 60, 'leadership': 60, 'management': 60,
-            'support': 60, 'help': 60, 'customer-service': 60, 'customer-support': 60,
-
-            # Priority 4 (40 points): Business pages
-            'quote': 40, 'quotes': 40, 'request-quote': 40, 'get-quote': 40,
-            'location': 40, 'locations': 40, 'find-us': 40, 'directions': 40,
-            'schedule': 40, 'appointment': 40, 'inquiry': 40, 'enquiry': 40,
-
-            # Priority 5 (20 points): Generic business terms
-            'office': 20, 'offices': 20, 'branch': 20, 'call': 20, 'phone': 20,
-            'email': 20, 'mail': 20, 'message': 20, 'feedback': 20,
-            'corporate': 20, 'business': 20, 'partner': 20, 'press': 20, 'media': 20,
-
-            # Low priority (10 points): Weak signals
-            'services': 10, 'faq': 10, 'helpdesk': 10, 'book': 10, 'reservation': 10
-        }
-
         scored_urls = []
         rejected = []
 
         for url in urls:
-            url_lower = url.lower()
-
-            # Skip product pages (very low priority for contact info)
-            if '/products/' in url_lower or '/collections/' in url_lower:
-                if self.debug_logger:
-                    self.debug_logger.debug(f"  ✗ SKIP: {url} (product/collection page)")
-                rejected.append(url)
-                continue
-
-            # Calculate priority score
-            score = 0
-            matched_keywords = []
-
-            for keyword, priority in priority_keywords.items():
-                if keyword in url_lower:
-                    score += priority
-                    matched_keywords.append(keyword)
-
-            # Bonus: /pages/ or /policies/ paths are more likely to have contact info
-            # (only if at least one keyword matched)
-            if score > 0 and ('/pages/' in url_lower or '/policies/' in url_lower):
-                score += 50
+            score, matched_keywords = score_url(url)
 
             if score > 0:
                 scored_urls.append((url, score, matched_keywords))
@@ -259,80 +504,43 @@ class SitemapParser:
             'sitemap_found': False
         }
 
-        # Try sitemap first
-        sitemap_content = self.fetch_sitemap(domain)
-
-        if sitemap_content:
+        # Try sitemap first (cached per domain)
+        cached, contact_pages = self._cache_get(domain, max_pages)
+        if cached:
             if self.debug_logger:
-                self.debug_logger.info("✓ Sitemap found!")
-
-            all_urls = self.parse_sitemap_xml(sitemap_content)
-            if self.debug_logger:
-                self.debug_logger.info(f"Parsed {len(all_urls)} URLs from sitemap")
+                self.debug_logger.info(f"Sitemap cache hit: {len(contact_pages) if contact_pages is not None else 'no'} contact pages")
+        else:
+            contact_pages, stopped_early = self._discover_contact_pages(domain, max_pages)
+            self._cache_set(domain, contact_pages, max_pages if stopped_early else None)
 
-            # Check if this is a sitemap index (contains child sitemaps)
-            # Handle URLs with query parameters (e.g., sitemap_products_1.xml?from=123&to=456)
-            child_sitemaps = [url for url in all_urls if 'sitemap' in url.lower() and '.xml' in url]
+        if contact_pages is not None:
+            contact_pages = list(contact_pages)
+            sitemap_count = len(contact_pages)
 
-            if child_sitemaps:
-                # This is a sitemap index - fetch ALL child sitemaps
+            # If not enough contact pages found, add pattern-based URLs as fallback
+            if len(contact_pages) < max_pages:
                 if self.debug_logger:
-                    self.debug_logger.info(f"Detected sitemap index with {len(child_sitemaps)} child sitemaps")
-
-                all_urls = []
-                for idx, child_sitemap_url in enumerate(child_sitemaps[:10], 1):  # Limit to 10 child sitemaps
-                    try:
-                        if self.debug_logger:
-                            self.debug_logger.info(f"  [{idx}/{min(len(child_sitemaps), 10)}] Fetching: {child_sitemap_url}")
-
-                        child_response = requests.get(child_sitemap_url, timeout=self.timeout)
-                        if child_response.status_code == 200:
-                            child_urls = self.parse_sitemap_xml(child_response.text)
-                            all_urls.extend(child_urls)
-
-                            if self.debug_logger:
-                                self.debug_logger.info(f"      Parsed {len(child_urls)} URLs")
-                    except Exception as e:
+                    self.debug_logger.info(f"\nOnly {len(contact_pages)} contact pages found in sitemap")
+                    self.debug_logger.info("Adding pattern-based URLs as supplement...")
+
+                pattern_urls = self._get_pattern_pages(domain)
+                # Add pattern URLs that aren't already in contact_pages
+                for url in pattern_urls:
+                    if url not in contact_pages and len(contact_pages) < max_pages:
+                        contact_pages.append(url)
                         if self.debug_logger:
-                            self.debug_logger.warning(f"      Failed to fetch: {str(e)}")
-                        continue
-
-                if self.debug_logger:
-                    self.debug_logger.info(f"\nTotal URLs from all child sitemaps: {len(all_urls)}")
+                            self.debug_logger.info(f"  + Added pattern URL: {url}")
 
-            if all_urls:
-                if self.debug_logger:
-                    self.debug_logger.info(f"\nFiltering {len(all_urls)} URLs by keywords...")
-
-                contact_pages = self.filter_contact_pages(all_urls)
-
-                # If not enough contact pages found, add pattern-based URLs as fallback
-                if len(contact_pages) < max_pages:
-                    if self.debug_logger:
-                        self.debug_logger.info(f"\nOnly {len(contact_pages)} contact pages found in sitemap")
-                        self.debug_logger.info("Adding pattern-based URLs as supplement...")
-
-                    pattern_urls = self._get_pattern_pages(domain)
-                    # Add pattern URLs that aren't already in contact_pages
-                    for url in pattern_urls:
-                        if url not in contact_pages and len(contact_pages) < max_pages:
-                            contact_pages.append(url)
-                            if self.debug_logger:
-                                self.debug_logger.info(f"  + Added pattern URL: {url}")
+            result['strategy'] = 'sitemap+pattern' if len(contact_pages) > sitemap_count else 'sitemap'
+            result['sitemap_found'] = True
+            result['pages'] = contact_pages[:max_pages]
 
-                result['strategy'] = 'sitemap+pattern' if len(contact_pages) > len(self.filter_contact_pages(all_urls)) else 'sitemap'
-                result['sitemap_found'] = True
-                result['pages'] = contact_pages[:max_pages]
-
-                if self.debug_logger:
-                    self.debug_logger.info(f"\nFinal selection (limited to {max_pages}): {len(result['pages'])} pages")
-                    for idx, page in enumerate(result['pages'], 1):
-                        self.debug_logger.info(f"  {idx}. {page}")
-
-                return result
-        else:
             if self.debug_logger:
-                self.debug_logger.info("✗ No sitemap found")
+                self.debug_logger.info(f"\nFinal selection (limited to {max_pages}): {len(result['pages'])} pages")
+                for idx, page in enumerate(result['pages'], 1):
+                    self.debug_logger.info(f"  {idx}. {page}")
+
+            return result
 
         # Fallback: Pattern guessing
         if self.debug_logger:
@@ -349,6 +557,79 @@ class SitemapParser:
 
         return result
 
+    def _discover_contact_pages(self, domain: str, max_pages: int) -> Tuple[Optional[List[str]], bool]:
+        """
+        Stream the domain's sitemap (child sitemaps concurrently) and collect contact pages
+
+        Returns:
+            (contact pages sorted by relevance or None if no usable sitemap,
+             True if scanning stopped early - enough strong candidates / URL limit)
+        """
+        response = self.open_sitemap(domain)
+
+        if response is None:
+            if self.debug_logger:
+                self.debug_logger.info("✗ No sitemap found")
+            return None, False
+
+        if self.debug_logger:
+            self.debug_logger.info("✓ Sitemap found!")
+
+        stop = threading.Event()
+        strong_counter = itertools.count(1)
+        try:
+            scan = self.scan_sitemap(response, max_pages, stop, strong_counter)
+        finally:
+            response.close()
+
+        scans = [scan]
+        if self.debug_logger:
+            self.debug_logger.info(f"Scanned {scan['urls_scanned']} URLs, {len(scan['candidates'])} candidates")
+
+        # Sitemap index - stream relevant child sitemaps in parallel
+        # (URLs with query parameters, e.g. sitemap_products_1.xml?from=123&to=456, are fine)
+        child_sitemaps = self.rank_child_sitemaps(scan['child_sitemaps'])
+        if child_sitemaps:
+            if self.debug_logger:
+                self.debug_logger.info(f"Detected sitemap index, fetching {len(child_sitemaps)} child sitemaps")
+
+            def scan_child(child_sitemap_url: str) -> Optional[Dict]:
+                if stop.is_set():
+                    return None
+                child_response = self._get(child_sitemap_url, stream=True)
+                if child_response is None or child_response.status_code != 200:
+                    self._close(child_response)
+                    if self.debug_logger:
+                        self.debug_logger.warning(f"  Failed to fetch: {child_sitemap_url}")
+                    return None
+                try:
+                    child_scan = self.scan_sitemap(child_response, max_pages, stop, strong_counter)
+                finally:
+                    child_response.close()
+                if self.debug_logger:
+                    self.debug_logger.info(f"  {child_sitemap_url}: scanned {child_scan['urls_scanned']} URLs, "
+                                           f"{len(child_scan['candidates'])} candidates")
+                return child_scan
+
+            with ThreadPoolExecutor(max_workers=len(child_sitemaps)) as executor:
+                scans.extend(child_scan for child_scan in executor.map(scan_child, child_sitemaps) if child_scan)
+
+        urls_scanned = sum(item['urls_scanned'] for item in scans)
+        stopped_early = stop.is_set() or any(item['stopped_early'] for item in scans)
+        if urls_scanned == 0:
+            return None, False
+
+        # Best first (stable - sitemap order among equal scores), duplicates dropped
+        candidates = [candidate for item in scans for candidate in item['candidates']]
+        candidates.sort(key=lambda candidate: candidate[1], reverse=True)
+        contact_pages = list(dict.fromkeys(url for url, score in candidates))
+
+        if self.debug_logger:
+            self.debug_logger.info(f"\n{len(contact_pages)} contact pages from {urls_scanned} sitemap URLs"
+                                   f"{' (stopped early)' if stopped_early else ''}")
+
+        return contact_pages, stopped_early
+
     def _get_pattern_pages(self, domain: str) -> List[str]:
         """
         Generate URLs using common patterns
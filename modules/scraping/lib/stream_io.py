@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Stream I/O - чтение входа и запись результатов кусками (constant memory)
+
+Для больших файлов (200k+ лидов) нельзя держать весь input и все результаты в памяти:
+- aiter_rows() - async iterator по строкам CSV / Parquet (чтение кусками в thread)
+- ChunkedCSVWriter - буферизует строки и дописывает в CSV каждые chunk_size строк
+  (при падении процесса на диске остаётся всё, что уже было сброшено)
+
+Использование:
+    async for row in aiter_rows('leads.parquet', chunksize=1000):
+        ...
+
+    with ChunkedCSVWriter('results/all_combined.csv', chunk_size=500) as writer:
+        writer.write(result_rows)
+"""
+
+import asyncio
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Union
+
+import pandas as pd
+
+
+async def aiter_rows(path: Union[str, Path], chunksize: int = 1000,
+                     columns: Optional[List[str]] = None) -> AsyncIterator[Dict]:
+    """
+    Строки CSV / Parquet файла как dicts (в памяти только один chunk)
+
+    Args:
+        path: .csv или .parquet
+        chunksize: Строк на одно чтение с диска
+        columns: Читать только эти колонки (None = все)
+    """
+    path = Path(path)
+
+    if path.suffix.lower() == '.parquet':
+        import pyarrow.parquet as pq
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns)
+    else:
+        batches = pd.read_csv(path, chunksize=chunksize, encoding='utf-8-sig', usecols=columns)
+
+    try:
+        while True:
+            # Чтение / парсинг chunk - блокирующая операция, не держим event loop
+            chunk = await asyncio.to_thread(next, batches, None)
+            if chunk is None:
+                break
+            if not isinstance(chunk, pd.DataFrame):
+                chunk = chunk.to_pandas()
+            for row in chunk.to_dict('records'):
+                yield row
+    finally:
+        if hasattr(batches, 'close'):
+            batches.close()
+
+
+class ChunkedCSVWriter:
+    """
+    CSV writer с буфером: строки дописываются в файл каждые chunk_size строк
+
+    Колонки фиксируются по первому сбросу (новые колонки в последующих строках
+    отбрасываются, отсутствующие - пустые).
+    """
+
+    def __init__(self, path: Union[str, Path], chunk_size: int = 500,
+                 columns: Optional[List[str]] = None, encoding: str = 'utf-8-sig'):
+        """
+        Args:
+            path: Выходной CSV (перезаписывается)
+            chunk_size: Сколько строк копить перед записью на диск
+            columns: Порядок колонок (None = по первой строке)
+        """
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.columns = list(columns) if columns else None
+        self.encoding = encoding
+
+        self.rows_written = 0
+        self._buffer: List[Dict] = []
+        self._file = None
+
+    def write(self, rows: List[Dict]):
+        """Добавить строки (на диск - когда накопится chunk_size)"""
+        self._buffer.extend(rows)
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Сбросить буфер на диск"""
+        if not self._buffer:
+            return
+
+        header = self._file is None
+        if header:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'w', newline='', encoding=self.encoding)
+            if self.columns is None:
+                self.columns = list(dict.fromkeys(key for row in self._buffer for key in row))
+
+        df = pd.DataFrame(self._buffer, columns=self.columns)
+        df.to_csv(self._file, header=header, index=False)
+        self._file.flush()
+
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -7,8 +7,13 @@ Text Utilities для обработки HTML и извлечения данны
 """
 
 import re
-from typing import List, Set
-from bs4 import BeautifulSoup
+from functools import lru_cache
+from typing import Iterable, List, Optional, Set, Tuple, Union
+
+try:
+    from .parsed_page import ParsedPage
+except ImportError:
+    from parsed_page import ParsedPage
 
 
 # Known valid TLDs (top 100 most common)
@@ -26,36 +31,53 @@ VALID_TLDS = {
     'eu', 'asia', 'africa',
 }
 
-
-def clean_html_to_text(html: str, max_length: int = None) -> str:
+# ---------------------------------------------------------------------------
+# Precompiled email extraction engine (patterns compiled once at import)
+# ---------------------------------------------------------------------------
+
+# Candidate: everything that looks like an email (even broken/concatenated ones).
+# Never spans whitespace - so scanning whitespace-delimited tokens gives the same
+# matches as scanning the whole text.
+EMAIL_CANDIDATE_RE = re.compile(
+    r'(?<![a-zA-Z0-9])([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,20})(?=\s|$|[^a-zA-Z0-9])'
+)
+EMAIL_FORMAT_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+# Digits at start followed by letters before @ ("102info@" -> "info@")
+NUMERIC_PREFIX_RE = re.compile(r'^[\d\-]+([a-z])')
+
+# Common false positives - one combined alternation instead of a loop of re.search
+EXCLUDE_EMAIL_RE = re.compile('|'.join([
+    r'@example\.',
+    r'@test\.',
+    r'@domain\.',
+    r'@email\.',
+    r'@yoursite\.',
+    r'@sentry\.io',
+    r'@2x\.png',
+    r'@3x\.png',
+    r'remove-this',  # spam trap
+    r'noreply@',
+    r'no-reply@',
+]))
+
+# TLD lengths, longest first (for de-concatenation via set lookups)
+_TLD_LENGTHS = sorted({len(tld) for tld in VALID_TLDS}, reverse=True)
+
+
+def clean_html_to_text(html: Union[str, ParsedPage], max_length: int = None) -> str:
     """
     Очистка HTML → чистый текст без тегов и скриптов
 
     Args:
-        html: Сырой HTML
+        html: Сырой HTML или ParsedPage (без повторного парсинга)
         max_length: Максимальная длина текста (для экономии токенов AI)
 
     Returns:
-        Чистый текст без тегов
+        Чистый текст без тегов (без script, style, nav, footer, header, aside, iframe)
     """
     try:
-        soup = BeautifulSoup(html, 'html.parser')
-
-        # Удаляем ненужные элементы (скрипты, стили, навигация)
-        for element in soup(['script', 'style', 'nav', 'footer', 'header', 'aside', 'iframe']):
-            element.decompose()
-
-        # Извлекаем текст
-        text = soup.get_text(separator=' ', strip=True)
-
-        # Очистка пробелов
-        text = ' '.join(text.split())
-
-        # Обрезка по длине (если нужно)
-        if max_length and len(text) > max_length:
-            text = text[:max_length]
-
-        return text
+        return ParsedPage.of(html).clean_text(max_length=max_length)
 
     except Exception as e:
         return ""
@@ -74,28 +96,11 @@ def is_valid_email(email: str) -> bool:
         return False
 
     # Exclude common false positives
-    exclude_patterns = [
-        r'@example\.',
-        r'@test\.',
-        r'@domain\.',
-        r'@email\.',
-        r'@yoursite\.',
-        r'@sentry\.io',
-        r'@2x\.png',
-        r'@3x\.png',
-        r'remove-this',  # spam trap
-        r'noreply@',
-        r'no-reply@',
-    ]
-
-    email_lower = email.lower()
-    for pattern in exclude_patterns:
-        if re.search(pattern, email_lower):
-            return False
+    if EXCLUDE_EMAIL_RE.search(email.lower()):
+        return False
 
     # Basic format validation
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    if not re.match(pattern, email):
+    if not EMAIL_FORMAT_RE.match(email):
         return False
 
     # Validate TLD
@@ -113,67 +118,83 @@ def is_valid_email(email: str) -> bool:
     return True
 
 
-def extract_emails(text: str) -> List[str]:
+def split_concatenated_tld(domain: str) -> str:
     """
-    FIXED: Extract emails with anti-concatenation protection
+    Remove text glued onto a valid TLD ("militex.chbewertungen" -> "militex.ch")
 
-    Changes:
-    - Improved regex with lookahead/lookbehind
-    - TLD validation
-    - Post-processing cleanup
-    - Numeric prefix removal
+    Single pass over the last label: if it is already a known TLD it is kept,
+    otherwise the longest known TLD that prefixes it wins (set lookups, no regex).
     """
-    # Step 1: Find potential emails with improved regex
-    # Capture everything that looks like email (even broken ones)
-    email_pattern = r'(?<![a-zA-Z0-9])([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,20})(?=\s|$|[^a-zA-Z0-9])'
+    head, dot, label = domain.rpartition('.')
+    if not dot or label in VALID_TLDS:
+        return domain
 
-    matches = re.findall(email_pattern, text)
+    for length in _TLD_LENGTHS:
+        if length < len(label) and label[:length] in VALID_TLDS:
+            return f'{head}.{label[:length]}'
 
-    # Step 2: Clean and validate each match
-    valid_emails = set()
+    return domain
 
-    for match in matches:
-        email = match.strip().lower()
 
-        # STEP 1: Remove numeric prefixes (e.g., "102info@" -> "info@")
-        # Pattern: digits at start followed by letters before @
-        email = re.sub(r'^[\d\-]+([a-z])', r'\1', email)
+def _normalize_email_candidate(candidate: str) -> Optional[str]:
+    """Clean one regex candidate (numeric prefix, concatenated TLD) and validate it"""
+    email = candidate.strip().lower()
 
-        # STEP 2: Find and extract valid TLD from potentially concatenated domain
-        # Look for known TLDs in the domain part
-        if '@' in email:
-            local, domain = email.rsplit('@', 1)
+    # Remove numeric prefixes (e.g., "102info@" -> "info@")
+    email = NUMERIC_PREFIX_RE.sub(r'\1', email)
 
-            # Try to find valid TLD in domain
-            # Check if domain ends with concatenated text after valid TLD
-            tld_found = None
-            for tld in sorted(VALID_TLDS, key=len, reverse=True):  # Check longer TLDs first
-                # Pattern: .tld followed by extra letters
-                pattern = rf'\.{re.escape(tld)}[a-z]+$'
-                if re.search(pattern, domain):
-                    # Remove extra letters after valid TLD
-                    domain = re.sub(pattern, f'.{tld}', domain)
-                    tld_found = tld
-                    break
+    # Strip text concatenated after a valid TLD
+    if '@' in email:
+        local, domain = email.rsplit('@', 1)
+        email = f'{local}@{split_concatenated_tld(domain)}'
 
-            # If no concatenation found, check if domain has valid TLD
-            if not tld_found:
-                # Check multi-part TLDs like .co.uk
-                for tld in VALID_TLDS:
-                    if domain.endswith(f'.{tld}'):
-                        tld_found = tld
-                        break
+    return email if is_valid_email(email) else None
 
-            email = f'{local}@{domain}'
 
-        # Validate
-        if is_valid_email(email):
-            valid_emails.add(email)
+@lru_cache(maxsize=16384)
+def _emails_in_token(token: str) -> Tuple[str, ...]:
+    """
+    Valid emails inside one whitespace-delimited token
 
-    return sorted(list(valid_emails))
+    Cached: the same tokens repeat across nested tags, pages and sites (footers).
+    """
+    emails = []
+    for candidate in EMAIL_CANDIDATE_RE.findall(token):
+        email = _normalize_email_candidate(candidate)
+        if email:
+            emails.append(email)
+    return tuple(emails)
+
+
+def _email_tokens(text: str) -> Iterable[str]:
+    """Whitespace-delimited tokens that can contain an email"""
+    if '@' not in text:
+        return ()
+    return (token for token in text.split() if '@' in token)
+
+
+def _emails_from_tokens(tokens: Iterable[str]) -> Set[str]:
+    emails = set()
+    for token in tokens:
+        emails.update(_emails_in_token(token))
+    return emails
+
+
+def extract_emails(text: str) -> List[str]:
+    """
+    FIXED: Extract emails with anti-concatenation protection
 
+    Changes:
+    - Improved regex with lookahead/lookbehind
+    - TLD validation
+    - Post-processing cleanup
+    - Numeric prefix removal
+    - Precompiled single-pass engine (token scan + cached candidate cleanup)
+    """
+    return sorted(_emails_from_tokens(_email_tokens(text)))
 
-def extract_emails_from_html(html: str) -> List[str]:
+
+def extract_emails_from_html(html: Union[str, ParsedPage]) -> List[str]:
     """
     FIXED: Extract emails from HTML with better parsing
 
@@ -181,37 +202,37 @@ def extract_emails_from_html(html: str) -> List[str]:
     - Better separator handling to prevent concatenation
     - Mailto links extracted separately
     - Duplicate removal
+    - Accepts ParsedPage (shared tree, no re-parsing)
+    - Overlapping tag texts (nested div/p/span) are deduplicated at token level,
+      so each distinct token is scanned once
     """
     all_emails = set()
+    page = None
 
     try:
-        soup = BeautifulSoup(html, 'html.parser')
+        page = ParsedPage.of(html)
 
         # Method 1: Extract from mailto: links FIRST (most reliable)
-        mailto_links = soup.find_all('a', href=re.compile(r'^mailto:', re.I))
-        for link in mailto_links:
-            email = link.get('href', '').replace('mailto:', '').split('?')[0].strip()
+        for href in page.mailto_hrefs():
+            email = href[len('mailto:'):].split('?')[0].strip()
             if is_valid_email(email):
                 all_emails.add(email.lower())
 
         # Method 2: Extract from text (with better separation)
-        # Add space after common tags to prevent concatenation
-        for tag in soup.find_all(['p', 'div', 'span', 'a', 'li', 'td']):
-            tag_text = tag.get_text()
-            if '@' in tag_text:
-                # Process tag separately to avoid concatenation with siblings
-                emails = extract_emails(tag_text)
-                all_emails.update(emails)
+        # Each tag is tokenized separately to avoid concatenation with siblings
+        tokens = set()
+        for tag_text in page.tag_texts(['p', 'div', 'span', 'a', 'li', 'td']):
+            tokens.update(_email_tokens(tag_text))
 
         # Method 3: Fallback - full text extraction
-        full_text = soup.get_text(separator=' ')
-        text_emails = extract_emails(full_text)
-        all_emails.update(text_emails)
+        tokens.update(_email_tokens(page.text()))
+
+        all_emails.update(_emails_from_tokens(tokens))
 
     except Exception as e:
         # Fallback to simple text extraction
         try:
-            simple_emails = extract_emails(html)
+            simple_emails = extract_emails(page.html if page else html)
             all_emails.update(simple_emails)
         except:
             pass
@@ -243,12 +264,12 @@ def extract_phones(text: str) -> List[str]:
     return sorted(list(phones))
 
 
-def detect_site_type(html: str) -> dict:
+def detect_site_type(html: Union[str, ParsedPage]) -> dict:
     """
     Определение типа сайта: статический или динамический (React/Vue/etc)
 
     Args:
-        html: HTML код страницы
+        html: HTML код страницы или ParsedPage
 
     Returns:
         {
@@ -258,8 +279,8 @@ def detect_site_type(html: str) -> dict:
         }
     """
     try:
-        soup = BeautifulSoup(html, 'html.parser')
-        text = soup.get_text().strip()
+        page = ParsedPage.of(html)
+        text = page.text().strip()
 
         indicators = []
 
@@ -268,16 +289,15 @@ def detect_site_type(html: str) -> dict:
             indicators.append('low_text_content')
 
         # Индикатор 2: Есть React/Vue root элементы
-        if soup.find('div', id='root') or soup.find('div', id='app'):
+        if page.count('div#root, div#app'):
             indicators.append('spa_root_element')
 
         # Индикатор 3: Много script тегов
-        scripts = soup.find_all('script')
-        if len(scripts) > 10:
+        if page.count('script') > 10:
             indicators.append('many_scripts')
 
         # Индикатор 4: Упоминание JS фреймворков в коде
-        html_lower = html.lower()
+        html_lower = page.html_lower
         if 'react' in html_lower or 'vue' in html_lower or 'angular' in html_lower:
             indicators.append('js_framework_detected')
 
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Test domain dedup: chains share one scrape, shared platforms (Facebook pages etc.) do not"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Add project root (for modules.*) and scraping module root (for lib.*)
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.domain_dedup import DomainDedup, dedup_key
+
+df = pd.DataFrame({
+    'name': ["Joe's Pizza", "Mary's Bakery", "Joe's Pizza (2)", 'Chain Austin', 'Chain Dallas', 'Google Site'],
+    'website': [
+        'https://www.facebook.com/JoesPizza',
+        'https://facebook.com/MarysBakery/',
+        'facebook.com/joespizza',
+        'https://chain.com/locations/austin',
+        'https://chain.com/locations/dallas',
+        'https://sites.google.com/view/joes-pizza',
+    ],
+})
+
+print("=== TESTING DOMAIN DEDUP ===\n")
+
+dedup = DomainDedup(df)
+scraped_keys = [dedup_key(website) for website in dedup.unique_df['website']]
+
+# Scraper output for the representatives: each page has its own email
+emails = {'facebook.com/joespizza': 'joe@joespizza.com', 'facebook.com/marysbakery': 'mary@marysbakery.com'}
+result_rows = [{'name': row['name'], 'website': row['website'], 'email': emails.get(dedup_key(row['website']), ''),
+                'scrape_status': 'success'} for _, row in dedup.unique_df.iterrows()]
+fanned = {row['name']: row['email'] for row in dedup.fan_out(result_rows)}
+
+test_cases = [
+    ("Two Facebook pages get separate keys",
+     dedup_key(df['website'][0]) != dedup_key(df['website'][1]), True),
+    ("Same Facebook page (www / case / trailing slash) shares a key",
+     dedup_key(df['website'][0]) == dedup_key(df['website'][2]), True),
+    ("Chain locations share one domain key",
+     dedup_key(df['website'][3]) == dedup_key(df['website'][4]), True),
+    ("Both Facebook pages are scraped",
+     'facebook.com/joespizza' in scraped_keys and 'facebook.com/marysbakery' in scraped_keys, True),
+    ("Scraped rows (one per Facebook page, one per chain, Google Site)", len(scraped_keys), 4),
+    ("Mary's Bakery keeps its own email", fanned.get("Mary's Bakery"), 'mary@marysbakery.com'),
+    ("Joe's Pizza keeps its own email", fanned.get("Joe's Pizza"), 'joe@joespizza.com'),
+    ("Joe's Pizza duplicate row gets Joe's email", fanned.get("Joe's Pizza (2)"), 'joe@joespizza.com'),
+    ("All input rows come back", len(dedup.fan_out(result_rows)), len(df)),
+]
+
+passed = 0
+failed = 0
+
+for description, result, expected in test_cases:
+    if result == expected:
+        status = "PASS"
+        passed += 1
+    else:
+        status = "FAIL"
+        failed += 1
+
+    print(f"[{status}] {description}")
+    print(f"      Expected: {expected}")
+    print(f"      Got:      {result}")
+    print()
+
+print("\n=== RESULTS ===")
+print(f"Passed: {passed}/{len(test_cases)}")
+print(f"Failed: {failed}/{len(test_cases)}")
+
+sys.exit(1 if failed else 0)
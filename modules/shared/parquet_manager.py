@@ -9,97 +9,331 @@ Provides unified interface for loading, saving, and updating Parquet files
 
 FEATURES:
 - Project-specific Parquet files
-- Incremental column addition
+- Incremental column addition (delta files keyed by place_id, stitched at read, compacted periodically)
 - Automatic merging on primary key
 - Efficient column-based loading
-- CSV export with filtering
+- CSV export with filtering (pushed down to Parquet row groups, streamed in batches)
 - Data integrity validation
+- Metadata-only stats (Parquet footers + row group statistics, cached in {project}_stats.json)
+- Part-file datasets for incremental writers (one Parquet part per flush)
+- Partitioned layout (hive directories, e.g. country=DE/niche=museum/): writes
+  rewrite only touched partitions, loads prune partition directories before reading
+- Atomic commits: every file is written to a temp file and renamed into place,
+  each write operation commits a numbered manifest version (hard-link snapshot,
+  rollback, read-only view of old versions); an interrupted write is rolled back
+- Concurrent writers: inter-process project lock ({project}.lock - shared for
+  readers, exclusive for writers) + optimistic version check (expected_version)
+
+LAYOUT:
+    data/projects/{project}.parquet                   - single file (default)
+    data/projects/{project}/table/{col}={value}/...   - partitioned (partition_by=[...])
+    data/projects/{project}/deltas/delta-*.parquet    - add_columns enrichments not yet compacted
+    data/projects/{project}/{dataset}/part-*.parquet  - append_part datasets
+    data/projects/{project}/_versions/v*/             - manifest.json + hard-link snapshot per version
 
 USAGE:
     from modules.shared.parquet_manager import ParquetManager
 
     manager = ParquetManager(project='soviet_boots_europe')
     df = manager.load()
-    manager.add_columns(new_data, key='place_id')
+    manager.add_columns(new_data, key='place_id')      # writes only new_data rows (delta file)
+    manager.compact()                                    # fold deltas into the base data
     manager.export_csv('exports/with_emails.csv', filters={'contact_status': 'with_emails'})
+
+    # Multi-country project - one directory per country / niche
+    manager = ParquetManager(project='militaria_europe', partition_by=['country', 'niche'])
+    manager.write_partitions(df_germany)                  # only country=Germany/* is rewritten
+    df = manager.load(partitions={'country': ['Germany', 'Austria']})
+    ParquetManager(project='soviet_boots_europe').repartition(['country'])   # migrate single file
+
+    # Versions - parallel processes may call add_columns, writes are serialized by the project lock
+    version = manager.version
+    manager.save(df_cleaned, expected_version=version)   # ConcurrentWriteError if another writer committed
+    old = manager.snapshot(version).load()                # read-only view of an old version
+    manager.rollback(version)
+
+    # Incremental writer (e.g. scraping results) - no CSV round-trip
+    manager.append_part(df_batch, dataset='scraping_results')
+    dataset = manager.open_dataset('scraping_results')   # lazy pyarrow Dataset
 """
 
+import os
+import re
+import copy
+import shutil
+import threading
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
 import pyarrow.parquet as pq
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Sequence, Tuple
+from urllib.parse import quote, unquote
+from contextlib import contextmanager
 import json
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Directory name of a null partition value (pyarrow hive default)
+PARTITION_NULL = '__HIVE_DEFAULT_PARTITION__'
+
+# Parquet schema metadata key of a delta file (merge key + update mode)
+DELTA_METADATA_KEY = b'parquet_manager_delta'
+
+# Version directories: data/projects/{project}/_versions/v000001/
+VERSION_DIR_PATTERN = re.compile(r'v(\d{6})$')
+
+# Present in _versions/ while a write operation runs - left behind by a crashed writer
+WRITE_MARKER = 'WRITE_IN_PROGRESS'
+
+
+class ConcurrentWriteError(RuntimeError):
+    """Project was committed by another writer after the version the caller expected"""
+
 
 class ParquetManager:
     """
     Central data access layer for project-specific Parquet files
 
     Manages single source of truth in /data/projects/{project}.parquet
+    (or /data/projects/{project}/table/ for partitioned projects)
     All enrichment scripts should use this instead of direct file I/O
     """
 
-    def __init__(self, project: str):
+    def __init__(self, project: str, partition_by: Optional[Sequence[str]] = None,
+                 compact_after_deltas: int = 20, stats_sidecar: bool = True,
+                 keep_versions: Optional[int] = 10):
         """
         Initialize ParquetManager for a specific project
 
         Args:
             project: Project name (e.g., 'soviet_boots_europe', 'hvac_usa')
+            partition_by: Partition columns for a new partitioned project (e.g., ['country', 'niche']).
+                          Existing partitioned projects are detected from metadata.
+            compact_after_deltas: add_columns compacts once this many delta files exist
+            stats_sidecar: Cache get_stats() in {project}_stats.json (refreshed on every write)
+            keep_versions: Manifest versions kept for snapshot() / rollback() (None = all)
         """
         self.project = project
         self.base_dir = Path(__file__).parent.parent.parent / 'data'
-        self.projects_dir = self.base_dir / 'projects'
         self.exports_dir = self.base_dir / 'exports'
-        self.file_path = self.projects_dir / f'{project}.parquet'
-        self.metadata_path = self.projects_dir / f'{project}_metadata.json'
+        self._set_paths(self.base_dir / 'projects')
+        self.stats_sidecar = stats_sidecar
+        self.compact_after_deltas = compact_after_deltas
+        self.keep_versions = keep_versions
+
+        # Snapshot views (snapshot()) are read-only
+        self.read_only = False
+        self._thread_lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_exclusive = False
+        self._operation = None
 
         # Ensure directories exist
         self.projects_dir.mkdir(parents=True, exist_ok=True)
         self.exports_dir.mkdir(parents=True, exist_ok=True)
 
+        stored = self._stored_partition_by()
+        if partition_by and stored and list(partition_by) != stored:
+            raise ValueError(f"Project '{self.project}' is partitioned by {stored}, not {list(partition_by)} "
+                             f"(use repartition() to change)")
+        if partition_by and not stored and self.file_path.exists():
+            raise ValueError(f"Project '{self.project}' is a single file - "
+                             f"migrate with ParquetManager('{self.project}').repartition({list(partition_by)})")
+        self.partition_by: List[str] = list(partition_by) if partition_by else stored
+
+    def _set_paths(self, projects_dir: Path):
+        self.projects_dir = projects_dir
+        self.file_path = projects_dir / f'{self.project}.parquet'
+        self.metadata_path = projects_dir / f'{self.project}_metadata.json'
+        self.stats_path = projects_dir / f'{self.project}_stats.json'
+        self.lock_path = projects_dir / f'{self.project}.lock'
+        self.datasets_dir = projects_dir / self.project
+        self.table_dir = self.datasets_dir / 'table'
+        self.deltas_dir = self.datasets_dir / 'deltas'
+        self.versions_dir = self.datasets_dir / '_versions'
+
+    @property
+    def is_partitioned(self) -> bool:
+        return bool(self.partition_by)
+
     def exists(self) -> bool:
-        """Check if project Parquet file exists"""
+        """Check if project Parquet file (or partitioned table) exists"""
+        if self.is_partitioned:
+            return self.table_dir.exists() and next(self.table_dir.rglob('part-*.parquet'), None) is not None
         return self.file_path.exists()
 
-    def load(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    def load(self, columns: Optional[List[str]] = None,
+             partitions: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
         """
         Load data with optional column filtering
 
         Args:
             columns: List of column names to load (None = all columns)
+            partitions: Partition filter (partitioned projects), value or list of values per column.
+                        Non-matching partition directories are never opened.
 
         Returns:
-            DataFrame with requested columns
+            DataFrame with requested columns (partition columns are strings), add_columns deltas applied
 
         Example:
             df = manager.load(columns=['name', 'website', 'emails'])
+            df = manager.load(partitions={'country': ['Germany', 'Austria'], 'niche': 'museum'})
         """
-        if not self.exists():
-            raise FileNotFoundError(f"Project '{self.project}' not found at {self.file_path}")
+        with self._lock():
+            if not self.exists():
+                location = self.table_dir if self.is_partitioned else self.file_path
+                raise FileNotFoundError(f"Project '{self.project}' not found at {location}")
+
+            deltas = self.list_deltas()
+            if not deltas:
+                return self._load_base(columns, partitions)
+
+            # Base columns + merge keys of the deltas; delta-only columns come from the deltas
+            read_columns = columns
+            if columns:
+                base_columns = set(self._base_schema().names)
+                keys = [info['key'] for info in map(self._delta_info, deltas)]
+                read_columns = [col for col in columns if col in base_columns]
+                read_columns += [key for key in dict.fromkeys(keys) if key in base_columns and key not in read_columns]
+
+            df = self._apply_deltas(self._load_base(read_columns, partitions), self._read_deltas(deltas, columns))
+            return df[columns] if columns else df
+
+    def _load_base(self, columns: Optional[List[str]] = None,
+                   partitions: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """Base data without deltas"""
+        if self.is_partitioned:
+            files = self.partition_files(partitions)
+            if not files:
+                return pd.DataFrame(columns=columns or [])
+            return self._open_table(files).to_table(columns=columns).to_pandas()
+
+        if partitions:
+            raise ValueError(f"Project '{self.project}' is not partitioned - partitions filter is not supported")
 
         if columns:
             return pd.read_parquet(self.file_path, columns=columns)
         return pd.read_parquet(self.file_path)
 
-    def save(self, df: pd.DataFrame, update_metadata: bool = True):
+    def save(self, df: pd.DataFrame, update_metadata: bool = True,
+             expected_version: Optional[int] = None):
         """
         Save entire dataframe (overwrites existing file)
 
+        Partitioned projects: every partition of df is rewritten, partitions
+        missing from df are deleted.
+
         Args:
             df: DataFrame to save
             update_metadata: Whether to update metadata file
+            expected_version: Version df was derived from (manager.version before load()).
+                              Raises ConcurrentWriteError if another writer committed since.
         """
-        df.to_parquet(self.file_path, compression='snappy', index=False)
+        with self._write('save', expected_version):
+            if self.is_partitioned:
+                written = self._write_partitions(df)
+                for part_dir in {path.parent for path in self.partition_files()} - written:
+                    self._remove_partition(part_dir)
+            else:
+                self._replace_parquet(df, self.file_path)
 
-        if update_metadata:
-            self._update_metadata(df)
+            # df is the complete new state - pending deltas are obsolete
+            for path in self.list_deltas():
+                path.unlink()
+
+            if update_metadata:
+                self._update_metadata(None if self.is_partitioned else df)
+
+    def write_partitions(self, df: pd.DataFrame, update_metadata: bool = True,
+                         expected_version: Optional[int] = None) -> int:
+        """
+        Rewrite only the partitions present in df (all other partitions are not touched)
+
+        df must hold the complete new content of each of its partitions.
+        expected_version: see save()
+
+        Returns:
+            Number of partitions written
+
+        Example:
+            manager.write_partitions(df_germany)   # replaces country=Germany/*
+        """
+        if not self.is_partitioned:
+            raise ValueError(f"Project '{self.project}' is not partitioned")
+
+        with self._write('write_partitions', expected_version):
+            written = self._write_partitions(df)
+            self._drop_delta_keys(df)
+            if update_metadata:
+                self._update_metadata()
+            return len(written)
+
+    def partition_files(self, partitions: Optional[Dict[str, Any]] = None) -> List[Path]:
+        """
+        Part files of a partitioned project, pruned by partition values (directory listing only)
+
+        Args:
+            partitions: {column: value or list of values}; columns not listed match any value
+        """
+        partitions = partitions or {}
+        unknown = set(partitions) - set(self.partition_by)
+        if unknown:
+            raise ValueError(f"Not partition columns: {sorted(unknown)} (partitioned by {self.partition_by})")
+
+        dirs = [self.table_dir]
+        for col in self.partition_by:
+            if col in partitions:
+                wanted = partitions[col]
+                values = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+                dirs = [d / f'{col}={self._encode_partition_value(value)}' for d in dirs for value in values]
+                dirs = [d for d in dirs if d.is_dir()]
+            else:
+                dirs = [child for d in dirs for child in sorted(d.glob(f'{col}=*')) if child.is_dir()]
+
+        return [path for d in dirs for path in sorted(d.glob('part-*.parquet'))]
+
+    def repartition(self, partition_by: Optional[Sequence[str]]):
+        """
+        Rewrite the project with another layout (loads all data into memory)
+
+        Args:
+            partition_by: New partition columns (None / [] = single file)
+
+        Example:
+            ParquetManager(project='soviet_boots_europe').repartition(['country'])
+        """
+        with self._write('repartition'):
+            df = self.load()
+            old_table = self.table_dir.with_name('table.old')
+            if self.table_dir.exists():
+                self.table_dir.rename(old_table)
+
+            self.partition_by = list(partition_by) if partition_by else []
+            self.save(df)
+
+            if self.is_partitioned:
+                self.file_path.unlink(missing_ok=True)
+            if old_table.exists():
+                shutil.rmtree(old_table)
 
     def add_columns(self, new_data: pd.DataFrame, key: str = 'place_id',
                     update_existing: bool = True):
         """
         Add new columns to existing data (incremental enrichment)
 
+        Only new_data is written (a delta file keyed by `key`, cost O(len(new_data))).
+        load() stitches deltas onto the base data in write order; once
+        compact_after_deltas deltas exist they are folded in by compact().
+        Rows whose key is not in the project are ignored (left merge).
+        Safe to call from parallel processes: the project lock serializes the
+        writes, every call adds its own delta (no update is lost).
+
         Args:
             new_data: DataFrame with new columns to add
             key: Column name to merge on (must exist in both DataFrames)
@@ -115,15 +349,125 @@ class ParquetManager:
             })
             manager.add_columns(scraping_data, key='place_id')
         """
-        if not self.exists():
-            # First time - just save new data
-            self.save(new_data)
-            return
+        with self._write('add_columns'):
+            if not self.exists():
+                # First time - just save new data
+                self.save(new_data)
+                return
+
+            if key not in new_data.columns:
+                raise ValueError(f"Key column '{key}' not found in new data")
+
+            # Partition values are fixed by the directory layout
+            new_data = new_data.drop(columns=[col for col in self.partition_by if col in new_data.columns and col != key])
+            self._write_delta(new_data.drop_duplicates(subset=[key], keep='last'), key, update_existing)
+
+            if len(self.list_deltas()) >= self.compact_after_deltas:
+                self.compact()
+            else:
+                self._update_metadata()
+
+    def compact(self) -> int:
+        """
+        Fold add_columns deltas into the base data
+
+        Single file: one rewrite. Partitioned: only partitions holding delta keys
+        are rewritten. Deltas are deleted last (re-applying a delta to compacted
+        data is a no-op), so an interrupted compaction loses nothing.
+
+        Returns:
+            Number of folded delta files
+        """
+        with self._write('compact'):
+            deltas = self.list_deltas()
+            if not deltas:
+                return 0
+
+            if self.is_partitioned:
+                delta_keys: Dict[str, set] = {}
+                for path in deltas:
+                    key = self._delta_info(path)['key']
+                    delta_keys.setdefault(key, set()).update(pq.read_table(path, columns=[key]).column(key).to_pylist())
+
+                # Key -> partition lookup reads only key + partition columns
+                index = self._load_base(columns=list(delta_keys) + self.partition_by)
+                touched = pd.Series(False, index=index.index)
+                for key, keys in delta_keys.items():
+                    touched |= index[key].isin(keys)
+
+                for values in index.loc[touched, self.partition_by].drop_duplicates().itertuples(index=False, name=None):
+                    self._write_partition(values, self.load(partitions=dict(zip(self.partition_by, values))))
+            else:
+                self._replace_parquet(self.load(), self.file_path)
+
+            for path in deltas:
+                path.unlink()
+            self._update_metadata()
+            return len(deltas)
+
+    def list_deltas(self) -> List[Path]:
+        """add_columns delta files in write order"""
+        return sorted(self.deltas_dir.glob('delta-*.parquet'))
+
+    def _write_delta(self, df: pd.DataFrame, key: str, update_existing: bool,
+                     path: Optional[Path] = None) -> Path:
+        if path is None:
+            deltas = self.list_deltas()
+            number = self._part_number(deltas[-1], prefix='delta') + 1 if deltas else 0
+            path = self.deltas_dir / f'delta-{number:06d}.parquet'
+        self.deltas_dir.mkdir(parents=True, exist_ok=True)
+
+        table = pa.Table.from_pandas(self._strings_for_objects(df), preserve_index=False)
+        info = json.dumps({'key': key, 'update_existing': update_existing})
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), DELTA_METADATA_KEY: info})
+
+        tmp_path = path.with_suffix('.parquet.tmp')
+        pq.write_table(table, tmp_path, compression='snappy')
+        tmp_path.replace(path)
+        return path
+
+    @staticmethod
+    def _delta_info(path: Path) -> Dict[str, Any]:
+        metadata = pq.read_schema(path).metadata or {}
+        return json.loads(metadata[DELTA_METADATA_KEY])
 
-        # Load existing data
-        existing = self.load()
+    def _read_deltas(self, deltas: List[Path], columns: Optional[List[str]] = None) -> List[Tuple[Dict, pd.DataFrame]]:
+        """Delta files (only requested columns + key) as [(info, DataFrame)] in write order"""
+        loaded = []
+        for path in deltas:
+            info = self._delta_info(path)
+            wanted = [col for col in pq.read_schema(path).names
+                      if col != info['key'] and (columns is None or col in columns)]
+            if wanted:
+                loaded.append((info, pq.read_table(path, columns=[info['key']] + wanted).to_pandas()))
+        return loaded
 
-        # Merge with new data
+    def _apply_deltas(self, df: pd.DataFrame, deltas: List[Tuple[Dict, pd.DataFrame]]) -> pd.DataFrame:
+        """Stitch delta columns onto base rows (hash join on the delta key, in write order)"""
+        for info, delta in deltas:
+            if info['key'] in df.columns and not df.empty:
+                df = self._merge_columns(df, delta, info['key'], info['update_existing'])
+        return df
+
+    def _drop_delta_keys(self, df: pd.DataFrame):
+        """Remove rows of df's keys from deltas (df replaced those rows - deltas must not override it)"""
+        for path in self.list_deltas():
+            info = self._delta_info(path)
+            if info['key'] not in df.columns:
+                continue
+            delta = pq.read_table(path).to_pandas()
+            keep = ~delta[info['key']].isin(df[info['key']])
+            if keep.all():
+                continue
+            if keep.any():
+                self._write_delta(delta[keep], info['key'], info['update_existing'], path=path)
+            else:
+                path.unlink()
+
+    @staticmethod
+    def _merge_columns(existing: pd.DataFrame, new_data: pd.DataFrame, key: str,
+                       update_existing: bool) -> pd.DataFrame:
+        """Left-merge new_data columns into existing on key"""
         merged = existing.merge(new_data, on=key, how='left', suffixes=('', '_new'))
 
         # Handle column updates
@@ -143,14 +487,19 @@ class ParquetManager:
                 # Drop temporary column
                 merged.drop(new_col, axis=1, inplace=True)
 
-        # Save updated data
-        self.save(merged)
+        return merged
 
     def export_csv(self, output: str, columns: Optional[List[str]] = None,
-                   filters: Optional[Dict[str, Any]] = None) -> int:
+                   filters: Optional[Dict[str, Any]] = None, batch_size: int = 65536) -> int:
         """
         Export filtered data to CSV
 
+        Filters become pyarrow dataset expressions: row groups whose Parquet
+        statistics cannot match are skipped before decoding, matching rows are
+        streamed to the CSV in batches (memory ~ batch_size rows, not the project).
+        Filters on columns changed by pending add_columns deltas are applied
+        per batch after stitching.
+
         Args:
             output: Output filename (relative to /data/exports/ or absolute path)
             columns: Columns to include in export (None = all)
@@ -159,6 +508,7 @@ class ParquetManager:
                     - {'contact_status': 'with_emails'}
                     - {'relevance_score': '>=7'}
                     - {'has_website': True}
+            batch_size: Rows per scanned batch / CSV write
 
         Returns:
             Number of rows exported
@@ -171,85 +521,810 @@ class ParquetManager:
                 filters={'contact_status': 'with_emails', 'relevance_score': '>=7'}
             )
         """
-        # Load data
-        df = self.load(columns=columns)
+        with self._lock():
+            if not self.exists():
+                location = self.table_dir if self.is_partitioned else self.file_path
+                raise FileNotFoundError(f"Project '{self.project}' not found at {location}")
+
+            # Equality filters on partition columns prune partition directories
+            partitions = {
+                col: condition for col, condition in (filters or {}).items()
+                if col in self.partition_by and not (isinstance(condition, str) and condition[:1] in ('<', '>'))
+            }
+            dataset = self._base_dataset(partitions or None)
+            schema = dataset.schema
+
+            deltas = self._read_deltas(self.list_deltas())
+            delta_columns = list(dict.fromkeys(col for info, delta in deltas for col in delta.columns if col != info['key']))
+            output_columns = list(columns) if columns else schema.names + [col for col in delta_columns if col not in schema.names]
 
-        # Apply filters
-        if filters:
-            for col, condition in filters.items():
-                if col not in df.columns:
+            # Filters -> one pushed-down expression + residual pandas filters (delta columns / untranslatable)
+            expression = None
+            residual = {}
+            for col, condition in (filters or {}).items():
+                if col not in schema.names and col not in delta_columns:
                     print(f"Warning: Column '{col}' not found, skipping filter")
                     continue
-
-                if isinstance(condition, str) and condition.startswith('>='):
-                    threshold = float(condition[2:])
-                    df = df[df[col] >= threshold]
-                elif isinstance(condition, str) and condition.startswith('<='):
-                    threshold = float(condition[2:])
-                    df = df[df[col] <= threshold]
-                elif isinstance(condition, str) and condition.startswith('>'):
-                    threshold = float(condition[1:])
-                    df = df[df[col] > threshold]
-                elif isinstance(condition, str) and condition.startswith('<'):
-                    threshold = float(condition[1:])
-                    df = df[df[col] < threshold]
-                elif isinstance(condition, bool):
-                    df = df[df[col] == condition]
+                filter_expression = None if col in delta_columns else self._filter_expression(schema.field(col), condition)
+                if filter_expression is None:
+                    residual[col] = condition
                 else:
-                    df = df[df[col] == condition]
+                    expression = filter_expression if expression is None else expression & filter_expression
 
-        # Determine output path
-        if Path(output).is_absolute():
-            output_path = Path(output)
-        else:
-            output_path = self.exports_dir / output
+            keys = [info['key'] for info, _ in deltas]
+            read_columns = [col for col in dict.fromkeys(output_columns + list(residual) + keys) if col in schema.names]
+
+            # Determine output path
+            if Path(output).is_absolute():
+                output_path = Path(output)
+            else:
+                output_path = self.exports_dir / output
+
+            # Ensure parent directory exists
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+
+            # Export batch by batch
+            exported = 0
+            with open(output_path, 'w', encoding='utf-8', newline='') as f:
+                scanner = dataset.scanner(columns=read_columns, filter=expression, batch_size=batch_size)
+                for batch in scanner.to_batches():
+                    if batch.num_rows == 0:
+                        continue
+                    df = self._apply_filters(self._apply_deltas(batch.to_pandas(), deltas), residual)
+                    if df.empty:
+                        continue
+                    df[output_columns].to_csv(f, header=exported == 0, index=False)
+                    exported += len(df)
+
+                if exported == 0:
+                    pd.DataFrame(columns=output_columns).to_csv(f, index=False)
 
-        # Ensure parent directory exists
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+            return exported
 
-        # Export
-        df.to_csv(output_path, index=False, encoding='utf-8')
+    @staticmethod
+    def _filter_expression(field: pa.Field, condition: Any) -> Optional[ds.Expression]:
+        """export_csv filter -> pyarrow expression (None if it cannot be evaluated by pyarrow)"""
+        column = ds.field(field.name)
+        if isinstance(condition, str) and condition[:1] in ('<', '>'):
+            operator = condition[:2] if condition[1:2] == '=' else condition[:1]
+            if not (pa.types.is_integer(field.type) or pa.types.is_floating(field.type)):
+                return None
+            threshold = float(condition[len(operator):])
+            return {'>=': column >= threshold, '<=': column <= threshold,
+                    '>': column > threshold, '<': column < threshold}[operator]
 
-        return len(df)
+        # Equality: pandas == between a string and a non-string column matches nothing - leave such filters to pandas
+        if pa.types.is_dictionary(field.type):
+            return None
+        if isinstance(condition, str) != (pa.types.is_string(field.type) or pa.types.is_large_string(field.type)):
+            return None
+        try:
+            value = pa.scalar(condition).cast(field.type)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+            return None
+        return column == value
 
-    def get_stats(self) -> Dict[str, Any]:
+    @staticmethod
+    def _apply_filters(df: pd.DataFrame, filters: Dict[str, Any]) -> pd.DataFrame:
+        """export_csv filters as pandas masks"""
+        for col, condition in filters.items():
+            if isinstance(condition, str) and condition.startswith('>='):
+                threshold = float(condition[2:])
+                df = df[df[col] >= threshold]
+            elif isinstance(condition, str) and condition.startswith('<='):
+                threshold = float(condition[2:])
+                df = df[df[col] <= threshold]
+            elif isinstance(condition, str) and condition.startswith('>'):
+                threshold = float(condition[1:])
+                df = df[df[col] > threshold]
+            elif isinstance(condition, str) and condition.startswith('<'):
+                threshold = float(condition[1:])
+                df = df[df[col] < threshold]
+            elif isinstance(condition, bool):
+                df = df[df[col] == condition]
+            else:
+                df = df[df[col] == condition]
+        return df
+
+    def dataset_dir(self, dataset: str) -> Path:
+        """Directory with part files of a dataset: /data/projects/{project}/{dataset}/"""
+        return self.datasets_dir / dataset
+
+    def list_parts(self, dataset: str) -> List[Path]:
+        """Part files of a dataset in write order"""
+        return sorted(self.dataset_dir(dataset).glob('part-*.parquet'))
+
+    def append_part(self, df: pd.DataFrame, dataset: str, part_number: Optional[int] = None) -> Optional[Path]:
+        """
+        Write a DataFrame as a new part file of a dataset (existing parts are not touched)
+
+        Datasets are not part of the manifest versions (append-only, see remove_parts_from).
+
+        Args:
+            df: Rows to append
+            dataset: Dataset name (e.g., 'scraping_results')
+            part_number: Explicit part number (None = next after the last existing part)
+
+        Returns:
+            Path of the written part (None if df is empty)
+
+        Example:
+            for batch in batches:
+                manager.append_part(batch, dataset='scraping_results')
+        """
+        if df.empty:
+            return None
+
+        part_dir = self.dataset_dir(dataset)
+        part_dir.mkdir(parents=True, exist_ok=True)
+
+        # Lock: parallel appenders must not pick the same part number
+        with self._lock(exclusive=True):
+            if part_number is None:
+                part_number = self.next_part_number(dataset)
+
+            part_path = part_dir / f'part-{part_number:06d}.parquet'
+            tmp_path = part_path.with_suffix('.parquet.tmp')
+            self._strings_for_objects(df).to_parquet(tmp_path, compression='snappy', index=False)
+            tmp_path.replace(part_path)
+
+        return part_path
+
+    def next_part_number(self, dataset: str) -> int:
+        """Number the next append_part(part_number=None) would get (after the last existing part)"""
+        parts = self.list_parts(dataset)
+        return self._part_number(parts[-1]) + 1 if parts else 0
+
+    def remove_parts_from(self, dataset: str, part_number: int) -> int:
+        """
+        Delete parts with number >= part_number (uncommitted parts of an interrupted writer)
+
+        Returns:
+            Number of deleted part files
+        """
+        removed = 0
+        for part_path in self.list_parts(dataset):
+            if self._part_number(part_path) >= part_number:
+                part_path.unlink()
+                removed += 1
+        return removed
+
+    def open_dataset(self, dataset: str) -> ds.Dataset:
+        """
+        Lazy handle over all parts of a dataset (nothing is read until scan / to_table)
+
+        Example:
+            dataset = manager.open_dataset('scraping_results')
+            df = dataset.to_table(columns=['website', 'email']).to_pandas()
+        """
+        parts = [str(path) for path in self.list_parts(dataset)]
+        if not parts:
+            raise FileNotFoundError(f"Dataset '{dataset}' of project '{self.project}' has no parts")
+
+        # Parts written by separate flushes may differ (int vs float, missing columns)
+        schema = pa.unify_schemas([pq.read_schema(path) for path in parts], promote_options='permissive')
+        return ds.dataset(parts, schema=schema, format='parquet')
+
+    def load_dataset(self, dataset: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Load all parts of a dataset into a DataFrame"""
+        return self.open_dataset(dataset).to_table(columns=columns).to_pandas()
+
+    @staticmethod
+    def _part_number(part_path: Path, prefix: str = 'part') -> int:
+        match = re.match(rf'{prefix}-(\d+)', part_path.name)
+        return int(match.group(1)) if match else -1
+
+    @staticmethod
+    def _strings_for_objects(df: pd.DataFrame) -> pd.DataFrame:
+        # Object columns -> string, so an all-None column in one file does not become a null-typed column
+        object_columns = df.select_dtypes(include='object').columns
+        return df.astype({col: 'string' for col in object_columns})
+
+    @staticmethod
+    def _encode_partition_value(value) -> str:
+        if value is None or (not isinstance(value, str) and pd.isna(value)):
+            return PARTITION_NULL
+        return quote(str(value), safe='')
+
+    def _partition_dir(self, values: Sequence) -> Path:
+        path = self.table_dir
+        for col, value in zip(self.partition_by, values):
+            path = path / f'{col}={self._encode_partition_value(value)}'
+        return path
+
+    def _write_partitions(self, df: pd.DataFrame) -> set:
+        """Write every partition of df, returns set of written partition directories"""
+        missing = [col for col in self.partition_by if col not in df.columns]
+        if missing:
+            raise ValueError(f"Partition columns missing from data: {missing}")
+
+        written = set()
+        for values, group in df.groupby(self.partition_by, dropna=False, sort=False):
+            values = values if isinstance(values, tuple) else (values,)
+            written.add(self._write_partition(values, group))
+        return written
+
+    def _write_partition(self, values: Sequence, df: pd.DataFrame) -> Path:
+        """Replace the content of one partition directory"""
+        part_dir = self._partition_dir(values)
+        part_dir.mkdir(parents=True, exist_ok=True)
+        old_parts = list(part_dir.glob('part-*.parquet'))
+
+        # Partition values live in the directory names
+        data = self._strings_for_objects(df.drop(columns=[col for col in self.partition_by if col in df.columns]))
+        part_path = part_dir / 'part-000000.parquet'
+        tmp_path = part_path.with_suffix('.parquet.tmp')
+        data.to_parquet(tmp_path, compression='snappy', index=False)
+
+        for path in old_parts:
+            if path != part_path:
+                path.unlink()
+        tmp_path.replace(part_path)
+        return part_dir
+
+    def _remove_partition(self, part_dir: Path):
+        """Delete a partition directory and its now-empty parents"""
+        shutil.rmtree(part_dir, ignore_errors=True)
+        parent = part_dir.parent
+        while parent != self.table_dir and parent.exists() and not any(parent.iterdir()):
+            parent.rmdir()
+            parent = parent.parent
+
+    def _open_table(self, files: List[Path]) -> ds.Dataset:
+        """Dataset over part files of a partitioned project (partition columns as strings)"""
+        partition_schema = pa.schema([(col, pa.string()) for col in self.partition_by])
+        schema = pa.unify_schemas([pq.read_schema(path) for path in files] + [partition_schema],
+                                  promote_options='permissive')
+        return ds.dataset([str(path) for path in files], schema=schema, format='parquet',
+                          partitioning=ds.HivePartitioning(partition_schema, null_fallback=PARTITION_NULL),
+                          partition_base_dir=str(self.table_dir))
+
+    def _stored_partition_by(self) -> List[str]:
+        if not self.metadata_path.exists():
+            return []
+        try:
+            with open(self.metadata_path, encoding='utf-8') as f:
+                return json.load(f).get('partition_by') or []
+        except (OSError, ValueError):
+            return []
+
+    def _base_dataset(self, partitions: Optional[Dict[str, Any]] = None) -> ds.Dataset:
+        """Lazy dataset over the base data (partitioned: pruned by partition values)"""
+        if self.is_partitioned:
+            files = self.partition_files(partitions)
+            if not files:
+                return ds.dataset(pa.table({col: pa.array([], pa.string()) for col in self.partition_by}))
+            return self._open_table(files)
+        return ds.dataset(str(self.file_path), format='parquet')
+
+    def _base_schema(self) -> pa.Schema:
+        """Schema of the base data (Parquet footers only)"""
+        if self.is_partitioned:
+            files = self.partition_files()
+            return self._open_table(files).schema if files else pa.schema([])
+        return pq.read_schema(self.file_path)
+
+    def _files(self) -> List[Path]:
+        """All data files of the project"""
+        if self.is_partitioned:
+            return self.partition_files()
+        return [self.file_path] if self.file_path.exists() else []
+
+    def get_stats(self, use_cache: bool = True) -> Dict[str, Any]:
         """
         Get statistics about the project data
 
+        Computed from Parquet footers and row group statistics - no data page is
+        decoded. Cached in {project}_stats.json while the data files are unchanged.
+
+        Args:
+            use_cache: Return the sidecar stats if they match the current files
+
         Returns:
-            Dictionary with data statistics
+            Dictionary with data statistics (column_stats: null_count / min / max per column).
+            With pending add_columns deltas missing_values of delta columns are estimates;
+            columns that a pending delta updates (already in the base files or in an earlier
+            delta) report null_count / min / max as None (unknown until compact).
         """
-        if not self.exists():
-            return {'error': 'Project not found'}
+        with self._lock():
+            if not self.exists():
+                return {'error': 'Project not found'}
+
+            fingerprint = self._fingerprint()
+            if use_cache and self.stats_sidecar:
+                cached = self._read_stats_sidecar()
+                if cached and cached.get('fingerprint') == fingerprint:
+                    return cached['stats']
+
+            # JSON round-trip - same value types as a cached result
+            stats = json.loads(json.dumps(self._footer_stats(), default=str))
+            if self.stats_sidecar:
+                self._write_stats_sidecar(stats, fingerprint)
+            return stats
+
+    def _footer_stats(self) -> Dict[str, Any]:
+        """get_stats() from Parquet metadata only"""
+        files = self._files()
+        deltas = self.list_deltas()
+
+        total_rows = 0
+        file_columns = []  # (path, rows, columns) per file - columns missing from a file are null there
+        schemas = []
+        column_stats: Dict[str, Dict[str, Any]] = {}
+
+        for path in files:
+            parquet_file = pq.ParquetFile(path)
+            metadata = parquet_file.metadata
+            schema = parquet_file.schema_arrow
+            total_rows += metadata.num_rows
+            schemas.append(schema)
+            file_columns.append((path, metadata.num_rows, set(schema.names)))
 
-        df = self.load()
+            for rg in range(metadata.num_row_groups):
+                row_group = metadata.row_group(rg)
+                for i in range(row_group.num_columns):
+                    chunk = row_group.column(i)
+                    if chunk.path_in_schema in schema.names:
+                        self._add_chunk_stats(column_stats.setdefault(chunk.path_in_schema, {}), chunk.statistics)
+
+        if self.is_partitioned:
+            schemas.append(pa.schema([(col, pa.string()) for col in self.partition_by]))
+            for depth, col in enumerate(self.partition_by):
+                col_stats = column_stats.setdefault(col, {'null_count': 0})
+                for path, rows, _ in file_columns:
+                    value = path.relative_to(self.table_dir).parts[depth].split('=', 1)[1]
+                    if value == PARTITION_NULL:
+                        col_stats['null_count'] += rows
+                    else:
+                        self._add_min_max(col_stats, unquote(value))
+            file_columns = [(path, rows, columns | set(self.partition_by)) for path, rows, columns in file_columns]
+
+        schema = pa.unify_schemas(schemas, promote_options='permissive') if schemas else pa.schema([])
+        for _, rows, columns in file_columns:
+            for col in schema.names:
+                if col not in columns and column_stats.setdefault(col, {}).get('null_count', 0) is not None:
+                    column_stats[col]['null_count'] = column_stats[col].get('null_count', 0) + rows
+
+        dtypes = schema.empty_table().to_pandas().dtypes.astype(str).to_dict()
+        columns = list(schema.names)
+
+        # Deltas: rows they do not cover stay null (estimate - keys assumed to exist in the project)
+        for path in deltas:
+            parquet_file = pq.ParquetFile(path)
+            delta_schema = parquet_file.schema_arrow
+            key = self._delta_info(path)['key']
+            for col in delta_schema.names:
+                if col == key:
+                    continue
+                if col in columns:
+                    # Base / earlier delta column updated by key - footers cannot tell which values remain
+                    column_stats[col] = {'null_count': None, 'min': None, 'max': None}
+                    continue
+                columns.append(col)
+                dtypes[col] = str(delta_schema.empty_table().to_pandas()[col].dtype)
+                delta_nulls = {}
+                metadata = parquet_file.metadata
+                for rg in range(metadata.num_row_groups):
+                    row_group = metadata.row_group(rg)
+                    for i in range(row_group.num_columns):
+                        if row_group.column(i).path_in_schema == col:
+                            self._add_chunk_stats(delta_nulls, row_group.column(i).statistics)
+                filled = metadata.num_rows - (delta_nulls.get('null_count') or 0)
+                column_stats[col] = {**delta_nulls, 'null_count': max(total_rows - filled, 0)}
 
         stats = {
             'project': self.project,
-            'total_rows': len(df),
-            'total_columns': len(df.columns),
-            'columns': list(df.columns),
-            'file_size_mb': round(self.file_path.stat().st_size / (1024 * 1024), 2),
-            'missing_values': df.isnull().sum().to_dict(),
-            'dtypes': df.dtypes.astype(str).to_dict()
+            'total_rows': total_rows,
+            'total_columns': len(columns),
+            'columns': columns,
+            'file_size_mb': round(sum(path.stat().st_size for path in files + deltas) / (1024 * 1024), 2),
+            'missing_values': {col: column_stats.get(col, {}).get('null_count') for col in columns},
+            'dtypes': dtypes,
+            'column_stats': {col: column_stats.get(col, {}) for col in columns}
         }
+        if self.is_partitioned:
+            stats['partition_by'] = self.partition_by
+            stats['partitions'] = len({path.parent for path in files})
+        stats['deltas'] = len(deltas)
 
         return stats
 
-    def _update_metadata(self, df: pd.DataFrame):
-        """Update metadata file with current state"""
+    @classmethod
+    def _add_chunk_stats(cls, col_stats: Dict[str, Any], statistics):
+        """Accumulate one column chunk's statistics (null_count None = unknown)"""
+        if statistics is None or not statistics.has_null_count:
+            col_stats['null_count'] = None
+        elif col_stats.get('null_count', 0) is not None:
+            col_stats['null_count'] = col_stats.get('null_count', 0) + statistics.null_count
+
+        if statistics is not None and statistics.has_min_max:
+            cls._add_min_max(col_stats, statistics.min)
+            cls._add_min_max(col_stats, statistics.max)
+
+    @staticmethod
+    def _add_min_max(col_stats: Dict[str, Any], value):
+        if isinstance(value, bytes):
+            value = value.decode('utf-8', errors='replace')
+        try:
+            if 'min' not in col_stats or value < col_stats['min']:
+                col_stats['min'] = value
+            if 'max' not in col_stats or value > col_stats['max']:
+                col_stats['max'] = value
+        except TypeError:
+            pass
+
+    def _fingerprint(self) -> List[List[Any]]:
+        """(path, size, mtime) of every data / delta file - stats cache key"""
+        fingerprint = []
+        for path in self._files() + self.list_deltas():
+            stat = path.stat()
+            fingerprint.append([str(path.relative_to(self.projects_dir)), stat.st_size, stat.st_mtime_ns])
+        return fingerprint
+
+    def _read_stats_sidecar(self) -> Optional[Dict[str, Any]]:
+        if not self.stats_path.exists():
+            return None
+        try:
+            with open(self.stats_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_stats_sidecar(self, stats: Dict[str, Any], fingerprint: List[List[Any]]):
+        # min / max may be dates / decimals - stored as strings
+        self._write_json(self.stats_path, {'fingerprint': fingerprint, 'stats': stats})
+
+    def _update_metadata(self, df: Optional[pd.DataFrame] = None):
+        """Update metadata file with current state (partitioned: counts from Parquet footers)"""
+        files = self._files()
+        deltas = self.list_deltas()
+        if df is None:
+            total_rows = sum(pq.ParquetFile(path).metadata.num_rows for path in files)
+            columns = self._base_schema().names if files else list(self.partition_by)
+        else:
+            total_rows, columns = len(df), list(df.columns)
+        for path in deltas:
+            columns += [col for col in pq.read_schema(path).names if col not in columns]
+
         metadata = {
             'project': self.project,
             'last_updated': datetime.now().isoformat(),
-            'total_rows': len(df),
-            'total_columns': len(df.columns),
-            'columns': list(df.columns),
-            'file_size_bytes': self.file_path.stat().st_size,
+            'total_rows': total_rows,
+            'total_columns': len(columns),
+            'columns': columns,
+            'file_size_bytes': sum(path.stat().st_size for path in files),
             'schema_version': '1.0.0'
         }
+        if self.is_partitioned:
+            metadata['partition_by'] = self.partition_by
+            metadata['partitions'] = len({path.parent for path in files})
+        if deltas:
+            metadata['deltas'] = len(deltas)
+
+        self._write_json(self.metadata_path, metadata)
+
+        if self.stats_sidecar and self.exists():
+            self._write_stats_sidecar(self._footer_stats(), self._fingerprint())
+
+    # ---------- versions / locking ----------
+
+    @contextmanager
+    def _lock(self, exclusive: bool = False):
+        """
+        Inter-process project lock ({project}.lock): shared for readers, exclusive for writers
+
+        Re-entrant within one instance (nested calls reuse the held lock).
+        The OS releases the lock when the process dies - a WRITE_MARKER left by
+        a dead writer is rolled back here (under the exclusive lock) before
+        readers see the half-written files.
+        """
+        if self.read_only:
+            # Snapshots are immutable
+            yield
+            return
+
+        with self._thread_lock:
+            if self._lock_depth:
+                if exclusive and not self._lock_exclusive:
+                    raise RuntimeError(f"Project '{self.project}': cannot write while holding a read lock")
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+
+            self.projects_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, 'a+b') as handle:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                else:
+                    # msvcrt has no shared locks; LK_LOCK gives up after ~10 s - keep waiting
+                    handle.seek(0)
+                    while True:
+                        try:
+                            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                            break
+                        except OSError:
+                            continue
+
+                self._lock_depth, self._lock_exclusive = 1, exclusive
+                try:
+                    if (self.versions_dir / WRITE_MARKER).exists():
+                        self._recover_locked(handle)
+                    yield
+                finally:
+                    self._lock_depth = 0
+                    if fcntl is None:
+                        handle.seek(0)
+                        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+    @contextmanager
+    def _write(self, operation: str, expected_version: Optional[int] = None):
+        """
+        Write transaction under the exclusive lock
+
+        The outermost one commits a new manifest version on success; on failure
+        the files of the last committed version are restored.
+        """
+        if self.read_only:
+            raise ValueError(f"Snapshot of project '{self.project}' is read-only")
+
+        with self._lock(exclusive=True):
+            if self._operation is not None:
+                yield
+                return
+
+            self._recover()
+            current = self.version
+            if expected_version is not None and current != expected_version:
+                raise ConcurrentWriteError(f"Project '{self.project}' is at version {current}, "
+                                           f"expected {expected_version} - reload and retry")
+            if current:
+                # Another process may have repartitioned since this instance was created
+                self.partition_by = list(self._manifest(current).get('partition_by') or [])
+            elif self._tracked_files():
+                # Existing project written before versioning - baseline to roll back to
+                current = self._commit('baseline')
+
+            marker = self.versions_dir / WRITE_MARKER
+            self._write_json(marker, {'operation': operation, 'pid': os.getpid(),
+                                      'started': datetime.now().isoformat()})
+            self._operation = operation
+            try:
+                yield
+                self._commit(operation)
+            except BaseException:
+                if current:
+                    self._restore(current)
+                marker.unlink(missing_ok=True)
+                raise
+            else:
+                marker.unlink(missing_ok=True)
+            finally:
+                self._operation = None
+
+    def _recover_locked(self, handle):
+        """_recover from inside _lock: a shared lock is upgraded to exclusive for the rollback"""
+        if self._lock_exclusive or fcntl is None:
+            # msvcrt locks are always exclusive
+            self._recover()
+            return
+
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        self._lock_exclusive = True
+        try:
+            # The upgrade is not atomic - another process may have recovered in between (_recover re-checks)
+            self._recover()
+        finally:
+            self._lock_exclusive = False
+            fcntl.flock(handle.fileno(), fcntl.LOCK_SH)
+
+    def _recover(self):
+        """Roll back the leftovers of a writer that died mid-operation (called under the exclusive lock)"""
+        marker = self.versions_dir / WRITE_MARKER
+        if not marker.exists():
+            return
+        current = self.version
+        print(f"Warning: interrupted write on project '{self.project}' - restoring version {current}")
+        if current:
+            self._restore(current)
+        marker.unlink()
+
+    @property
+    def version(self) -> int:
+        """Last committed manifest version (0 = no version yet)"""
+        versions = self._versions()
+        return versions[-1] if versions else 0
+
+    def list_versions(self) -> List[Dict[str, Any]]:
+        """
+        Committed versions, oldest first
+
+        Returns:
+            [{'version', 'created', 'operation', 'files', 'size_bytes'}, ...]
+        """
+        versions = []
+        for version in self._versions():
+            manifest = self._manifest(version)
+            versions.append({
+                'version': version,
+                'created': manifest['created'],
+                'operation': manifest['operation'],
+                'files': len(manifest['files']),
+                'size_bytes': sum(entry['size'] for entry in manifest['files'].values()),
+            })
+        return versions
+
+    def snapshot(self, version: int) -> 'ParquetManager':
+        """
+        Read-only manager over an old version (load / export_csv / get_stats)
+
+        Example:
+            df_before = manager.snapshot(12).load(columns=['place_id', 'emails'])
+        """
+        manifest = self._manifest(version)
+        view = copy.copy(self)
+        view._set_paths(self._version_dir(version) / 'projects')
+        view.partition_by = list(manifest.get('partition_by') or [])
+        view.read_only = True
+        view.stats_sidecar = False
+        view._thread_lock = threading.RLock()
+        view._lock_depth = 0
+        view._operation = None
+        return view
+
+    def rollback(self, version: int) -> int:
+        """
+        Restore the project to an old version (committed as a new version - rollback can be undone)
+
+        Returns:
+            Number of the new version
+        """
+        self._manifest(version)
+        with self._write(f'rollback to v{version}'):
+            self._restore(version)
+        return self.version
+
+    def _versions(self) -> List[int]:
+        if not self.versions_dir.exists():
+            return []
+        versions = []
+        for path in self.versions_dir.iterdir():
+            match = VERSION_DIR_PATTERN.match(path.name)
+            if match and (path / 'manifest.json').exists():
+                versions.append(int(match.group(1)))
+        return sorted(versions)
+
+    def _version_dir(self, version: int) -> Path:
+        return self.versions_dir / f'v{version:06d}'
+
+    def _manifest(self, version: int) -> Dict[str, Any]:
+        path = self._version_dir(version) / 'manifest.json'
+        if not path.exists():
+            raise ValueError(f"Version {version} of project '{self.project}' not found "
+                             f"(available: {self._versions()})")
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _tracked_files(self) -> List[Path]:
+        """Files that make up a version: data files (both layouts), deltas, metadata"""
+        files = [self.file_path] if self.file_path.exists() else []
+        if self.table_dir.exists():
+            files += sorted(self.table_dir.rglob('part-*.parquet'))
+        files += self.list_deltas()
+        if self.metadata_path.exists():
+            files.append(self.metadata_path)
+        return files
+
+    def _commit(self, operation: str) -> int:
+        """
+        Commit the tracked files as a new manifest version
+
+        The snapshot is a tree of hard links (no data is copied; writers always
+        replace files by rename, so linked content never changes). The version
+        becomes visible with the final directory rename.
+        """
+        files = {}
+        for path in self._tracked_files():
+            stat = path.stat()
+            files[path.relative_to(self.projects_dir).as_posix()] = {'size': stat.st_size,
+                                                                     'mtime_ns': stat.st_mtime_ns}
+
+        current = self.version
+        if current and self._manifest(current)['files'] == files:
+            # Nothing changed (e.g. compact() without deltas)
+            return current
+
+        version = current + 1
+        version_dir = self._version_dir(version)
+        tmp_dir = version_dir.with_name(f'{version_dir.name}.tmp')
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        for rel in files:
+            target = tmp_dir / 'projects' / rel
+            target.parent.mkdir(parents=True, exist_ok=True)
+            self._link_or_copy(self.projects_dir / rel, target)
+
+        self._write_json(tmp_dir / 'manifest.json', {
+            'version': version,
+            'created': datetime.now().isoformat(),
+            'operation': operation,
+            'partition_by': self.partition_by,
+            'files': files,
+        })
+        tmp_dir.rename(version_dir)
+        self._prune_versions()
+        return version
+
+    def _restore(self, version: int):
+        """Make the tracked files equal to a committed version (hard links from its snapshot)"""
+        manifest = self._manifest(version)
+        snapshot_dir = self._version_dir(version) / 'projects'
+
+        # Temp files of an interrupted write
+        leftovers = [self.file_path.with_suffix('.parquet.tmp'), self.table_dir.with_name('table.old')]
+        leftovers += list(self.table_dir.rglob('*.parquet.tmp')) if self.table_dir.exists() else []
+        leftovers += list(self.deltas_dir.glob('*.parquet.tmp')) if self.deltas_dir.exists() else []
+        for path in leftovers:
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink(missing_ok=True)
+
+        for path in self._tracked_files():
+            if path.relative_to(self.projects_dir).as_posix() in manifest['files']:
+                continue
+            path.unlink()
+            parent = path.parent
+            while self.table_dir in parent.parents and not any(parent.iterdir()):
+                parent.rmdir()
+                parent = parent.parent
+
+        for rel in manifest['files']:
+            source, target = snapshot_dir / rel, self.projects_dir / rel
+            if target.exists() and os.path.samefile(source, target):
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = target.with_name(f'{target.name}.restore')
+            tmp_path.unlink(missing_ok=True)
+            self._link_or_copy(source, tmp_path)
+            os.replace(tmp_path, target)
+
+        self.partition_by = list(manifest.get('partition_by') or [])
+
+    def _prune_versions(self):
+        """Delete versions beyond keep_versions (the current one is always kept) and aborted commits"""
+        for tmp_dir in self.versions_dir.glob('v*.tmp'):
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        if self.keep_versions is None:
+            return
+        for version in self._versions()[:-max(self.keep_versions, 1)]:
+            shutil.rmtree(self._version_dir(version), ignore_errors=True)
+
+    @staticmethod
+    def _link_or_copy(source: Path, target: Path):
+        try:
+            os.link(source, target)
+        except OSError:
+            # Filesystem without hard links
+            shutil.copy2(source, target)
+
+    @staticmethod
+    def _replace_parquet(df: pd.DataFrame, path: Path):
+        """Write a Parquet file via temp file + rename (readers see the old or the new file, never a partial one)"""
+        tmp_path = path.with_suffix('.parquet.tmp')
+        df.to_parquet(tmp_path, compression='snappy', index=False)
+        os.replace(tmp_path, path)
 
-        with open(self.metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2)
+    @staticmethod
+    def _write_json(path: Path, data: Dict[str, Any]):
+        """Write JSON via temp file + rename (unique temp name - concurrent readers may refresh the stats sidecar)"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, default=str)
+        os.replace(tmp_path, path)
 
 
 def list_projects() -> List[str]:
@@ -264,7 +1339,10 @@ def list_projects() -> List[str]:
         return []
 
     parquet_files = list(projects_dir.glob('*.parquet'))
-    return [f.stem for f in parquet_files if not f.stem.endswith('_metadata')]
+    projects = {f.stem for f in parquet_files if not f.stem.endswith('_metadata')}
+    # Partitioned projects: data/projects/{project}/table/
+    projects.update(table_dir.parent.name for table_dir in projects_dir.glob('*/table') if table_dir.is_dir())
+    return sorted(projects)
 
 
 if __name__ == "__main__":
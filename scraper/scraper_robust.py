@@ -11,6 +11,10 @@ IMPROVEMENTS FOR 80%+ SUCCESS RATE:
 
 TARGET: 80%+ success rate (vs 44% baseline)
 
+ENGINE:
+Fetching (pooled session, DNS cache, retry, URL variants) runs on
+modules/scraping/lib/scrape_engine.py - shared with the homepage email scrapers
+
 USAGE:
 python scraper/scraper_robust.py
 """
@@ -19,14 +23,13 @@ import sys
 import os
 import time
 import re
+import json
 import asyncio
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, Dict, List, Tuple
 from dataclasses import dataclass, field
 import pandas as pd
-import aiohttp
-from aiohttp import ClientTimeout, TCPConnector
 from bs4 import BeautifulSoup
 import html2text
 from openai import AsyncOpenAI
@@ -43,6 +46,11 @@ except ImportError:
     logging.basicConfig(level=logging.INFO)
     logger = logging.getLogger(__name__)
 
+from modules.scraping.lib.scrape_engine import AsyncFetchStage, NXDOMAIN_ERROR
+from modules.scraping.lib.dns_resolver import DNSPreResolver
+from modules.scraping.lib.response_cache import ResponseCache, DEFAULT_CACHE_PATH
+from modules.scraping.lib.dead_domains import DeadDomainCache, DEFAULT_DEAD_DOMAINS_PATH
+
 load_dotenv()
 
 # ========================
@@ -65,6 +73,8 @@ class ErrorStats:
     dns_errors: int = 0
     connection_errors: int = 0
     other_errors: int = 0
+    skipped_dead_domains: int = 0
+    skipped_nxdomain: int = 0
 
     # Retry stats
     succeeded_on_retry: int = 0
@@ -100,6 +110,8 @@ class ErrorStats:
         logger.info(f"  - DNS errors: {self.dns_errors}")
         logger.info(f"  - Connection errors: {self.connection_errors}")
         logger.info(f"  - Other: {self.other_errors}")
+        logger.info(f"  - Skipped (dead domain cooldown): {self.skipped_dead_domains}")
+        logger.info(f"  - Skipped (DNS NXDOMAIN): {self.skipped_nxdomain}")
         logger.info(f"\nPerformance:")
         logger.info(f"  - Total time: {self.total_time:.1f}s")
         logger.info(f"  - Avg per site: {self.avg_time_per_site:.2f}s")
@@ -151,6 +163,22 @@ CONFIG = {
     "RETRY_TIMEOUTS": [10, 20, 30],  # Progressive timeouts
     "TRY_FALLBACK_URLS": True,  # Try http/https, www variants
 
+    # RESPONSE CACHE (reruns read pages from disk instead of the network)
+    "RESPONSE_CACHE": False,
+    "CACHE_FILE": None,  # None = data/cache/http_responses.sqlite
+    "CACHE_TTL_HOURS": 168,
+
+    # DEAD DOMAINS (skip domains that failed with DNS/connection/timeout errors in previous runs)
+    "SKIP_DEAD_DOMAINS": False,
+    "DEAD_DOMAINS_FILE": None,  # None = data/cache/dead_domains.sqlite
+    "DEAD_DOMAIN_COOLDOWN_HOURS": 24,  # Doubles on every repeated failure
+
+    # DNS PRE-RESOLUTION (resolve all domains up front, NXDOMAIN rows fail without a scrape slot)
+    "DNS_PRERESOLVE": True,
+
+    # HTTP/2 (https sites over one multiplexed connection per host, needs httpx[http2]; falls back to HTTP/1.1)
+    "HTTP2": False,
+
     "TEXT_FORMAT": "markdown",
     "MAX_WORDS": 6000,
 
@@ -174,152 +202,111 @@ Be thorough but concise. Extract the most important information.""",
 }
 
 # ========================
-# URL UTILITIES
+# ROBUST SCRAPING WITH RETRY
 # ========================
 
-def generate_url_variants(url: str) -> List[str]:
+def html_to_text(html: str) -> str:
     """
-    Generate URL variants to try as fallbacks.
-
-    Returns list: [original, without_www, with_www, http_version, etc]
+    Convert page HTML to markdown / plain text (CONFIG['TEXT_FORMAT']), truncated to MAX_WORDS.
     """
-    url = url.strip()
-    if not url:
-        return []
-
-    variants = []
-
-    # Normalize base URL
-    if not url.startswith(('http://', 'https://')):
-        base_url = url
-    else:
-        base_url = url.replace('https://', '').replace('http://', '')
-
-    # Remove trailing slash
-    base_url = base_url.rstrip('/')
-
-    # Generate variants
-    # 1. Original with https and www
-    if not base_url.startswith('www.'):
-        variants.append(f'https://www.{base_url}')
+    # Parse HTML
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Remove unwanted elements
+    for tag in soup(['script', 'style', 'nav', 'footer', 'header', 'iframe']):
+        tag.decompose()
+
+    # Convert to markdown
+    if CONFIG['TEXT_FORMAT'] == 'markdown':
+        h = html2text.HTML2Text()
+        h.ignore_links = False
+        h.ignore_images = True
+        h.body_width = 0
+        text = h.handle(str(soup))
     else:
-        variants.append(f'https://{base_url}')
+        text = soup.get_text(separator=' ', strip=True)
 
-    # 2. https without www
-    no_www = base_url.replace('www.', '', 1)
-    variants.append(f'https://{no_www}')
+    # Clean whitespace
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = re.sub(r' {2,}', ' ', text)
+    text = text.strip()
 
-    # 3. http with www
-    if not base_url.startswith('www.'):
-        variants.append(f'http://www.{base_url}')
-    else:
-        variants.append(f'http://{base_url}')
-
-    # 4. http without www
-    variants.append(f'http://{no_www}')
+    # Truncate to max words
+    words = text.split()
+    if len(words) > CONFIG['MAX_WORDS']:
+        text = ' '.join(words[:CONFIG['MAX_WORDS']])
+        text += '\n\n[Content truncated due to length...]'
 
-    # Remove duplicates while preserving order
-    seen = set()
-    unique_variants = []
-    for v in variants:
-        if v not in seen:
-            seen.add(v)
-            unique_variants.append(v)
+    return text
 
-    return unique_variants
 
+def record_failed_attempt(result: Dict):
+    """Count one failed fetch attempt in error_stats (AsyncFetchStage on_attempt hook)."""
+    status = result['status']
 
-# ========================
-# ROBUST SCRAPING WITH RETRY
-# ========================
-
-async def scrape_single_attempt(
-    session: aiohttp.ClientSession,
-    url: str,
-    timeout: int,
-    attempt: int
-) -> Tuple[Optional[str], Optional[str]]:
-    """
-    Single scrape attempt.
-
-    Returns:
-        (content, error_reason) - one will be None
-    """
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-
-        async with session.get(url, headers=headers, ssl=False, timeout=timeout) as response:
-            if response.status == 403:
-                error_stats.http_403_errors += 1
-                return (None, f"HTTP 403 Forbidden")
-
-            if response.status == 404:
-                error_stats.http_404_errors += 1
-                return (None, f"HTTP 404 Not Found")
-
-            if response.status != 200:
-                error_stats.http_other_errors += 1
-                return (None, f"HTTP {response.status}")
-
-            html = await response.text()
-
-            # Parse HTML
-            soup = BeautifulSoup(html, 'html.parser')
-
-            # Remove unwanted elements
-            for tag in soup(['script', 'style', 'nav', 'footer', 'header', 'iframe']):
-                tag.decompose()
-
-            # Convert to markdown
-            if CONFIG['TEXT_FORMAT'] == 'markdown':
-                h = html2text.HTML2Text()
-                h.ignore_links = False
-                h.ignore_images = True
-                h.body_width = 0
-                text = h.handle(str(soup))
-            else:
-                text = soup.get_text(separator=' ', strip=True)
+    if status == 'http_error':
+        if result['http_status'] == 403:
+            error_stats.http_403_errors += 1
+        elif result['http_status'] == 404:
+            error_stats.http_404_errors += 1
+        else:
+            error_stats.http_other_errors += 1
+    elif status == 'timeout':
+        error_stats.timeout_errors += 1
+    elif status == 'ssl_error':
+        error_stats.ssl_errors += 1
+    elif status == 'dns_error':
+        error_stats.dns_errors += 1
+    elif status == 'connection_error':
+        error_stats.connection_errors += 1
+    else:
+        error_stats.other_errors += 1
 
-            # Clean whitespace
-            text = re.sub(r'\n{3,}', '\n\n', text)
-            text = re.sub(r' {2,}', ' ', text)
-            text = text.strip()
+    logger.debug(f"Attempt {result['attempt']} - URL variant {result['variant']}: {result['url']} -> {result['error']}")
 
-            # Truncate to max words
-            words = text.split()
-            if len(words) > CONFIG['MAX_WORDS']:
-                text = ' '.join(words[:CONFIG['MAX_WORDS']])
-                text += '\n\n[Content truncated due to length...]'
 
-            return (text, None)
+def create_fetch_stage(dns_resolver: Optional[DNSPreResolver] = None) -> AsyncFetchStage:
+    """Fetch stage with retry + fallback URL settings from CONFIG."""
+    cache = None
+    if CONFIG.get('RESPONSE_CACHE'):
+        cache = ResponseCache(CONFIG.get('CACHE_FILE') or DEFAULT_CACHE_PATH,
+                              ttl_seconds=CONFIG.get('CACHE_TTL_HOURS', 168) * 3600)
 
-    except asyncio.TimeoutError:
-        error_stats.timeout_errors += 1
-        return (None, f"Timeout ({timeout}s)")
+    return AsyncFetchStage(
+        concurrency=CONFIG['CONCURRENT_SCRAPERS'],
+        limit_per_host=5,
+        timeouts=CONFIG['RETRY_TIMEOUTS'][:CONFIG['MAX_RETRIES']],
+        retry_on=AsyncFetchStage.RETRY_ALL,  # Retry every error except 404
+        retry_delay=0.5,
+        try_url_variants=CONFIG['TRY_FALLBACK_URLS'],
+        ssl=False,
+        on_attempt=record_failed_attempt,
+        cache=cache,
+        dns_resolver=dns_resolver,
+        http2=CONFIG.get('HTTP2', False)
+    )
 
-    except aiohttp.ClientSSLError as e:
-        error_stats.ssl_errors += 1
-        return (None, f"SSL Error")
 
-    except aiohttp.ClientConnectorError as e:
-        error_stats.dns_errors += 1
-        return (None, f"DNS/Connection Error")
+def create_dead_domains() -> Optional[DeadDomainCache]:
+    """Negative cache of dead domains (None if disabled in CONFIG)."""
+    if not CONFIG.get('SKIP_DEAD_DOMAINS'):
+        return None
+    return DeadDomainCache(CONFIG.get('DEAD_DOMAINS_FILE') or DEFAULT_DEAD_DOMAINS_PATH,
+                           cooldown_hours=CONFIG.get('DEAD_DOMAIN_COOLDOWN_HOURS', 24))
 
-    except aiohttp.ClientConnectionError as e:
-        error_stats.connection_errors += 1
-        return (None, f"Connection Error")
 
-    except Exception as e:
-        error_stats.other_errors += 1
-        return (None, f"Error: {type(e).__name__}")
+def create_dns_resolver() -> Optional[DNSPreResolver]:
+    """Bulk DNS pre-resolver (None if disabled in CONFIG)."""
+    if not CONFIG.get('DNS_PRERESOLVE'):
+        return None
+    return DNSPreResolver(concurrency=max(CONFIG['CONCURRENT_SCRAPERS'], 200))
 
 
 async def scrape_with_retry(
-    session: aiohttp.ClientSession,
+    fetch_stage: AsyncFetchStage,
     url: str,
-    idx: int
+    idx: int,
+    dead_domains: Optional[DeadDomainCache] = None
 ) -> Tuple[int, Optional[str], str, str]:
     """
     Scrape with retry logic and fallback URLs.
@@ -328,83 +315,65 @@ async def scrape_with_retry(
         (idx, content, status, error_reason)
     """
     error_stats.total_attempts += 1
-    original_url = url
-
-    # Generate URL variants for fallback
-    url_variants = generate_url_variants(url)
 
-    if not url_variants:
+    if not str(url).strip():
         error_stats.failed += 1
         return (idx, None, 'no_url', 'Empty URL')
 
-    last_error = "Unknown error"
-    attempted_urls = []
-
-    # Try each URL variant
-    for variant_idx, url_to_try in enumerate(url_variants):
-        attempted_urls.append(url_to_try)
-
-        # Try with progressive timeouts
-        for attempt in range(CONFIG['MAX_RETRIES']):
-            timeout_seconds = CONFIG['RETRY_TIMEOUTS'][attempt]
-
-            logger.info(f"[{idx}] Attempt {attempt + 1}/{CONFIG['MAX_RETRIES']} - URL variant {variant_idx + 1}/{len(url_variants)}: {url_to_try} (timeout: {timeout_seconds}s)")
-
-            content, error_reason = await scrape_single_attempt(
-                session,
-                url_to_try,
-                timeout_seconds,
-                attempt + 1
-            )
+    if dead_domains is not None:
+        dead = dead_domains.check(str(url))
+        if dead:
+            error_stats.failed += 1
+            error_stats.skipped_dead_domains += 1
+            return (idx, None, 'skipped_dead_domain', dead_domains.describe(dead))
 
-            if content:
-                # SUCCESS!
-                words = len(content.split())
-                logger.info(f"[{idx}] ✅ Success on attempt {attempt + 1}, variant {variant_idx + 1}: {words} words")
+    result = await fetch_stage.fetch(str(url))
 
-                error_stats.successful += 1
+    if dead_domains is not None:
+        dead_domains.record(str(url), result['status'])
 
-                if attempt > 0:
-                    error_stats.succeeded_on_retry += 1
+    if result['status'] == 'success':
+        content = html_to_text(result['content'])
 
-                if variant_idx > 0:
-                    error_stats.succeeded_with_fallback += 1
+        if content:
+            # SUCCESS!
+            attempt, variant = result['attempt'], result['variant']
+            logger.info(f"[{idx}] ✅ Success on attempt {attempt}, variant {variant}: {len(content.split())} words")
 
-                status_msg = f"success_attempt_{attempt + 1}"
-                if variant_idx > 0:
-                    status_msg += f"_variant_{variant_idx + 1}"
+            error_stats.successful += 1
 
-                return (idx, content, status_msg, "")
+            if attempt > 1:
+                error_stats.succeeded_on_retry += 1
 
-            last_error = error_reason or "Unknown error"
+            if variant > 1:
+                error_stats.succeeded_with_fallback += 1
 
-            # If 404, don't retry - page doesn't exist
-            if "404" in last_error:
-                break
+            status_msg = f"success_attempt_{attempt}"
+            if variant > 1:
+                status_msg += f"_variant_{variant}"
 
-            # Small delay between retries
-            if attempt < CONFIG['MAX_RETRIES'] - 1:
-                await asyncio.sleep(0.5)
+            return (idx, content, status_msg, "")
 
-        # If we got 403 or timeout, try next URL variant
-        # If 404, break - no point trying other variants
-        if "404" in last_error:
-            break
+        last_error = "Empty content"
+    else:
+        last_error = result.get('error') or "Unknown error"
 
     # All attempts failed
     error_stats.failed += 1
     logger.warning(f"[{idx}] ❌ Failed after all attempts. Last error: {last_error}")
-    logger.warning(f"[{idx}] Tried URLs: {', '.join(attempted_urls)}")
+    logger.warning(f"[{idx}] Tried URLs: {', '.join(result.get('tried_urls', []))}")
 
     return (idx, None, 'scrape_failed', last_error)
 
 
 async def scrape_batch_robust(
-    session: aiohttp.ClientSession,
+    fetch_stage: AsyncFetchStage,
     urls: List[Tuple[int, str]],
     semaphore: asyncio.Semaphore,
     progress_file: Optional[str] = None,
-    start_time: float = None
+    start_time: float = None,
+    dead_domains: Optional[DeadDomainCache] = None,
+    dns_resolver: Optional[DNSPreResolver] = None
 ) -> List[Tuple[int, Optional[str], str, str]]:
     """Scrape batch with retry logic and progress updates."""
     total_urls = len(urls)
@@ -412,11 +381,27 @@ async def scrape_batch_robust(
     successful = 0
     failed = 0
 
+    # Resolve every domain in one concurrent pass - NXDOMAIN rows never take a semaphore slot
+    dead_urls = set()
+    if dns_resolver is not None:
+        dead_urls = await dns_resolver.find_unresolvable([str(url) for _, url in urls],
+                                                         www_variants=fetch_stage.try_url_variants)
+        logger.info(f"DNS pre-resolution ({dns_resolver.backend}): {len(dead_urls)} domains do not exist")
+
     async def scrape_with_semaphore_and_progress(idx, url):
         nonlocal completed, successful, failed
 
+        if str(url) in dead_urls:
+            error_stats.total_attempts += 1
+            error_stats.failed += 1
+            error_stats.skipped_nxdomain += 1
+            # Not recorded in dead_domains - a pre-resolve verdict only holds for this run
+            completed += 1
+            failed += 1
+            return (idx, None, 'dns_nxdomain', NXDOMAIN_ERROR)
+
         async with semaphore:
-            result = await scrape_with_retry(session, url, idx)
+            result = await scrape_with_retry(fetch_stage, url, idx, dead_domains=dead_domains)
 
             # Update counters
             completed += 1
@@ -611,18 +596,23 @@ async def process_csv_async(input_file: str) -> str:
     # PHASE 1: Scrape all websites with retry logic
     logger.info("\n[PHASE 1/2] Scraping websites with retry + fallback...")
 
-    timeout = ClientTimeout(total=max(CONFIG['RETRY_TIMEOUTS']))
-    connector = TCPConnector(limit=CONFIG['CONCURRENT_SCRAPERS'], limit_per_host=5)
     scrape_semaphore = asyncio.Semaphore(CONFIG['CONCURRENT_SCRAPERS'])
 
-    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+    dns_resolver = create_dns_resolver()
+    async with create_fetch_stage(dns_resolver) as fetch_stage:
         scrape_results = await scrape_batch_robust(
-            session,
+            fetch_stage,
             urls_to_scrape,
             scrape_semaphore,
             progress_file=progress_file,
-            start_time=start_time
+            start_time=start_time,
+            dead_domains=create_dead_domains(),
+            dns_resolver=dns_resolver
         )
+        if fetch_stage.http2:
+            h2_stats = fetch_stage.get_protocol_stats()
+            logger.info(f"HTTP/2: {h2_stats['h2_hosts']}/{h2_stats['hosts']} hosts ({h2_stats['h2_share']:.0%}), "
+                        f"{h2_stats['h1_fallback_hosts']} fell back to HTTP/1.1")
 
     scrape_time = time.time() - start_time
     error_stats.total_time = scrape_time